@@ -406,6 +406,75 @@ OPENSEARCH_DSL = {
 # Workaround because it wont add the connection settings automatically
 connections.configure(default=OPENSEARCH_DSL["default"])
 
+# Index saved articles once per transaction
+OPENSEARCH_DSL_SIGNAL_PROCESSOR = "scoap3.articles.signals.ArticleSignalProcessor"
+
+# Bulk indexing: articles serialized per batch, documents per bulk request
+# and concurrent bulk requests
+OPENSEARCH_INDEXING_BATCH_SIZE = env.int("OPENSEARCH_INDEXING_BATCH_SIZE", 1000)
+OPENSEARCH_BULK_CHUNK_SIZE = env.int("OPENSEARCH_BULK_CHUNK_SIZE", 500)
+OPENSEARCH_BULK_THREAD_COUNT = env.int("OPENSEARCH_BULK_THREAD_COUNT", 4)
+# Seconds between the catch-up reindexes of articles changed since the last one
+OPENSEARCH_REINDEX_INTERVAL = env.int("OPENSEARCH_REINDEX_INTERVAL", 900)
+
+# Number of sliced scrolls read concurrently by the exports
+EXPORT_SCAN_SLICES = env.int("EXPORT_SCAN_SLICES", 4)
+
+# Export jobs: seconds a finished export is reused for identical requests,
+# seconds after which an unfinished job is considered dead, and rows between
+# progress updates
+EXPORT_ARTIFACT_MAX_AGE = env.int("EXPORT_ARTIFACT_MAX_AGE", 3600)
+EXPORT_JOB_TIMEOUT = env.int("EXPORT_JOB_TIMEOUT", 6 * 3600)
+EXPORT_JOB_PROGRESS_EVERY = env.int("EXPORT_JOB_PROGRESS_EVERY", 1000)
+# Rows per row group of Parquet exports
+EXPORT_PARQUET_ROW_GROUP_SIZE = env.int("EXPORT_PARQUET_ROW_GROUP_SIZE", 50000)
+
+# Crossref lookups: contact address sent with the requests, timeout in
+# seconds, DOIs per filter query, and seconds after which DOIs without
+# registration dates are looked up again
+CROSSREF_MAILTO = env("CROSSREF_MAILTO", default="")
+CROSSREF_TIMEOUT = env.int("CROSSREF_TIMEOUT", 30)
+CROSSREF_BATCH_SIZE = env.int("CROSSREF_BATCH_SIZE", 50)
+DOI_REGISTRATION_NEGATIVE_TTL = env.int("DOI_REGISTRATION_NEGATIVE_TTL", 24 * 3600)
+
+# Worker processes extracting the text of article PDFs, 0 to extract inline.
+# Daemonic processes, such as Celery prefork pool workers, always extract inline.
+PDF_EXTRACTION_PROCESSES = env.int("PDF_EXTRACTION_PROCESSES", 2)
+# Pages of an article file scanned for a phrase, 0 for no limit
+PDF_SCAN_MAX_PAGES = env.int("PDF_SCAN_MAX_PAGES", 100)
+# Bytes of an article file downloaded for scanning, 0 for no limit
+PDF_SCAN_MAX_BYTES = env.int("PDF_SCAN_MAX_BYTES", 200 * 1024 * 1024)
+
+# Articles checked for compliance together, and threads scanning their files,
+# 0 to scan them inline
+COMPLIANCE_CHECK_BATCH_SIZE = env.int("COMPLIANCE_CHECK_BATCH_SIZE", 200)
+COMPLIANCE_CHECK_THREADS = env.int("COMPLIANCE_CHECK_THREADS", 4)
+
+# Seconds shared caches may serve anonymous article API responses before
+# revalidating them with their ETag
+API_CACHE_MAX_AGE = env.int("API_CACHE_MAX_AGE", 60)
+# Seconds search responses are kept in the cache, and seconds a request
+# waits for another one rendering the same search
+SEARCH_CACHE_TIMEOUT = env.int("SEARCH_CACHE_TIMEOUT", 600)
+SEARCH_CACHE_LOCK_TIMEOUT = env.int("SEARCH_CACHE_LOCK_TIMEOUT", 10)
+# Seconds between the refreshes of the cached article stats, and seconds
+# after which a request schedules a refresh while serving the cached ones
+ARTICLE_STATS_REFRESH_INTERVAL = env.int("ARTICLE_STATS_REFRESH_INTERVAL", 300)
+ARTICLE_STATS_MAX_AGE = env.int("ARTICLE_STATS_MAX_AGE", 600)
+# Extra article stats breakdowns, "countries" and/or "publishers"
+ARTICLE_STATS_BREAKDOWNS = env.list("ARTICLE_STATS_BREAKDOWNS", default=[])
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-schedule
+CELERY_BEAT_SCHEDULE = {
+    "reindex-changed-articles": {
+        "task": "scoap3.articles.tasks.reindex_changed_articles",
+        "schedule": OPENSEARCH_REINDEX_INTERVAL,
+    },
+    "update-article-stats": {
+        "task": "scoap3.articles.tasks.update_article_stats",
+        "schedule": ARTICLE_STATS_REFRESH_INTERVAL,
+    },
+}
+
 
 # Matomo tracking server and site information
 MATOMO_URL = env("MATOMO_URL", default="")
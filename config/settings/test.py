@@ -28,6 +28,13 @@ PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-backend
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
+# PDF
+# ------------------------------------------------------------------------------
+# Extract article PDFs inline instead of spawning worker processes.
+PDF_EXTRACTION_PROCESSES = 0
+# Test transactions are not visible to other threads.
+COMPLIANCE_CHECK_THREADS = 0
+
 # DEBUGGING FOR TEMPLATES
 # ------------------------------------------------------------------------------
 TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore # noqa: F405
@@ -8,7 +8,7 @@ from django.views.generic import TemplateView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.authtoken.views import obtain_auth_token
 
-from scoap3.exports.views import ExportView
+from scoap3.exports.views import ExportView, export_job_download
 
 from .sitemaps import ArticleSitemap
 
@@ -27,6 +27,11 @@ urlpatterns = [
         admin.site.admin_view(ExportView.as_view()),
         name="admin_tools",
     ),
+    path(
+        settings.ADMIN_URL + "tools/exports/<int:pk>/download/",
+        admin.site.admin_view(export_job_download),
+        name="admin_export_download",
+    ),
     path(settings.ADMIN_URL, admin.site.urls),
     path("select2/", include("django_select2.urls")),
     # User management
@@ -14,7 +14,8 @@ from scoap3.articles.models import (
     ArticleIdentifier,
     ComplianceReport,
 )
-from scoap3.articles.tasks import compliance_checks
+from scoap3.articles.signals import refresh_snapshots_on_commit
+from scoap3.articles.tasks import schedule_compliance_checks
 from scoap3.authors.models import Author
 
 
@@ -301,6 +302,10 @@ class ArticleAdmin(admin.ModelAdmin):
     ]
     inlines = [ArticleAuthorsInline, ArticleComplianceReportInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_snapshots_on_commit([form.instance.pk])
+
     @admin.display(description="Journal")
     def journal_title(self, obj):
         return [info.journal_title for info in obj.publication_info.all()]
@@ -328,10 +333,11 @@ class ArticleAdmin(admin.ModelAdmin):
 
     @admin.action(description="Run compliance checks")
     def make_compliance_check(self, request, queryset):
-        ids = []
-        for obj in queryset:
-            compliance_checks.apply_async(args=[obj.id], priority=9)
-            ids.append(str(obj.id))
+        article_ids = list(queryset.values_list("id", flat=True))
+        schedule_compliance_checks.apply_async(
+            args=[article_ids], kwargs={"force": True}, priority=9
+        )
+        ids = map(str, article_ids)
         messages.success(
             request,
             f"""
@@ -0,0 +1,182 @@
+import hashlib
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from scoap3.articles.indexing import get_index_generation
+from scoap3.articles.models import Article
+
+SEARCH_CACHE_PREFIX = "articles:search"
+SEARCH_CACHE_POLL_INTERVAL = 0.05
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256(":".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return quote_etag(digest[:40])
+
+
+def get_normalized_query(request):
+    """Query parameters sorted by name, without empty ones."""
+    return sorted(
+        (key, values)
+        for key, values in request.query_params.lists()
+        if any(value != "" for value in values)
+    )
+
+
+def set_cache_control(request, response):
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+    patch_vary_headers(response, ["Accept", "Cookie", "Authorization"])
+
+
+def conditional_response(request, etag, last_modified, render):
+    """Answer the preconditions of ``request``, or return ``render()``.
+
+    A matching ``If-None-Match`` or ``If-Modified-Since`` gets a 304 without
+    calling ``render``.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render()
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        set_cache_control(request, response)
+    return response
+
+
+class ConditionalRetrieveMixin:
+    """Validate ``retrieve`` with the ``_updated_at`` of the article."""
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            article_id = int(kwargs[self.lookup_field])
+        except ValueError:
+            article_id = None
+        updated_at = (
+            Article.objects.filter(pk=article_id)
+            .values_list("_updated_at", flat=True)
+            .first()
+        )
+        if not updated_at:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = make_etag(
+            type(self).__name__,
+            article_id,
+            updated_at.isoformat(),
+            request.accepted_media_type,
+            request.get_host(),
+        )
+        return conditional_response(
+            request,
+            etag,
+            updated_at,
+            lambda: super(ConditionalRetrieveMixin, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
+
+
+def get_user_role(request):
+    return "staff" if request.user.is_staff else "public"
+
+
+class ConditionalSearchMixin:
+    """Validate and cache searches by index generation and normalized query.
+
+    Rendered responses are cached under a key holding the index generation,
+    so bumping it invalidates every entry. Only one request renders a missing
+    entry at a time, the others wait up to ``SEARCH_CACHE_LOCK_TIMEOUT``
+    seconds for it.
+    """
+
+    def get_search_cache_timeout(self, request):
+        # browsable API pages hold per-user content
+        if request.accepted_media_type.startswith("text/html"):
+            return 0
+        timeout = settings.SEARCH_CACHE_TIMEOUT
+        # spread the expiry of entries cached together
+        return timeout + random.randint(0, timeout // 10)
+
+    def conditional_list(self, request, render):
+        generation = get_index_generation()
+        if generation is None:
+            return render()
+
+        etag = make_etag(
+            type(self).__name__,
+            generation,
+            get_normalized_query(request),
+            request.accepted_media_type,
+            get_user_role(request),
+            request.get_host(),
+        )
+        key = "{}:{}:{}".format(SEARCH_CACHE_PREFIX, generation, etag.strip('"'))
+        return conditional_response(
+            request, etag, None, lambda: self.cached_render(request, key, render)
+        )
+
+    def cached_render(self, request, key, render):
+        timeout = self.get_search_cache_timeout(request)
+        if not timeout:
+            return render()
+
+        entry = cache.get(key)
+        if entry is None:
+            lock_key = f"{key}:lock"
+            if cache.add(lock_key, True, timeout=settings.SEARCH_CACHE_LOCK_TIMEOUT):
+                try:
+                    return self._render_to_cache(request, key, render, timeout)
+                finally:
+                    cache.delete(lock_key)
+            entry = _wait_for_entry(key, lock_key)
+        if entry is None:
+            return render()
+
+        response = HttpResponse(entry["content"], status=entry["status"])
+        for header, value in entry["headers"].items():
+            response[header] = value
+        return response
+
+    def _render_to_cache(self, request, key, render, timeout):
+        response = render()
+        if response.status_code != 200 or not isinstance(response, Response):
+            return response
+
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        response.render()
+        entry = {
+            "content": response.content,
+            "status": response.status_code,
+            "headers": dict(response.items()),
+        }
+        cache.set(key, entry, timeout=timeout)
+        return response
+
+
+def _wait_for_entry(key, lock_key):
+    deadline = time.monotonic() + settings.SEARCH_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(SEARCH_CACHE_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None or cache.get(lock_key) is None:
+            return entry
+    return None
@@ -5,20 +5,14 @@ from drf_queryfields import QueryFieldsMixin
 from rest_framework import serializers
 
 from scoap3.articles.documents import ArticleDocument
-from scoap3.articles.models import (
-    Article,
-    ArticleFile,
-    ArticleIdentifier,
-    ArticleIdentifierType,
-)
-from scoap3.authors.api.serializers import AuthorSerializer
-from scoap3.authors.models import AuthorIdentifierType
+from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.authors.api.serializers import AuthorSerializer, get_orcid
 from scoap3.misc.api.serializers import (
     ArticleArxivCategorySerializer,
     CopyrightSerializer,
     PublicationInfoSerializer,
+    get_ror,
 )
-from scoap3.misc.models import InstitutionIdentifierType
 
 
 class ArticleFileSerializer(serializers.ModelSerializer):
@@ -47,13 +41,13 @@ class ArticleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Article
-        fields = "__all__"
+        exclude = ["import_fingerprint"]
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         if instance.publication_date is None:
             representation["publication_date"] = instance._created_at
-        if instance.publication_info.exists():
+        if instance.publication_info.all():
             for pub_info in representation["publication_info"]:
                 if pub_info.get("volume_year") is None:
                     pub_info["volume_year"] = instance._created_at.year
@@ -112,16 +106,8 @@ class LegacyArticleSerializer(serializers.ModelSerializer):
                             "organization": affiliation.organization,
                             "value": affiliation.value,
                             **(
-                                {
-                                    "ror": affiliation.institutionidentifier_set.filter(
-                                        identifier_type=InstitutionIdentifierType.ROR
-                                    )
-                                    .values_list("identifier_value", flat=True)
-                                    .first(),
-                                }
-                                if affiliation.institutionidentifier_set.filter(
-                                    identifier_type=InstitutionIdentifierType.ROR
-                                ).exists()
+                                {"ror": get_ror(affiliation)}
+                                if get_ror(affiliation) is not None
                                 else {}
                             ),
                         }
@@ -132,16 +118,8 @@ class LegacyArticleSerializer(serializers.ModelSerializer):
                     "given_names": entry.first_name,
                     "surname": entry.last_name,
                     **(
-                        {
-                            "orcid": entry.identifiers.filter(
-                                identifier_type=AuthorIdentifierType.ORCID
-                            )
-                            .values_list("identifier_value", flat=True)
-                            .first()
-                        }
-                        if entry.identifiers.filter(
-                            identifier_type=AuthorIdentifierType.ORCID
-                        ).exists()
+                        {"orcid": get_orcid(entry)}
+                        if get_orcid(entry) is not None
                         else {}
                     ),
                 }
@@ -220,29 +198,10 @@ class ArticleDocumentSerializer(QueryFieldsMixin, DocumentSerializer):
 class SearchCSVSerializer(DocumentSerializer):
     _created_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
 
-    doi = serializers.SerializerMethodField()
-    arxiv_id = serializers.SerializerMethodField()
-    arxiv_primary_category = serializers.SerializerMethodField()
-    journal = serializers.SerializerMethodField()
-
-    def get_doi(self, obj):
-        for article_identifier in obj.article_identifiers:
-            if article_identifier.identifier_type == ArticleIdentifierType.DOI:
-                return article_identifier.identifier_value
-
-    def get_arxiv_id(self, obj):
-        for article_identifier in obj.article_identifiers:
-            if article_identifier.identifier_type == ArticleIdentifierType.ARXIV:
-                return article_identifier.identifier_value
-
-    def get_arxiv_primary_category(self, obj):
-        for arxiv_category in obj.article_arxiv_category:
-            if arxiv_category.primary:
-                return arxiv_category.category
-
-    def get_journal(self, obj):
-        for publication_info in obj.publication_info:
-            return publication_info.journal_title
+    doi = serializers.CharField()
+    arxiv_id = serializers.CharField()
+    arxiv_primary_category = serializers.CharField()
+    journal = serializers.CharField(source="journal_title")
 
     class Meta:
         document = ArticleDocument
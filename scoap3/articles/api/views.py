@@ -1,5 +1,3 @@
-from datetime import datetime, timedelta
-
 from django_elasticsearch_dsl_drf.constants import (
     LOOKUP_FILTER_RANGE,
     LOOKUP_QUERY_CONTAINS,
@@ -28,6 +26,7 @@ from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet, ViewSet
 
+from scoap3.articles.api.caching import ConditionalRetrieveMixin, ConditionalSearchMixin
 from scoap3.articles.api.serializers import (
     ArticleDocumentSerializer,
     ArticleFileSerializer,
@@ -37,15 +36,39 @@ from scoap3.articles.api.serializers import (
     LegacyArticleSerializer,
     SearchCSVSerializer,
 )
-from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.documents import ARTICLE_DOCUMENT_PREFETCH, ArticleDocument
 from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
 from scoap3.articles.permissions import IsSuperUserOrReadOnly
+from scoap3.articles.signals import refresh_snapshots_on_commit
+from scoap3.articles.snapshots import get_article_snapshot, refresh_article_snapshots
+from scoap3.articles.stats import get_article_stats
 from scoap3.tasks import import_to_scoap3
 from scoap3.utils.pagination import OSStandardResultsSetPagination
 from scoap3.utils.renderer import ArticleCSVRenderer
 
 
+class ArticleSnapshotMixin:
+    """Serve ``retrieve`` from the snapshot of the article."""
+
+    legacy_snapshot = False
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            article_id = int(kwargs[self.lookup_field])
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+
+        data = get_article_snapshot(article_id, self.legacy_snapshot, request)
+        if data is None and refresh_article_snapshots([article_id]):
+            data = get_article_snapshot(article_id, self.legacy_snapshot, request)
+        if data is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(data)
+
+
 class ArticleViewSet(
+    ConditionalRetrieveMixin,
+    ArticleSnapshotMixin,
     ListModelMixin,
     CreateModelMixin,
     RetrieveModelMixin,
@@ -54,7 +77,8 @@ class ArticleViewSet(
     GenericViewSet,
 ):
     serializer_class = ArticleSerializer
-    queryset = Article.objects.all()
+    # the serializers read the same relations as the search document
+    queryset = Article.objects.prefetch_related(*ARTICLE_DOCUMENT_PREFETCH)
     permission_classes = [IsSuperUserOrReadOnly]
 
     def create(self, request, *args, **kwargs):
@@ -69,17 +93,25 @@ class ArticleViewSet(
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
 
-        serializer.save(id=article_id)
+        article = serializer.save(id=article_id)
+        refresh_snapshots_on_commit([article.id])
 
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
         )
 
+    def perform_update(self, serializer):
+        article = serializer.save()
+        refresh_snapshots_on_commit([article.id])
+
 
-class RecordViewSet(RetrieveModelMixin, GenericViewSet):
+class RecordViewSet(
+    ConditionalRetrieveMixin, ArticleSnapshotMixin, RetrieveModelMixin, GenericViewSet
+):
+    legacy_snapshot = True
     serializer_class = LegacyArticleSerializer
-    queryset = Article.objects.all()
+    queryset = Article.objects.prefetch_related(*ARTICLE_DOCUMENT_PREFETCH)
     permission_classes = [IsSuperUserOrReadOnly]
 
 
@@ -98,7 +130,7 @@ class ArticleWorkflowImportView(ViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ArticleDocumentView(BaseDocumentViewSet):
+class ArticleDocumentView(ConditionalSearchMixin, BaseDocumentViewSet):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.search = self.search.extra(track_total_hits=True)
@@ -218,7 +250,10 @@ class ArticleDocumentView(BaseDocumentViewSet):
         if get_all and self.request.user.is_staff:
             self.pagination_class = None
 
-        return super().list(request, *args, **kwargs)
+        return self.conditional_list(
+            request,
+            lambda: super(ArticleDocumentView, self).list(request, *args, **kwargs),
+        )
 
     def get_serializer_class(self):
         requested_renderer_format = self.request.accepted_media_type
@@ -254,7 +289,7 @@ class ArticleFileViewSet(
     permission_classes = [IsSuperUserOrReadOnly]
 
 
-class LegacyArticleDocumentView(BaseDocumentViewSet):
+class LegacyArticleDocumentView(ConditionalSearchMixin, BaseDocumentViewSet):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.search = self.search.extra(track_total_hits=True)
@@ -352,6 +387,9 @@ class LegacyArticleDocumentView(BaseDocumentViewSet):
         if get_all and self.request.user.is_staff:
             self.pagination_class = None
 
+        return self.conditional_list(request, lambda: self.render_list(request))
+
+    def render_list(self, request):
         queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
@@ -379,42 +417,4 @@ class ArticleStatsViewSet(ViewSet):
     permission_classes = [IsSuperUserOrReadOnly]
 
     def list(self, request):
-        today = datetime.now().date()
-
-        date_ranges = {
-            "yesterday": {
-                "gte": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
-                "lte": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
-            },
-            "last_30_days": {
-                "gte": (today - timedelta(days=30)).strftime("%Y-%m-%d"),
-                "lte": today.strftime("%Y-%m-%d"),
-            },
-            "this_year": {
-                "gte": today.replace(month=1, day=1).strftime("%Y-%m-%d"),
-                "lte": today.strftime("%Y-%m-%d"),
-            },
-        }
-
-        other_data = {}
-        for key, range_values in date_ranges.items():
-            search_query = ArticleDocument.search().query(
-                "range", publication_date=range_values
-            )
-            count = search_query.count()
-            other_data[key] = count
-
-        journal_search = ArticleDocument.search().extra(track_total_hits=True)
-        other_data["all"] = journal_search.count()
-        journal_search.aggs.bucket(
-            "journals", "terms", field="publication_info.journal_title", size=100
-        )
-        journals_result = journal_search.execute()
-        journal_buckets = journals_result.aggregations.journals.buckets
-        journals_data = {bucket.key: bucket.doc_count for bucket in journal_buckets}
-
-        data = {
-            "other": other_data,
-            "journals": journals_data,
-        }
-        return Response(data)
+        return Response(get_article_stats())
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ArticlesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "scoap3.articles"
+
+    def ready(self):
+        import scoap3.articles.signals  # noqa: F401
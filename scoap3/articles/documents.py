@@ -1,16 +1,48 @@
 from django.conf import settings
+from django.db.models import Prefetch
 from django_opensearch_dsl import Document, fields
 from django_opensearch_dsl.registries import registry
 
-from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.articles.models import Article, ArticleIdentifierType
 from scoap3.authors.models import Author, AuthorIdentifierType
 from scoap3.misc.models import (
     Affiliation,
-    ArticleArxivCategory,
     InstitutionIdentifierType,
     PublicationInfo,
+    RelatedMaterialType,
 )
 
+ARTICLE_DOCUMENT_PREFETCH = [
+    Prefetch(
+        "authors",
+        queryset=Author.objects.prefetch_related(
+            Prefetch(
+                "affiliations",
+                queryset=Affiliation.objects.select_related("country").prefetch_related(
+                    "institutionidentifier_set"
+                ),
+            ),
+            "identifiers",
+        ),
+    ),
+    "article_identifiers",
+    "related_files",
+    "article_arxiv_category",
+    Prefetch(
+        "publication_info",
+        queryset=PublicationInfo.objects.select_related("publisher"),
+    ),
+    "related_licenses",
+    "related_materials",
+    "copyright",
+]
+
+
+def _first_identifier(identifiers, identifier_type):
+    for identifier in identifiers:
+        if identifier.identifier_type == identifier_type:
+            return identifier
+
 
 @registry.register_document
 class ArticleDocument(Document):
@@ -55,6 +87,10 @@ class ArticleDocument(Document):
     )
 
     doi = fields.KeywordField()
+    arxiv_id = fields.KeywordField()
+    arxiv_primary_category = fields.KeywordField()
+    journal_title = fields.KeywordField()
+    publisher = fields.KeywordField()
     article_arxiv_category = fields.NestedField(
         properties={
             "category": fields.TextField(),
@@ -86,6 +122,25 @@ class ArticleDocument(Document):
 
     countries = fields.KeywordField()
 
+    authors_count = fields.IntegerField()
+    orcids_count = fields.IntegerField()
+    affiliations_count = fields.IntegerField()
+    rors_count = fields.IntegerField()
+    related_materials_dataset_count = fields.IntegerField()
+    related_materials_software_count = fields.IntegerField()
+    authors_without_affiliations_count = fields.IntegerField()
+
+    # one entry per author and affiliation, the rows of the author and
+    # affiliation exports
+    author_affiliations = fields.NestedField(
+        properties={
+            "author": fields.KeywordField(),
+            "country": fields.KeywordField(),
+            "affiliation": fields.KeywordField(),
+            "ror": fields.KeywordField(),
+        }
+    )
+
     authors = fields.ObjectField(
         properties={
             "name": fields.KeywordField(),
@@ -108,12 +163,89 @@ class ArticleDocument(Document):
         }
     )
 
+    def get_queryset(self, filter_=None, exclude=None, count=None):
+        return (
+            super()
+            .get_queryset(filter_=filter_, exclude=exclude, count=count)
+            .prefetch_related(*ARTICLE_DOCUMENT_PREFETCH)
+        )
+
+    def prepare_authors_count(self, instance):
+        return len(instance.authors.all())
+
+    def prepare_orcids_count(self, instance):
+        return sum(
+            1
+            for author in instance.authors.all()
+            if getattr(
+                _first_identifier(author.identifiers.all(), AuthorIdentifierType.ORCID),
+                "identifier_value",
+                None,
+            )
+        )
+
+    def prepare_affiliations_count(self, instance):
+        return sum(len(author.affiliations.all()) for author in instance.authors.all())
+
+    def prepare_rors_count(self, instance):
+        return sum(
+            1
+            for author in instance.authors.all()
+            for affiliation in author.affiliations.all()
+            if getattr(
+                _first_identifier(
+                    affiliation.institutionidentifier_set.all(),
+                    InstitutionIdentifierType.ROR,
+                ),
+                "identifier_value",
+                None,
+            )
+        )
+
+    def prepare_related_materials_dataset_count(self, instance):
+        return sum(
+            1
+            for related_material in instance.related_materials.all()
+            if related_material.related_material_type == RelatedMaterialType.DATASET
+        )
+
+    def prepare_related_materials_software_count(self, instance):
+        return sum(
+            1
+            for related_material in instance.related_materials.all()
+            if related_material.related_material_type == RelatedMaterialType.SOFTWARE
+        )
+
+    def prepare_authors_without_affiliations_count(self, instance):
+        return sum(
+            1 for author in instance.authors.all() if not author.affiliations.all()
+        )
+
+    def prepare_author_affiliations(self, instance):
+        serialized_author_affiliations = []
+        for author in instance.authors.all():
+            name = author.first_name.strip() + " " + author.last_name.strip()
+            for affiliation in author.affiliations.all():
+                ror = _first_identifier(
+                    affiliation.institutionidentifier_set.all(),
+                    InstitutionIdentifierType.ROR,
+                )
+                serialized_author_affiliations.append(
+                    {
+                        "author": name,
+                        "country": (
+                            affiliation.country.code if affiliation.country else "-"
+                        ),
+                        "affiliation": affiliation.value,
+                        "ror": ror.identifier_value if ror else None,
+                    }
+                )
+        return serialized_author_affiliations
+
     def prepare_countries(self, instance):
-        authors = Author.objects.filter(article_id=instance)
         countries = set()
-        for author in authors:
-            affiliations = Affiliation.objects.filter(author_id=author)
-            for affiliation in affiliations:
+        for author in instance.authors.all():
+            for affiliation in author.affiliations.all():
                 if affiliation.country:
                     country = {
                         "code": affiliation.country.code,
@@ -127,12 +259,10 @@ class ArticleDocument(Document):
         return list(countries)
 
     def prepare_authors(self, instance):
-        authors = Author.objects.filter(article_id=instance)
         serialized_authors = []
-        for author in authors:
-            affiliations = Affiliation.objects.filter(author_id=author)
+        for author in instance.authors.all():
             serialized_affiliations = []
-            for affiliation in affiliations:
+            for affiliation in author.affiliations.all():
                 if affiliation.country:
                     country = {
                         "code": affiliation.country.code,
@@ -145,20 +275,13 @@ class ArticleDocument(Document):
                     "value": affiliation.value,
                     "organization": affiliation.organization,
                     "country": country,
-                    **(
-                        {
-                            "ror": affiliation.institutionidentifier_set.filter(
-                                identifier_type=InstitutionIdentifierType.ROR
-                            )
-                            .values_list("identifier_value", flat=True)
-                            .first(),
-                        }
-                        if affiliation.institutionidentifier_set.filter(
-                            identifier_type=InstitutionIdentifierType.ROR
-                        ).exists()
-                        else {}
-                    ),
                 }
+                ror = _first_identifier(
+                    affiliation.institutionidentifier_set.all(),
+                    InstitutionIdentifierType.ROR,
+                )
+                if ror:
+                    serialized_affiliation["ror"] = ror.identifier_value
                 serialized_affiliations.append(serialized_affiliation)
 
             serialized_author = {
@@ -166,27 +289,18 @@ class ArticleDocument(Document):
                 "last_name": author.last_name.strip(),
                 "name": author.first_name.strip() + " " + author.last_name.strip(),
                 "affiliations": serialized_affiliations,
-                **(
-                    {
-                        "orcid": author.identifiers.filter(
-                            identifier_type=AuthorIdentifierType.ORCID
-                        )
-                        .values_list("identifier_value", flat=True)
-                        .first()
-                    }
-                    if author.identifiers.filter(
-                        identifier_type=AuthorIdentifierType.ORCID
-                    ).exists()
-                    else {}
-                ),
             }
+            orcid = _first_identifier(
+                author.identifiers.all(), AuthorIdentifierType.ORCID
+            )
+            if orcid:
+                serialized_author["orcid"] = orcid.identifier_value
             serialized_authors.append(serialized_author)
         return serialized_authors
 
     def prepare_article_identifiers(self, instance):
-        article_identifiers = ArticleIdentifier.objects.filter(article_id=instance)
         serialized_article_identifiers = []
-        for article_identifier in article_identifiers:
+        for article_identifier in instance.article_identifiers.all():
             serialized_article_identifier = {
                 "identifier_type": article_identifier.identifier_type,
                 "identifier_value": article_identifier.identifier_value,
@@ -195,15 +309,33 @@ class ArticleDocument(Document):
         return serialized_article_identifiers
 
     def prepare_doi(self, instance):
-        article_identifiers = ArticleIdentifier.objects.filter(
-            article_id=instance, identifier_type="DOI"
+        doi = _first_identifier(
+            instance.article_identifiers.all(), ArticleIdentifierType.DOI
         )
-        return article_identifiers[0].identifier_value if article_identifiers else None
+        return doi.identifier_value if doi else None
+
+    def prepare_arxiv_id(self, instance):
+        arxiv = _first_identifier(
+            instance.article_identifiers.all(), ArticleIdentifierType.ARXIV
+        )
+        return arxiv.identifier_value if arxiv else None
+
+    def prepare_arxiv_primary_category(self, instance):
+        for arxiv_category in instance.article_arxiv_category.all():
+            if arxiv_category.primary:
+                return arxiv_category.category
+
+    def prepare_journal_title(self, instance):
+        for publication_info in instance.publication_info.all():
+            return publication_info.journal_title
+
+    def prepare_publisher(self, instance):
+        for publication_info in instance.publication_info.all():
+            return publication_info.publisher.name
 
     def prepare_related_files(self, instance):
-        article_files = ArticleFile.objects.filter(article_id=instance)
         serialized_files = []
-        for file in article_files:
+        for file in instance.related_files.all():
             serialized_file = {
                 "file": file.file.url,
                 "created": file.created,
@@ -213,9 +345,8 @@ class ArticleDocument(Document):
         return serialized_files
 
     def prepare_article_arxiv_category(self, instance):
-        arxiv_categories = ArticleArxivCategory.objects.filter(article_id=instance)
         serialized_arxiv_categories = []
-        for arxiv_category in arxiv_categories:
+        for arxiv_category in instance.article_arxiv_category.all():
             serialized_arxiv_category = {
                 "category": arxiv_category.category,
                 "primary": arxiv_category.primary,
@@ -224,9 +355,8 @@ class ArticleDocument(Document):
         return serialized_arxiv_categories
 
     def prepare_publication_info(self, instance):
-        publication_infos = PublicationInfo.objects.filter(article_id=instance)
         serialized_publication_infos = []
-        for publication_info in publication_infos:
+        for publication_info in instance.publication_info.all():
             serialized_publication_info = {
                 "journal_volume": publication_info.journal_volume,
                 "journal_issue": publication_info.journal_issue,
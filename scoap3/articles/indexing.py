@@ -0,0 +1,287 @@
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from opensearchpy.helpers import parallel_bulk
+
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.models import Article, IndexWatermark
+
+logger = logging.getLogger(__name__)
+
+REINDEX_OVERLAP = timedelta(minutes=5)
+
+INDEX_GENERATION_KEY = "articles:index-generation"
+
+
+def get_index_generation():
+    """Counter bumped whenever the article index changes, ``None`` if unknown.
+
+    A lost counter restarts from the current time, above any value handed
+    out before.
+    """
+    generation = cache.get(INDEX_GENERATION_KEY)
+    if generation is None:
+        cache.add(INDEX_GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(INDEX_GENERATION_KEY)
+    return generation
+
+
+def bump_index_generation():
+    try:
+        cache.incr(INDEX_GENERATION_KEY)
+    except ValueError:
+        cache.add(INDEX_GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def iter_article_id_batches(batch_size, from_id=None, queryset=None):
+    """Walk article ids in ascending order without OFFSET pagination."""
+    queryset = Article.objects.all() if queryset is None else queryset
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+    last_id = from_id - 1 if from_id is not None else None
+    while True:
+        page = queryset.filter(pk__gt=last_id) if last_id is not None else queryset
+        article_ids = list(page[:batch_size])
+        if not article_ids:
+            return
+        yield article_ids
+        last_id = article_ids[-1]
+
+
+def _chunked(article_ids, batch_size):
+    iterator = iter(article_ids)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def prepare_index_actions(article_ids, index=None):
+    """Serialize the given articles into bulk ``index`` actions."""
+    document = ArticleDocument()
+    index = index or ArticleDocument._index._name
+    articles = document.get_queryset(filter_=Q(pk__in=article_ids)).order_by("pk")
+    return [
+        {
+            "_op_type": "index",
+            "_index": index,
+            "_id": document.generate_id(article),
+            "_source": document.prepare(article),
+        }
+        for article in articles
+        if document.should_index_object(article)
+    ]
+
+
+def _prepare_in_processes(batches, index, processes):
+    # spawned workers set up Django on their own and open their own
+    # database connections instead of inheriting the parent's
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as pool:
+        pending = deque()
+        for article_ids in batches:
+            pending.append(pool.submit(prepare_index_actions, article_ids, index))
+            if len(pending) >= processes * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def index_articles(
+    article_ids=None,
+    queryset=None,
+    from_id=None,
+    batch_size=None,
+    chunk_size=None,
+    thread_count=None,
+    processes=0,
+    index=None,
+    refresh=False,
+):
+    """Bulk index articles into OpenSearch.
+
+    Without ``article_ids`` every article of ``queryset`` (all of them by
+    default, starting at ``from_id``) is indexed. Documents are prepared in
+    batches of ``batch_size`` articles and sent with ``parallel_bulk``.
+    Batches are prepared in ``processes`` worker processes, or in this
+    process when ``processes`` is 1 or less. Failures are collected per
+    document instead of aborting the run and returned as
+    ``{"indexed": int, "errors": list}``.
+
+    Changes to the live index are made searchable before the index
+    generation is bumped, so that cached searches are not rendered again
+    from the previous state. Other ``index`` versions are left to
+    ``rebuild_index``.
+    """
+    batch_size = batch_size or settings.OPENSEARCH_INDEXING_BATCH_SIZE
+    chunk_size = chunk_size or settings.OPENSEARCH_BULK_CHUNK_SIZE
+    thread_count = thread_count or settings.OPENSEARCH_BULK_THREAD_COUNT
+
+    if article_ids is None:
+        batches = iter_article_id_batches(
+            batch_size, from_id=from_id, queryset=queryset
+        )
+    else:
+        batches = _chunked(article_ids, batch_size)
+
+    if processes and processes > 1:
+        prepared_batches = _prepare_in_processes(batches, index, processes)
+    else:
+        prepared_batches = (
+            prepare_index_actions(article_ids, index) for article_ids in batches
+        )
+
+    actions = (action for batch in prepared_batches for action in batch)
+    client = ArticleDocument._get_connection()
+    result = {"indexed": 0, "errors": []}
+    for ok, item in parallel_bulk(
+        client,
+        actions,
+        thread_count=thread_count,
+        chunk_size=chunk_size,
+        raise_on_error=False,
+        raise_on_exception=False,
+        refresh=refresh,
+    ):
+        if ok:
+            result["indexed"] += 1
+        else:
+            result["errors"].append(item)
+            logger.error("Failed to index article: %s", item)
+    if index is None and (result["indexed"] or result["errors"]):
+        if result["indexed"] and not refresh:
+            client.indices.refresh(index=ArticleDocument._index._name)
+        bump_index_generation()
+    return result
+
+
+def _get_index_versions(client, alias):
+    return sorted(client.indices.get(index=f"{alias}-*", ignore_unavailable=True))
+
+
+def _get_aliased_indices(client, alias):
+    if not client.indices.exists_alias(name=alias):
+        return set()
+    return set(client.indices.get_alias(name=alias))
+
+
+def _swap_alias(client, alias, new_index):
+    live = _get_aliased_indices(client, alias)
+    actions = [
+        {"remove": {"index": index, "alias": alias}}
+        for index in sorted(live - {new_index})
+    ]
+    if not live and client.indices.exists(index=alias):
+        # one-off migration from the unversioned index, removed in the same
+        # request so that its name never stops resolving
+        logger.warning(
+            "Deleting unversioned index %s to replace it by an alias.", alias
+        )
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": new_index, "alias": alias}})
+    client.indices.update_aliases(body={"actions": actions})
+
+
+def _delete_old_index_versions(client, alias, keep):
+    live = _get_aliased_indices(client, alias)
+    versions = _get_index_versions(client, alias)
+    for index in versions[: max(len(versions) - keep, 0)]:
+        if index not in live:
+            logger.info("Deleting old index version %s.", index)
+            client.indices.delete(index=index)
+
+
+def rebuild_index(keep=2, **kwargs):
+    """Reindex every article into a new index version and swap the alias.
+
+    The index name from ``OPENSEARCH_INDEX_NAMES`` is used as an alias
+    pointing to ``<name>-<timestamp>`` indices, so searches keep hitting the
+    previous version until the new one is complete. The new index is loaded
+    with refresh and replicas disabled, force-merged, and only replaces the
+    live one if every document was indexed. At most ``keep`` versions are
+    kept around.
+    """
+    client = ArticleDocument._get_connection()
+    alias = ArticleDocument._index._name
+    started_at = timezone.now()
+    new_index = f"{alias}-{started_at:%Y%m%d%H%M%S}"
+
+    index_settings = ArticleDocument._index.to_dict()
+    live_settings = {
+        "number_of_replicas": index_settings["settings"].get("number_of_replicas", 1),
+        "refresh_interval": index_settings["settings"].get("refresh_interval"),
+    }
+    index_settings["settings"].update(number_of_replicas=0, refresh_interval="-1")
+    client.indices.create(index=new_index, body=index_settings)
+
+    result = index_articles(index=new_index, **kwargs)
+    # pick up articles saved into the old index while the bulk load ran
+    catch_up = index_articles(
+        queryset=Article.objects.filter(_updated_at__gte=started_at),
+        index=new_index,
+    )
+    result["errors"].extend(catch_up["errors"])
+    result["index"] = new_index
+
+    if result["errors"]:
+        logger.error(
+            "Not swapping %s to %s: %s documents failed.",
+            alias,
+            new_index,
+            len(result["errors"]),
+        )
+        return result
+
+    client.indices.forcemerge(index=new_index, max_num_segments=1)
+    client.indices.put_settings(index=new_index, body={"index": live_settings})
+    client.indices.refresh(index=new_index)
+    _swap_alias(client, alias, new_index)
+    bump_index_generation()
+    _delete_old_index_versions(client, alias, keep)
+    IndexWatermark.objects.update_or_create(
+        index=alias, defaults={"updated_at": started_at}
+    )
+    return result
+
+
+def reindex_since(since=None, overlap=REINDEX_OVERLAP, **kwargs):
+    """Reindex the articles updated since ``since``.
+
+    Defaults to the watermark left by the previous run, which is advanced
+    once every document was indexed. Changes to authors, affiliations, files
+    and other related rows bump the article's ``_updated_at`` (see
+    ``scoap3.articles.signals``). ``overlap`` re-checks a short window before
+    the watermark to catch transactions that committed late.
+    """
+    alias = ArticleDocument._index._name
+    started_at = timezone.now()
+    if since is None:
+        watermark = IndexWatermark.objects.filter(index=alias).first()
+        since = watermark.updated_at if watermark else None
+
+    queryset = Article.objects.all()
+    if since is not None:
+        queryset = queryset.filter(_updated_at__gt=since - overlap)
+    result = index_articles(queryset=queryset, **kwargs)
+
+    if result["errors"]:
+        logger.error(
+            "Not advancing the %s watermark: %s documents failed.",
+            alias,
+            len(result["errors"]),
+        )
+    else:
+        IndexWatermark.objects.update_or_create(
+            index=alias, defaults={"updated_at": started_at}
+        )
+    return result
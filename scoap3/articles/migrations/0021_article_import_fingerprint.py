@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0020_articleidentifier_unique_doi_identifier"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="import_fingerprint",
+            field=models.CharField(
+                blank=True, db_index=True, default="", editable=False, max_length=64
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0021_article_import_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.CharField(max_length=255, unique=True)),
+                ("updated_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0022_indexwatermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleFileText",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=255)),
+                ("text", models.TextField(blank=True, default="")),
+                ("phrases", models.JSONField(default=dict)),
+                ("extracted_at", models.DateTimeField(auto_now=True)),
+                (
+                    "article_file",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="text",
+                        to="articles.articlefile",
+                    ),
+                ),
+            ],
+        ),
+    ]
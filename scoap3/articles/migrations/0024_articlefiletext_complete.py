@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0023_articlefiletext"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="articlefiletext",
+            name="complete",
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0024_articlefiletext_complete"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="compliancereport",
+            name="check_inputs",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("articles", "0025_compliancereport_check_inputs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleSnapshot",
+            fields=[
+                (
+                    "article",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="snapshot",
+                        serialize=False,
+                        to="articles.article",
+                    ),
+                ),
+                ("data", models.JSONField()),
+                ("legacy_data", models.JSONField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
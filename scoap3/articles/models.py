@@ -1,11 +1,16 @@
 import datetime
 import mimetypes
-import os
 from datetime import date
 
 from django.db import models
 from django.db.models.fields.files import FieldFile
-from django_lifecycle import AFTER_CREATE, AFTER_UPDATE, LifecycleModelMixin, hook
+from django_lifecycle import (
+    AFTER_CREATE,
+    AFTER_UPDATE,
+    BEFORE_SAVE,
+    LifecycleModelMixin,
+    hook,
+)
 
 
 class ArticleIdentifierType(models.TextChoices):
@@ -55,19 +60,29 @@ class Article(LifecycleModelMixin, models.Model):
     )
     _created_at = models.DateTimeField(auto_now_add=True)
     _updated_at = models.DateTimeField(auto_now=True)
+    # sha256 of the last imported payload, cleared on any other change to the
+    # article or its related rows
+    import_fingerprint = models.CharField(
+        max_length=64, blank=True, default="", db_index=True, editable=False
+    )
 
     class Meta:
         ordering = ["id"]
 
-    @hook(AFTER_UPDATE, on_commit=True)
-    @hook(AFTER_CREATE, on_commit=True)
-    def on_save(self):
-        from scoap3.articles.tasks import compliance_checks
+    @hook(BEFORE_SAVE)
+    def clear_import_fingerprint(self):
+        self.import_fingerprint = ""
 
-        if os.getenv("COMPLIANCE_DISABLED", "0") == "1":
-            return
+    @hook(AFTER_UPDATE)
+    @hook(AFTER_CREATE)
+    def on_save(self):
+        from scoap3.articles.signals import (
+            check_compliance_on_commit,
+            refresh_snapshots_on_commit,
+        )
 
-        compliance_checks.apply_async(args=[self.id], priority=9)
+        check_compliance_on_commit([self.id])
+        refresh_snapshots_on_commit([self.id])
 
 
 class ArticleFile(models.Model):
@@ -83,6 +98,43 @@ class ArticleFile(models.Model):
         return self.file.name
 
 
+class ArticleSnapshot(models.Model):
+    """API representations of an article, rendered when the article changes.
+
+    ``data`` is the ``ArticleSerializer`` representation and ``legacy_data``
+    the ``LegacyArticleSerializer`` one, see ``scoap3.articles.snapshots``.
+    """
+
+    article = models.OneToOneField(
+        Article, on_delete=models.CASCADE, primary_key=True, related_name="snapshot"
+    )
+    data = models.JSONField()
+    legacy_data = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class ArticleFileText(models.Model):
+    """Normalized text extracted from an article file.
+
+    ``fingerprint`` identifies the stored content the text was extracted
+    from, ``phrases`` maps known normalized phrases to their offset in
+    ``text``. ``complete`` is false when the scan stopped early or hit a
+    limit, in which case ``text`` only holds the scanned pages.
+    """
+
+    article_file = models.OneToOneField(
+        ArticleFile, on_delete=models.CASCADE, related_name="text"
+    )
+    fingerprint = models.CharField(max_length=255)
+    text = models.TextField(blank=True, default="")
+    phrases = models.JSONField(default=dict)
+    complete = models.BooleanField(default=True)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Text of {self.article_file}"
+
+
 class ArticleIdentifier(models.Model):
     article_id = models.ForeignKey(
         "articles.Article", on_delete=models.CASCADE, related_name="article_identifiers"
@@ -132,6 +184,8 @@ class ComplianceReport(models.Model):
         blank=True, default=""
     )
     compliant = models.BooleanField(default=False)
+    # digests of the inputs the checks were run on, by input name
+    check_inputs = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Compliance Report for {self.article.title} on {self.report_date.strftime('%Y-%m-%d')}"
@@ -166,3 +220,11 @@ class ComplianceReport(models.Model):
                 self.check_doi_registration_time,
             ]
         )
+
+
+class IndexWatermark(models.Model):
+    index = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.index} synced up to {self.updated_at}"
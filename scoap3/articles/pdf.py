@@ -0,0 +1,62 @@
+"""PDF text extraction, kept free of Django so that it runs in worker processes."""
+
+import re
+
+import fitz
+
+# phrases whose positions are recorded along with the extracted text
+KNOWN_PHRASES = ["Funded by SCOAP"]
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", "", text.lower())
+
+
+def find_phrases(text, phrases):
+    """Map each normalized phrase to its offset in ``text``, or ``None``."""
+    positions = {}
+    for phrase in phrases:
+        phrase = normalize_text(phrase)
+        position = text.find(phrase)
+        positions[phrase] = position if position >= 0 else None
+    return positions
+
+
+def get_page_order(page_count, max_pages=None):
+    """Page numbers from the outside in: first, last, second, second to last...
+
+    Funding statements usually sit on the first or the last pages.
+    """
+    max_pages = min(max_pages or page_count, page_count)
+    order = []
+    low, high = 0, page_count - 1
+    while len(order) < max_pages:
+        order.append(low)
+        low += 1
+        if len(order) < max_pages:
+            order.append(high)
+            high -= 1
+    return order
+
+
+def extract_text(path, filetype="pdf", phrases=KNOWN_PHRASES, max_pages=None):
+    """Scan the document at ``path`` for ``phrases``.
+
+    Pages are read one at a time in ``get_page_order``, at most ``max_pages``
+    of them, and the scan stops once every phrase was found. Returns the
+    normalized text of the scanned pages in document order, the positions of
+    the phrases in it, and whether every page was scanned.
+    """
+    remaining = {normalize_text(phrase) for phrase in phrases}
+    pages = {}
+    with fitz.open(path, filetype=filetype) as doc:
+        for number in get_page_order(doc.page_count, max_pages):
+            page_text = normalize_text(doc[number].get_text())
+            pages[number] = page_text
+            remaining = {phrase for phrase in remaining if phrase not in page_text}
+            if not remaining:
+                break
+        complete = len(pages) == doc.page_count
+
+    text = "".join(pages[number] for number in sorted(pages))
+    return text, find_phrases(text, phrases), complete
@@ -0,0 +1,278 @@
+import logging
+import os
+import threading
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django_opensearch_dsl.apps import DODConfig
+from django_opensearch_dsl.signals import RealTimeSignalProcessor
+
+from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.authors.models import Author, AuthorIdentifier
+from scoap3.misc.models import (
+    Affiliation,
+    ArticleArxivCategory,
+    Copyright,
+    InstitutionIdentifier,
+    PublicationInfo,
+)
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class PendingArticleChanges:
+    """Article ids touched in the current transaction, flushed on commit."""
+
+    def __init__(self):
+        self.touched = set()
+        self.indexed = set()
+        self.compliance = set()
+        # articles whose snapshot is rendered once the transaction committed
+        self.snapshots = set()
+        # articles imported in the transaction, whose fingerprint is current
+        self.imported = set()
+        # outermost atomic block and savepoints of each on_commit registration
+        self.registrations = []
+        self.flushed = False
+
+    def in_transaction(self, connection):
+        return connection.in_atomic_block and any(
+            atomic is connection.atomic_blocks[0] for atomic, _ in self.registrations
+        )
+
+    def will_flush(self, connection):
+        """Whether a registered flush survives any rollback of open savepoints.
+
+        A flush registered in a savepoint that has since been released or
+        rolled back may be gone, so it is registered again at the current
+        level and only the first call does the work. Articles queued in a
+        rolled back savepoint are then flushed too, which is harmless.
+        """
+        savepoint_ids = set(connection.savepoint_ids)
+        # atomic blocks without a savepoint can't be rolled back on their own
+        savepoint_ids.add(None)
+        return any(
+            atomic is connection.atomic_blocks[0] and sids <= savepoint_ids
+            for atomic, sids in self.registrations
+        )
+
+    def register(self, connection):
+        self.registrations.append(
+            (connection.atomic_blocks[0], set(connection.savepoint_ids))
+        )
+        transaction.on_commit(self.flush, using=connection.alias)
+
+    def flush(self):
+        from scoap3.articles.indexing import index_articles
+        from scoap3.articles.snapshots import refresh_article_snapshots
+        from scoap3.articles.tasks import compliance_checks
+
+        if self.flushed:
+            return
+        self.flushed = True
+        if getattr(_local, "pending", None) is self:
+            _local.pending = None
+        if self.touched:
+            now = timezone.now()
+            # related rows edited outside of an import invalidate its fingerprint
+            if edited := self.touched - self.imported:
+                Article.objects.filter(pk__in=edited).update(
+                    _updated_at=now, import_fingerprint=""
+                )
+            if imported := self.touched & self.imported:
+                Article.objects.filter(pk__in=imported).update(_updated_at=now)
+        if self.snapshots:
+            # rendering reads file sizes from the storage, so it is kept out
+            # of the committed transaction; stale snapshots are not served
+            try:
+                with transaction.atomic():
+                    refresh_article_snapshots(self.snapshots)
+            except Exception:
+                logger.exception(
+                    "Failed to refresh snapshots of articles %s.",
+                    sorted(self.snapshots),
+                )
+        if self.indexed and DODConfig.autosync_enabled():
+            # reindex_changed_articles catches up with articles not indexed here
+            try:
+                result = index_articles(
+                    article_ids=sorted(self.indexed),
+                    refresh=DODConfig.auto_refresh_enabled(),
+                )
+            except Exception:
+                logger.exception("Failed to index articles %s.", sorted(self.indexed))
+            else:
+                if result["errors"]:
+                    logger.error(
+                        "Failed to index %s of articles %s.",
+                        len(result["errors"]),
+                        sorted(self.indexed),
+                    )
+        if os.getenv("COMPLIANCE_DISABLED", "0") != "1":
+            for article_id in sorted(self.compliance):
+                compliance_checks.apply_async(args=[article_id], priority=9)
+
+
+def get_pending_article_changes():
+    """Return the changes collected for the current transaction.
+
+    Outside of a transaction the changes are flushed right away.
+    """
+    pending = getattr(_local, "pending", None)
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _local.pending = PendingArticleChanges()
+        return _local.pending
+    if pending is None or pending.flushed or not pending.in_transaction(connection):
+        # the previous transaction was rolled back, its changes are gone
+        _local.pending = pending = PendingArticleChanges()
+    if not pending.will_flush(connection):
+        pending.register(connection)
+    return pending
+
+
+def _ids(article_ids):
+    return {article_id for article_id in article_ids if article_id}
+
+
+def _queue(**changes):
+    article_ids = {name: _ids(ids) for name, ids in changes.items()}
+    if not any(article_ids.values()):
+        return
+    pending = get_pending_article_changes()
+    for name, ids in article_ids.items():
+        getattr(pending, name).update(ids)
+    if not transaction.get_connection().in_atomic_block:
+        pending.flush()
+
+
+def touch_articles(article_ids):
+    """Bump ``_updated_at`` of the articles and reindex them on commit.
+
+    Used for changes that only touch related rows, so that incremental
+    reindexing picks the article up as well.
+    """
+    article_ids = _ids(article_ids)
+    _queue(touched=article_ids, indexed=article_ids, snapshots=article_ids)
+
+
+def index_articles_on_commit(article_ids):
+    _queue(indexed=article_ids)
+
+
+def check_compliance_on_commit(article_ids):
+    _queue(compliance=article_ids)
+
+
+def refresh_snapshots_on_commit(article_ids):
+    _queue(snapshots=article_ids)
+
+
+def mark_articles_imported(article_ids):
+    _queue(imported=article_ids)
+
+
+class ArticleSignalProcessor(RealTimeSignalProcessor):
+    """Index saved articles once per transaction instead of on every save."""
+
+    def handle_save(self, sender, instance, **kwargs):
+        if isinstance(instance, Article):
+            index_articles_on_commit([instance.pk])
+        else:
+            super().handle_save(sender, instance, **kwargs)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        from scoap3.articles.indexing import bump_index_generation
+
+        super().handle_delete(sender, instance, **kwargs)
+        if isinstance(instance, Article):
+            bump_index_generation()
+
+
+def _get_affiliation_article_ids(affiliation_ids):
+    return Author.objects.filter(affiliations__in=affiliation_ids).values_list(
+        "article_id", flat=True
+    )
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=ArticleFile)
+@receiver(post_delete, sender=ArticleFile)
+@receiver(post_save, sender=ArticleIdentifier)
+@receiver(post_delete, sender=ArticleIdentifier)
+@receiver(post_save, sender=PublicationInfo)
+@receiver(post_delete, sender=PublicationInfo)
+@receiver(post_save, sender=ArticleArxivCategory)
+@receiver(post_delete, sender=ArticleArxivCategory)
+@receiver(post_save, sender=Copyright)
+@receiver(post_delete, sender=Copyright)
+def touch_article_on_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_articles([instance.article_id_id])
+
+
+@receiver(post_save, sender=AuthorIdentifier)
+@receiver(post_delete, sender=AuthorIdentifier)
+def touch_article_on_author_identifier_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_articles(
+            Author.objects.filter(pk=instance.author_id_id).values_list(
+                "article_id", flat=True
+            )
+        )
+
+
+@receiver(post_save, sender=Affiliation)
+def touch_articles_on_affiliation_change(sender, instance, created, raw, **kwargs):
+    # a new affiliation has no authors yet
+    if not created and not raw:
+        touch_articles(_get_affiliation_article_ids([instance.pk]))
+
+
+@receiver(pre_delete, sender=Affiliation)
+def touch_articles_on_affiliation_delete(sender, instance, **kwargs):
+    # the links to the authors are gone after the delete
+    touch_articles(_get_affiliation_article_ids([instance.pk]))
+
+
+@receiver(post_save, sender=InstitutionIdentifier)
+@receiver(post_delete, sender=InstitutionIdentifier)
+def touch_articles_on_institution_identifier_change(
+    sender, instance, raw=False, **kwargs
+):
+    if not raw:
+        touch_articles(_get_affiliation_article_ids([instance.affiliation_id_id]))
+
+
+@receiver(m2m_changed, sender=Affiliation.author_id.through)
+def touch_articles_on_affiliation_authors_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        touch_articles([instance.article_id_id])
+    elif action == "pre_clear":
+        touch_articles(_get_affiliation_article_ids([instance.pk]))
+    else:
+        touch_articles(
+            Author.objects.filter(pk__in=pk_set).values_list("article_id", flat=True)
+        )
+
+
+@receiver(m2m_changed, sender=Article.related_licenses.through)
+@receiver(m2m_changed, sender=Article.related_materials.through)
+def touch_articles_on_article_m2m_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        touch_articles([instance.pk])
+    elif pk_set:
+        touch_articles(pk_set)
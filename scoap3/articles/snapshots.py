@@ -0,0 +1,74 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+
+from scoap3.articles.api.serializers import ArticleSerializer, LegacyArticleSerializer
+from scoap3.articles.documents import ARTICLE_DOCUMENT_PREFETCH
+from scoap3.articles.models import Article, ArticleSnapshot
+
+
+def _to_json(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+def refresh_article_snapshots(article_ids):
+    """Render the API representations of the articles and store them.
+
+    Called once the transaction changing the articles committed, see
+    ``refresh_snapshots_on_commit``, as the file sizes are read from the
+    storage.
+    """
+    article_ids = sorted(set(article_ids))
+    articles = Article.objects.filter(id__in=article_ids).prefetch_related(
+        *ARTICLE_DOCUMENT_PREFETCH
+    )
+    snapshots = [
+        ArticleSnapshot(
+            article=article,
+            data=_to_json(ArticleSerializer(article).data),
+            legacy_data=_to_json(LegacyArticleSerializer(article).data),
+        )
+        for article in articles
+    ]
+    ArticleSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["article"],
+        update_fields=["data", "legacy_data", "updated_at"],
+    )
+    return len(snapshots)
+
+
+def get_article_snapshot(article_id, legacy=False, request=None):
+    """Return the stored representation of the article, or ``None``.
+
+    Snapshots older than the last change of the article, rendered before it
+    committed, are ignored. ``_updated_at`` is bumped on commit after the
+    snapshot was rendered, and file URLs are absolute to the ``request``
+    host, so both are filled in when reading.
+    """
+    row = (
+        ArticleSnapshot.objects.filter(article_id=article_id)
+        .values_list(
+            "legacy_data" if legacy else "data", "updated_at", "article___updated_at"
+        )
+        .first()
+    )
+    if not row:
+        return None
+
+    data, snapshot_updated_at, updated_at = row
+    if snapshot_updated_at < updated_at:
+        return None
+    if legacy:
+        data["updated"] = _to_json(updated_at)
+        return data
+
+    data["_updated_at"] = (
+        ArticleSerializer().fields["_updated_at"].to_representation(updated_at)
+    )
+    if request:
+        for entry in data["related_files"]:
+            if entry.get("file"):
+                entry["file"] = request.build_absolute_uri(entry["file"])
+    return data
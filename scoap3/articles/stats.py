@@ -0,0 +1,107 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from scoap3.articles.documents import ArticleDocument
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_STATS_KEY = "articles:stats"
+ARTICLE_STATS_LOCK_KEY = "articles:stats:lock"
+
+# fields and sizes of the breakdowns enabled in ARTICLE_STATS_BREAKDOWNS
+ARTICLE_STATS_BREAKDOWN_FIELDS = {
+    "countries": ("countries", 300),
+    "publishers": ("publication_info.publisher", 100),
+}
+
+
+def get_date_ranges(today):
+    return {
+        "yesterday": {
+            "gte": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
+            "lte": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
+        },
+        "last_30_days": {
+            "gte": (today - timedelta(days=30)).strftime("%Y-%m-%d"),
+            "lte": today.strftime("%Y-%m-%d"),
+        },
+        "this_year": {
+            "gte": today.replace(month=1, day=1).strftime("%Y-%m-%d"),
+            "lte": today.strftime("%Y-%m-%d"),
+        },
+    }
+
+
+def compute_article_stats():
+    """Count articles by publication date range, journal and breakdown.
+
+    Everything comes from the aggregations of a single search request.
+    """
+    search = ArticleDocument.search().extra(size=0, track_total_hits=True)
+    date_ranges = get_date_ranges(datetime.now().date())
+    for key, range_values in date_ranges.items():
+        search.aggs.bucket(
+            key, "filter", filter={"range": {"publication_date": range_values}}
+        )
+    search.aggs.bucket(
+        "journals", "terms", field="publication_info.journal_title", size=100
+    )
+    for name in settings.ARTICLE_STATS_BREAKDOWNS:
+        field, size = ARTICLE_STATS_BREAKDOWN_FIELDS[name]
+        search.aggs.bucket(name, "terms", field=field, size=size)
+
+    response = search.execute()
+    aggregations = response.aggregations
+    data = {
+        "other": {key: aggregations[key].doc_count for key in date_ranges},
+        "journals": {
+            bucket.key: bucket.doc_count for bucket in aggregations.journals.buckets
+        },
+    }
+    data["other"]["all"] = response.hits.total.value
+    for name in settings.ARTICLE_STATS_BREAKDOWNS:
+        data[name] = {
+            bucket.key: bucket.doc_count for bucket in aggregations[name].buckets
+        }
+    return data
+
+
+def refresh_article_stats():
+    try:
+        data = compute_article_stats()
+        cache.set(
+            ARTICLE_STATS_KEY,
+            {"data": data, "computed_at": time.time()},
+            timeout=None,
+        )
+    finally:
+        cache.delete(ARTICLE_STATS_LOCK_KEY)
+    return data
+
+
+def get_article_stats():
+    """Return the cached article stats, computing them if there are none.
+
+    Stats older than ``ARTICLE_STATS_MAX_AGE`` seconds are still returned,
+    while a background task refreshes them.
+    """
+    from scoap3.articles.tasks import update_article_stats
+
+    entry = cache.get(ARTICLE_STATS_KEY)
+    if entry is None:
+        return refresh_article_stats()
+
+    if time.time() - entry["computed_at"] > settings.ARTICLE_STATS_MAX_AGE:
+        if cache.add(
+            ARTICLE_STATS_LOCK_KEY, True, timeout=settings.ARTICLE_STATS_MAX_AGE
+        ):
+            try:
+                update_article_stats.delay()
+            except Exception as e:
+                cache.delete(ARTICLE_STATS_LOCK_KEY)
+                logger.error("Failed to schedule the article stats refresh: %s", e)
+    return entry["data"]
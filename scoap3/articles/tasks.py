@@ -1,18 +1,28 @@
+import hashlib
+import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
 
 from celery import shared_task
-from django.core.paginator import Paginator
-from django_opensearch_dsl.registries import registry
-
-from scoap3.articles.models import Article, ArticleFile, ComplianceReport
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django_opensearch_dsl.apps import DODConfig
+
+from scoap3.articles.indexing import index_articles, reindex_since
+from scoap3.articles.models import Article, ArticleIdentifierType, ComplianceReport
+from scoap3.articles.stats import refresh_article_stats
 from scoap3.articles.util import is_string_in_pdf
 from scoap3.authors.models import Author
 from scoap3.misc.models import Affiliation, PublicationInfo
 from scoap3.misc.utils import (
     fetch_doi_registration_date,
     fetch_doi_registration_date_aps,
+    get_doi_registrations,
 )
 
 logger = logging.getLogger(__name__)
@@ -31,8 +41,14 @@ def check_license(obj):
         )
 
 
+def _get_publication_info(obj):
+    # reads the prefetched publication info of the compliance runner
+    publication_info = obj.publication_info.all()
+    return publication_info[0] if publication_info else None
+
+
 def check_required_file_formats(obj):
-    publication_info = PublicationInfo.objects.filter(article_id=obj).first()
+    publication_info = _get_publication_info(obj)
 
     if not publication_info:
         return False, "No publication information found."
@@ -95,11 +111,8 @@ def check_arxiv_category(obj):
         "Physical Review Letters",
         "Acta Physica Polonica B",
     ]
-    journal_title = (
-        obj.publication_info.first().journal_title
-        if obj.publication_info.exists()
-        else None
-    )
+    publication_info = _get_publication_info(obj)
+    journal_title = publication_info.journal_title if publication_info else None
 
     if journal_title in partial_journals:
         categories = obj.article_arxiv_category.all()
@@ -109,15 +122,42 @@ def check_arxiv_category(obj):
     return True, "ArXiv category compliance not applicable."
 
 
-def check_doi_registration_time(obj):
-    doi_identifier = obj.article_identifiers.filter(identifier_type="DOI").first()
-    obj_publisher = (
-        obj.publication_info.first().publisher.name
-        if obj.publication_info.exists()
-        else None
+def _get_doi_identifier(obj):
+    for identifier in obj.article_identifiers.all():
+        if identifier.identifier_type == ArticleIdentifierType.DOI:
+            return identifier
+
+
+def _get_publisher_name(obj):
+    publication_info = _get_publication_info(obj)
+    if publication_info and publication_info.publisher:
+        return publication_info.publisher.name
+
+
+def _has_doi_registration_date(obj, registrations):
+    doi_identifier = _get_doi_identifier(obj)
+    if not doi_identifier:
+        return True
+    registration = registrations.get(doi_identifier.identifier_value.lower())
+    date_field = (
+        "published_date" if _get_publisher_name(obj) == "APS" else "created_date"
     )
+    return getattr(registration, date_field, None) is not None
+
+
+def check_doi_registration_time(obj, registrations=None):
+    """``registrations`` are the DOI registrations fetched for a batch of articles."""
+    doi_identifier = _get_doi_identifier(obj)
+    obj_publisher = _get_publisher_name(obj)
     if doi_identifier:
-        if obj_publisher == "APS":
+        date_field = "published_date" if obj_publisher == "APS" else "created_date"
+        if registrations is not None:
+            registration = registrations.get(doi_identifier.identifier_value.lower())
+            doi_registration_date = getattr(registration, date_field, None)
+            doi_registration_date = (
+                doi_registration_date.isoformat() if doi_registration_date else None
+            )
+        elif obj_publisher == "APS":
             doi_registration_date = fetch_doi_registration_date_aps(
                 doi_identifier.identifier_value
             )
@@ -162,121 +202,332 @@ def check_doi_registration_time(obj):
 
 
 def check_authors_affiliation(article):
-    authors = Author.objects.filter(article_id=article)
-    for author in authors:
-        affiliations = Affiliation.objects.filter(author_id=author)
-        if len(affiliations) < 1:
+    for author in article.authors.all():
+        if len(author.affiliations.all()) < 1:
             return False, "Author does not have affiliations"
     return True, "Authors' affiliations are compliant"
 
 
-def check_contains_funded_by_scoap3(article):
+def _contains_funded_by_scoap3(article):
+    article_files = article.related_files.all()
+
+    if not article_files:
+        return False, "No files found for the given article."
+
+    for article_file in article_files:
+        if article_file.filetype in ["pdf", "pdf/a"]:
+            try:
+                if is_string_in_pdf(article_file, "Funded by SCOAP"):
+                    return (
+                        True,
+                        f"Files contain the required text: 'Funded by SCOAP3'. File: {article_file.file.url}",
+                    )
+            except FileNotFoundError:
+                return False, f"File not found: {article_file.file.url}"
+
+    return False, "Files do not contain the required text: 'Funded by SCOAP3'"
+
+
+def _scan_funded_by_scoap3(article):
+    """Return the result of the check and whether the files could be read."""
     try:
-        article_files = ArticleFile.objects.filter(article_id=article)
-
-        if not article_files.exists():
-            return False, "No files found for the given article."
-
-        for article_file in article_files:
-            if article_file.filetype in ["pdf", "pdf/a"]:
-                try:
-                    if is_string_in_pdf(article_file, "Funded by SCOAP"):
-                        return (
-                            True,
-                            f"Files contain the required text: 'Funded by SCOAP3'. File: {article_file.file.url}",
-                        )
-                except FileNotFoundError:
-                    return False, f"File not found: {article_file.file.url}"
-
-        return False, "Files do not contain the required text: 'Funded by SCOAP3'"
+        return _contains_funded_by_scoap3(article), True
     except Exception as e:
-        return False, f"An unexpected error occurred: {str(e)}"
+        logger.exception("Article %s: failed to scan the files.", article.id)
+        return (False, f"An unexpected error occurred: {str(e)}"), False
+
+
+def check_contains_funded_by_scoap3(article):
+    result, _ = _scan_funded_by_scoap3(article)
+    return result
+
+
+# the inputs each check depends on, a check is only run again when one of
+# them changed since the last report of the article
+COMPLIANCE_CHECKS = {
+    check_license: ["licenses"],
+    check_required_file_formats: ["publication_info", "files"],
+    check_arxiv_category: ["publication_info", "categories"],
+    check_article_type: ["title"],
+    check_doi_registration_time: ["publication_info", "identifiers"],
+    check_authors_affiliation: ["authors"],
+    check_contains_funded_by_scoap3: ["files"],
+}
+
+COMPLIANCE_INPUTS = {
+    "title": lambda article: article.title,
+    "licenses": lambda article: sorted(
+        license.name for license in article.related_licenses.all()
+    ),
+    "files": lambda article: sorted(
+        (file.file.name, file.filetype, file.updated)
+        for file in article.related_files.all()
+    ),
+    "categories": lambda article: sorted(
+        (category.category, category.primary)
+        for category in article.article_arxiv_category.all()
+    ),
+    "identifiers": lambda article: sorted(
+        (identifier.identifier_type, identifier.identifier_value)
+        for identifier in article.article_identifiers.all()
+    ),
+    "publication_info": lambda article: [
+        (info.journal_title, info.publisher.name if info.publisher else None)
+        for info in article.publication_info.all()
+    ],
+    "authors": lambda article: [
+        (author.id, [affiliation.id for affiliation in author.affiliations.all()])
+        for author in article.authors.all()
+    ],
+}
+
+# everything the compliance checks read, so that a batch takes a fixed
+# number of queries
+COMPLIANCE_PREFETCH = [
+    "related_licenses",
+    "related_files",
+    "article_arxiv_category",
+    "article_identifiers",
+    Prefetch(
+        "publication_info",
+        queryset=PublicationInfo.objects.select_related("publisher"),
+    ),
+    Prefetch("authors", queryset=Author.objects.only("id", "article_id")),
+    Prefetch("authors__affiliations", queryset=Affiliation.objects.only("id")),
+]
+
+
+def get_compliance_inputs(article):
+    """Digest of each input of the compliance checks of a prefetched article."""
+    inputs = {}
+    for name, get_input in COMPLIANCE_INPUTS.items():
+        payload = json.dumps(get_input(article), separators=(",", ":"), default=str)
+        inputs[name] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return inputs
+
+
+def get_compliance_reports(articles):
+    """Return the latest report of each article by id, and the older reports."""
+    reports = {}
+    stale = []
+    for report in ComplianceReport.objects.filter(article__in=articles).order_by(
+        "article_id", "-report_date", "-id"
+    ):
+        if report.article_id in reports:
+            stale.append(report)
+        else:
+            reports[report.article_id] = report
+    return reports, stale
+
+
+def _map_concurrently(func, items):
+    if not settings.COMPLIANCE_CHECK_THREADS or len(items) < 2:
+        return [func(item) for item in items]
+
+    def run(item):
+        try:
+            return func(item)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=settings.COMPLIANCE_CHECK_THREADS) as pool:
+        return list(pool.map(run, items))
+
+
+def get_compliance_results(articles, reports=None):
+    """Run the compliance checks of prefetched ``articles``.
+
+    Returns the digests of the check inputs and the ``(compliance,
+    description)`` of the checks run by check name, which is also the name
+    of its ``ComplianceReport`` field, for each article. When the previous
+    ``reports`` of the articles are given by article id, only the checks
+    whose inputs changed since are run. The inputs of a check that could
+    not be completed, because its DOI registration date or its files could
+    not be fetched, keep their previous digest so that it is run again. The
+    DOIs of the batch are looked up in Crossref together and the article
+    files are scanned concurrently.
+    """
+    reports = reports or {}
+    results = []
+    previous = []
+    for article in articles:
+        inputs = get_compliance_inputs(article)
+        report = reports.get(article.id)
+        previous_inputs = report.check_inputs if report else {}
+        changed = {
+            name
+            for name, digest in inputs.items()
+            if previous_inputs.get(name) != digest
+        }
+        checks = [
+            check
+            for check, dependencies in COMPLIANCE_CHECKS.items()
+            if changed.intersection(dependencies)
+        ]
+        results.append({"inputs": inputs, "checks": checks})
+        previous.append(previous_inputs)
+
+    dois = [
+        _get_doi_identifier(article)
+        for article, result in zip(articles, results)
+        if check_doi_registration_time in result["checks"]
+    ]
+    registrations = get_doi_registrations(doi.identifier_value for doi in dois if doi)
+    to_scan = [
+        article
+        for article, result in zip(articles, results)
+        if check_contains_funded_by_scoap3 in result["checks"]
+    ]
+    funded_by_scoap3 = dict(
+        zip(to_scan, _map_concurrently(_scan_funded_by_scoap3, to_scan))
+    )
+
+    for article, result, previous_inputs in zip(articles, results, previous):
+        checks = {}
+        for check in result["checks"]:
+            completed = True
+            if check is check_doi_registration_time:
+                checks[check.__name__] = check(article, registrations)
+                completed = _has_doi_registration_date(article, registrations)
+            elif check is check_contains_funded_by_scoap3:
+                checks[check.__name__], completed = funded_by_scoap3[article]
+            else:
+                checks[check.__name__] = check(article)
+            if not completed:
+                for name in COMPLIANCE_CHECKS[check]:
+                    if name in previous_inputs:
+                        result["inputs"][name] = previous_inputs[name]
+                    else:
+                        result["inputs"].pop(name, None)
+        result["checks"] = checks
+    return results
+
+
+def save_compliance_reports(articles, results, reports=None, stale=()):
+    """Upsert the ``ComplianceReport`` of each article from its check results.
+
+    Checks missing from the results keep their previous compliance and
+    description. ``reports`` and ``stale`` are the reports of the articles as
+    returned by ``get_compliance_reports``.
+    """
+    if reports is None:
+        reports, stale = get_compliance_reports(articles)
+
+    now = timezone.now()
+    created, updated = [], []
+    for article, result in zip(articles, results):
+        report = reports.get(article.id) or ComplianceReport()
+        report.article = article
+        report.report_date = now
+        report.check_inputs = result["inputs"]
+        for name, (compliance, description) in result["checks"].items():
+            setattr(report, name, compliance)
+            setattr(report, f"{name}_description", description)
+        report.compliant = report.is_compliant()
+        (updated if report.pk else created).append(report)
+
+    fields = ["report_date", "check_inputs", "compliant"]
+    for check in COMPLIANCE_CHECKS:
+        fields += [check.__name__, f"{check.__name__}_description"]
+    with transaction.atomic():
+        ComplianceReport.objects.filter(id__in=[report.id for report in stale]).delete()
+        ComplianceReport.objects.bulk_create(created)
+        ComplianceReport.objects.bulk_update(updated, fields)
+
+
+def run_compliance_checks(articles, batch_size=None, force=False):
+    """Check the compliance of the ``articles`` queryset, a batch at a time.
+
+    Unless ``force`` is set, only the checks whose inputs changed since the
+    last report of an article are run again.
+    """
+    batch_size = batch_size or settings.COMPLIANCE_CHECK_BATCH_SIZE
+    article_ids = iter(articles.order_by("id").values_list("id", flat=True))
+    checked = 0
+    while batch_ids := list(islice(article_ids, batch_size)):
+        batch = list(
+            Article.objects.filter(id__in=batch_ids).prefetch_related(
+                *COMPLIANCE_PREFETCH
+            )
+        )
+        reports, stale = get_compliance_reports(batch)
+        results = get_compliance_results(batch, None if force else reports)
+        save_compliance_reports(batch, results, reports, stale)
+        checked += len(batch)
+        logger.info("Compliance checks completed for %s articles", checked)
+    return checked
 
 
 @shared_task(name="compliance_checks", acks_late=True)
-def compliance_checks(article_id):
+def compliance_checks(article_id, force=False):
     if os.getenv("COMPLIANCE_DISABLED", "0") == "1":
         return f"compliance disabled:: article {str(article_id)}"
 
-    try:
-        article = Article.objects.get(id=article_id)
-    except Article.DoesNotExist:
+    if not run_compliance_checks(Article.objects.filter(id=article_id), force=force):
         logger.error("Article %s not found.", article_id)
         return "Article not found"
 
-    (
-        check_doi_registration_compliance,
-        check_doi_registration_description,
-    ) = check_doi_registration_time(article)
-    check_article_type_compliance, check_article_type_description = check_article_type(
-        article
-    )
-    (
-        check_arxiv_category_compliance,
-        check_arxiv_category_description,
-    ) = check_arxiv_category(article)
-    (
-        check_required_file_formats_compliance,
-        check_required_file_formats_description,
-    ) = check_required_file_formats(article)
-    check_license_compliance, check_license_description = check_license(article)
-    (
-        check_affiliations_compliance,
-        check_affiliations_description,
-    ) = check_authors_affiliation(article)
-    (
-        check_funded_by_scoap3_compliance,
-        check_funded_by_scoap3_description,
-    ) = check_contains_funded_by_scoap3(article)
-
-    article.report.all().delete()
-
-    report = ComplianceReport.objects.create(
-        article=article,
-        check_article_type=check_article_type_compliance,
-        check_article_type_description=check_article_type_description,
-        check_arxiv_category=check_arxiv_category_compliance,
-        check_arxiv_category_description=check_arxiv_category_description,
-        check_doi_registration_time=check_doi_registration_compliance,
-        check_doi_registration_time_description=check_doi_registration_description,
-        check_required_file_formats=check_required_file_formats_compliance,
-        check_required_file_formats_description=check_required_file_formats_description,
-        check_license=check_license_compliance,
-        check_license_description=check_license_description,
-        check_authors_affiliation=check_affiliations_compliance,
-        check_authors_affiliation_description=check_affiliations_description,
-        check_contains_funded_by_scoap3=check_funded_by_scoap3_compliance,
-        check_contains_funded_by_scoap3_description=check_funded_by_scoap3_description,
-    )
-    report.compliant = report.is_compliant()
-    report.save()
     logger.info("Compliance checks completed for article %s", article_id)
     return f"Compliance checks completed for article {article_id}"
 
 
+@shared_task(acks_late=True)
+def compliance_checks_batch(article_ids, force=False):
+    checked = run_compliance_checks(
+        Article.objects.filter(id__in=article_ids), force=force
+    )
+    return f"Compliance checks completed for {checked} articles"
+
+
+@shared_task(acks_late=True)
+def schedule_compliance_checks(article_ids, force=False):
+    batches = iter(article_ids)
+    while batch := list(islice(batches, settings.COMPLIANCE_CHECK_BATCH_SIZE)):
+        compliance_checks_batch.apply_async(args=[batch, force], priority=9)
+    return f"Scheduled compliance checks for {len(article_ids)} articles"
+
+
 @shared_task
 def index_article_batch(article_ids):
-    articles = Article.objects.filter(id__in=article_ids)
-    for article in articles:
-        registry.update(article)
+    result = index_articles(
+        article_ids=article_ids, refresh=DODConfig.auto_refresh_enabled()
+    )
+    return f"Indexed {result['indexed']} articles, {len(result['errors'])} failed"
 
 
-def index_all_articles(batch_size=100):
-    all_articles = Article.objects.all().values_list("id", flat=True)
-    paginator = Paginator(all_articles, batch_size)
+def index_all_articles(
+    batch_size=None, from_id=None, chunk_size=None, thread_count=None, processes=0
+):
+    return index_articles(
+        from_id=from_id,
+        batch_size=batch_size,
+        chunk_size=chunk_size,
+        thread_count=thread_count,
+        processes=processes,
+    )
+
 
-    for page_number in paginator.page_range:
-        page = paginator.page(page_number)
-        index_article_batch.delay(list(page.object_list))
+@shared_task(acks_late=True)
+def reindex_changed_articles():
+    result = reindex_since()
+    return f"Reindexed {result['indexed']} articles, {len(result['errors'])} failed"
+
+
+@shared_task(acks_late=True)
+def update_article_stats():
+    data = refresh_article_stats()
+    return f"Counted {data['other']['all']} articles"
 
 
 @shared_task(acks_late=True)
 def rerun_failed_compliance_checks_by_date(
     start_date=(datetime.now() - timedelta(hours=24)), end_date=datetime.now()
 ):
-    articles = Article.objects.filter(
-        report__report_date__range=(start_date, end_date)
-    ).filter(report__compliant=False)
-
-    for article in articles:
-        compliance_checks.delay(article.id)
+    article_ids = list(
+        Article.objects.filter(report__report_date__range=(start_date, end_date))
+        .filter(report__compliant=False)
+        .values_list("id", flat=True)
+        .distinct()
+    )
+    # the DOI registration dates may be available by now
+    schedule_compliance_checks(article_ids, force=True)
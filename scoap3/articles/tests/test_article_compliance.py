@@ -1,7 +1,10 @@
 from datetime import date
+from unittest.mock import patch
 
 import pytest
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from freezegun import freeze_time
 
 from scoap3.articles.admin import make_compliant
@@ -11,7 +14,7 @@ from scoap3.articles.models import (
     ArticleIdentifier,
     ComplianceReport,
 )
-from scoap3.articles.tasks import compliance_checks
+from scoap3.articles.tasks import compliance_checks, run_compliance_checks
 from scoap3.authors.models import Author
 from scoap3.misc.models import (
     Affiliation,
@@ -290,6 +293,91 @@ class TestArticleCompliance(TestCase):
 
         self.assertEqual(list(ids), [])
 
+    def test_compliance_checks_update_report(self):
+        compliance_checks(self.article.id)
+        report = self.article.report.get()
+
+        self.article.title = "Test Erratum"
+        self.article.save()
+        compliance_checks(self.article.id)
+
+        self.assertEqual(self.article.report.get().pk, report.pk)
+        self.assertEqual(self.article.report.get().check_article_type, False)
+
+    @patch("scoap3.articles.tasks.is_string_in_pdf", return_value=True)
+    @patch("scoap3.articles.tasks.get_doi_registrations", return_value={})
+    def test_compliance_checks_rerun_changed_checks_only(
+        self, mock_registrations, mock_is_string_in_pdf
+    ):
+        ArticleFile.objects.create(
+            file="test.pdf", article_id=self.article, filetype="pdf"
+        )
+        compliance_checks(self.article.id)
+        ComplianceReport.objects.update(check_license_description="Kept")
+
+        self.article.title = "Test Erratum"
+        self.article.save()
+        compliance_checks(self.article.id)
+
+        report = self.article.report.get()
+        self.assertEqual(report.check_article_type, False)
+        self.assertEqual(report.check_license_description, "Kept")
+        self.assertEqual(report.check_contains_funded_by_scoap3, True)
+        self.assertEqual(mock_is_string_in_pdf.call_count, 1)
+
+        compliance_checks(self.article.id, force=True)
+
+        report = self.article.report.get()
+        self.assertNotEqual(report.check_license_description, "Kept")
+        self.assertEqual(mock_is_string_in_pdf.call_count, 2)
+
+    @patch("scoap3.articles.tasks.is_string_in_pdf")
+    @patch("scoap3.articles.tasks.get_doi_registrations", return_value={})
+    def test_compliance_checks_rerun_failed_checks(
+        self, mock_registrations, mock_is_string_in_pdf
+    ):
+        ArticleFile.objects.create(
+            file="test.pdf", article_id=self.article, filetype="pdf"
+        )
+        mock_is_string_in_pdf.side_effect = OSError("Cannot open the file")
+        compliance_checks(self.article.id)
+
+        report = self.article.report.get()
+        self.assertEqual(report.check_contains_funded_by_scoap3, False)
+        self.assertEqual(report.check_doi_registration_time, False)
+
+        mock_is_string_in_pdf.side_effect = None
+        mock_is_string_in_pdf.return_value = True
+        compliance_checks(self.article.id)
+
+        report = self.article.report.get()
+        self.assertEqual(report.check_contains_funded_by_scoap3, True)
+        self.assertEqual(mock_is_string_in_pdf.call_count, 2)
+        self.assertEqual(mock_registrations.call_count, 2)
+
+    def test_run_compliance_checks_queries_per_batch(self):
+        for article in Article.objects.all():
+            Author.objects.create(
+                article_id=article, last_name="Surname", author_order=0
+            )
+            ArticleFile.objects.create(
+                file="test.xml", article_id=article, filetype="xml"
+            )
+            PublicationInfo.objects.create(
+                journal_title="Physical Review D",
+                article_id=article,
+                publisher=self.publisher,
+            )
+
+        run_compliance_checks(Article.objects.all())
+        with CaptureQueriesContext(connection) as one_article:
+            run_compliance_checks(Article.objects.filter(id=self.article.id))
+        with CaptureQueriesContext(connection) as all_articles:
+            run_compliance_checks(Article.objects.all())
+
+        self.assertEqual(len(all_articles), len(one_article))
+        self.assertEqual(ComplianceReport.objects.count(), Article.objects.count())
+
     def tearDown(self):
         ArticleIdentifier.objects.all().delete()
         ArticleFile.objects.all().delete()
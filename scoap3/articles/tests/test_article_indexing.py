@@ -1,7 +1,25 @@
 import json
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
 
 import pytest
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.indexing import (
+    get_index_generation,
+    index_articles,
+    iter_article_id_batches,
+    rebuild_index,
+    reindex_since,
+)
+from scoap3.articles.models import Article, ArticleFile, IndexWatermark
+from scoap3.authors.models import Author, AuthorIdentifier
+from scoap3.misc.models import Affiliation
+from scoap3.tasks import import_to_scoap3
 
 
 @pytest.mark.django_db
@@ -25,3 +43,387 @@ def test_article_post_and_delete(client, user, license):
 
     response = client.delete(article_detail_url)
     assert response.status_code == 204
+
+
+@pytest.mark.django_db
+def test_article_document_reads_prefetched_relations(shared_datadir):
+    records = [
+        json.loads((shared_datadir / name).read_text())
+        for name in ("workflow_record.json", "legacy_record.json")
+    ]
+    for data in records:
+        import_to_scoap3(data, True)
+    document = ArticleDocument()
+    expected = [document.prepare(article) for article in Article.objects.all()]
+
+    query_counts = []
+    for count in (1, 2):
+        with CaptureQueriesContext(connection) as queries:
+            prepared = [
+                document.prepare(article)
+                for article in document.get_queryset(count=count)
+            ]
+        assert prepared == expected[:count]
+        query_counts.append(len(queries))
+
+    assert query_counts[0] == query_counts[1]
+
+
+@pytest.mark.django_db
+def test_iter_article_id_batches_uses_keyset_pagination():
+    ids = [Article.objects.create(title=f"Article {idx}").id for idx in range(5)]
+
+    assert list(iter_article_id_batches(2)) == [ids[:2], ids[2:4], ids[4:]]
+    assert list(iter_article_id_batches(2, from_id=ids[3])) == [ids[3:]]
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.indexing.ArticleDocument._get_connection")
+@patch("scoap3.articles.indexing.parallel_bulk")
+def test_index_articles_collects_errors(mock_bulk, mock_connection):
+    ids = [Article.objects.create(title=f"Article {idx}").id for idx in range(3)]
+    error = {"index": {"_id": ids[1], "status": 400}}
+
+    def bulk(client, actions, **kwargs):
+        actions = list(actions)
+        assert [action["_id"] for action in actions] == ids
+        assert actions[0]["_source"]["title"] == "Article 0"
+        return [(True, {}), (False, error), (True, {})]
+
+    mock_bulk.side_effect = bulk
+
+    result = index_articles(from_id=ids[0], batch_size=2, chunk_size=10)
+
+    assert result == {"indexed": 2, "errors": [error]}
+    assert mock_bulk.call_args.kwargs["chunk_size"] == 10
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.indexing.ArticleDocument._get_connection")
+@patch("scoap3.articles.indexing.parallel_bulk")
+def test_index_articles_refreshes_before_bumping_generation(mock_bulk, mock_connection):
+    article = Article.objects.create(title="Article")
+    mock_bulk.return_value = [(True, {})]
+    generation = get_index_generation()
+    generations = []
+    client = mock_connection.return_value
+    client.indices.refresh.side_effect = lambda **kwargs: generations.append(
+        get_index_generation()
+    )
+
+    index_articles(article_ids=[article.id])
+    index_articles(article_ids=[article.id], refresh=True)
+    index_articles(article_ids=[article.id], index="scoap3-records-20240101000000")
+
+    client.indices.refresh.assert_called_once_with(index=ArticleDocument._index._name)
+    assert generations == [generation]
+    assert get_index_generation() == generation + 2
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.indexing.index_articles")
+@patch("scoap3.articles.indexing.ArticleDocument._get_connection")
+def test_rebuild_index_swaps_alias(mock_connection, mock_index_articles):
+    alias = ArticleDocument._index._name
+    old_versions = [f"{alias}-20230101000000", f"{alias}-20240101000000"]
+    client = MagicMock()
+    mock_connection.return_value = client
+    mock_index_articles.side_effect = lambda **kwargs: {"indexed": 1, "errors": []}
+    client.indices.exists_alias.return_value = True
+    client.indices.get_alias.return_value = {old_versions[1]: {}}
+    client.indices.get.side_effect = lambda **kwargs: {
+        index: {}
+        for index in old_versions + [client.indices.create.call_args.kwargs["index"]]
+    }
+
+    result = rebuild_index(keep=2)
+
+    new_index = result["index"]
+    body = client.indices.create.call_args.kwargs["body"]
+    assert body["settings"]["number_of_replicas"] == 0
+    assert body["settings"]["refresh_interval"] == "-1"
+    assert client.indices.put_settings.call_args.kwargs["body"] == {
+        "index": {"number_of_replicas": 1, "refresh_interval": None}
+    }
+    client.indices.update_aliases.assert_called_once_with(
+        body={
+            "actions": [
+                {"remove": {"index": old_versions[1], "alias": alias}},
+                {"add": {"index": new_index, "alias": alias}},
+            ]
+        }
+    )
+    client.indices.delete.assert_called_once_with(index=old_versions[0])
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.indexing.index_articles")
+@patch("scoap3.articles.indexing.ArticleDocument._get_connection")
+def test_rebuild_index_replaces_unversioned_index(mock_connection, mock_index_articles):
+    alias = ArticleDocument._index._name
+    client = MagicMock()
+    mock_connection.return_value = client
+    mock_index_articles.side_effect = lambda **kwargs: {"indexed": 1, "errors": []}
+    client.indices.exists_alias.return_value = False
+    client.indices.exists.return_value = True
+    client.indices.get.return_value = {}
+
+    result = rebuild_index()
+
+    client.indices.update_aliases.assert_called_once_with(
+        body={
+            "actions": [
+                {"remove_index": {"index": alias}},
+                {"add": {"index": result["index"], "alias": alias}},
+            ]
+        }
+    )
+    client.indices.delete.assert_not_called()
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.indexing.index_articles")
+@patch("scoap3.articles.indexing.ArticleDocument._get_connection")
+def test_rebuild_index_keeps_alias_on_errors(mock_connection, mock_index_articles):
+    client = MagicMock()
+    mock_connection.return_value = client
+    mock_index_articles.side_effect = lambda **kwargs: {
+        "indexed": 0,
+        "errors": [{"index": {"status": 400}}],
+    }
+
+    result = rebuild_index()
+
+    assert len(result["errors"]) == 2
+    client.indices.update_aliases.assert_not_called()
+    client.indices.delete.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_related_changes_touch_article_once_on_commit(
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        article = Article.objects.create(title="Article")
+    Article.objects.filter(pk=article.pk).update(
+        _updated_at=timezone.now() - timedelta(days=1)
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author = Author.objects.create(article_id=article, author_order=0)
+        author.first_name = "John"
+        author.save()
+        ArticleFile.objects.create(article_id=article, file="file.pdf")
+
+    article.refresh_from_db()
+    assert article._updated_at > timezone.now() - timedelta(minutes=1)
+
+
+@pytest.mark.django_db
+def test_related_deletes_touch_article(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        article = Article.objects.create(title="Article")
+        author = Author.objects.create(article_id=article, author_order=0)
+        identifier = AuthorIdentifier.objects.create(
+            author_id=author, identifier_type="ORCID", identifier_value="0000"
+        )
+        affiliation = Affiliation.objects.create(value="CERN")
+        affiliation.author_id.add(author)
+
+    for related in (identifier, affiliation):
+        Article.objects.filter(pk=article.pk).update(
+            _updated_at=timezone.now() - timedelta(days=1)
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            related.delete()
+
+        article.refresh_from_db()
+        assert article._updated_at > timezone.now() - timedelta(minutes=1)
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.signals.DODConfig")
+@patch("scoap3.articles.tasks.compliance_checks.apply_async")
+@patch("scoap3.articles.indexing.index_articles")
+def test_article_changes_are_coalesced_per_transaction(
+    mock_index_articles,
+    mock_compliance,
+    mock_config,
+    django_capture_on_commit_callbacks,
+):
+    mock_config.autosync_enabled.return_value = True
+    mock_index_articles.return_value = {"indexed": 1, "errors": []}
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        article = Article.objects.create(title="Article")
+        article.title = "New title"
+        article.save()
+        Author.objects.create(article_id=article, author_order=0)
+        article.save()
+
+    assert len({c.__self__ for c in callbacks if c.__name__ == "flush"}) == 1
+    mock_index_articles.assert_called_once()
+    assert mock_index_articles.call_args.kwargs["article_ids"] == [article.id]
+    mock_compliance.assert_called_once_with(args=[article.id], priority=9)
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.signals.DODConfig")
+@patch("scoap3.articles.tasks.compliance_checks.apply_async")
+@patch("scoap3.articles.indexing.index_articles")
+def test_compliance_scheduled_when_indexing_fails(
+    mock_index_articles,
+    mock_compliance,
+    mock_config,
+    django_capture_on_commit_callbacks,
+):
+    mock_config.autosync_enabled.return_value = True
+    mock_index_articles.side_effect = ConnectionError("OpenSearch is down")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        article = Article.objects.create(title="Article")
+
+    mock_index_articles.assert_called_once()
+    mock_compliance.assert_called_once_with(args=[article.id], priority=9)
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.signals.DODConfig")
+@patch("scoap3.articles.tasks.compliance_checks.apply_async")
+@patch("scoap3.articles.indexing.index_articles")
+def test_article_changes_survive_savepoint_rollback(
+    mock_index_articles,
+    mock_compliance,
+    mock_config,
+    django_capture_on_commit_callbacks,
+):
+    mock_config.autosync_enabled.return_value = True
+    mock_index_articles.return_value = {"indexed": 1, "errors": []}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            article = Article.objects.create(title="Article")
+        try:
+            with transaction.atomic():
+                Article.objects.create(title="Rolled back")
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        other = Article.objects.create(title="Other article")
+
+    mock_index_articles.assert_called_once()
+    assert set(mock_index_articles.call_args.kwargs["article_ids"]) >= {
+        article.id,
+        other.id,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("scoap3.articles.signals.DODConfig")
+@patch("scoap3.articles.tasks.compliance_checks.apply_async")
+@patch("scoap3.articles.indexing.index_articles")
+def test_article_changes_after_rollback_are_flushed(
+    mock_index_articles, mock_compliance, mock_config
+):
+    mock_config.autosync_enabled.return_value = True
+    mock_index_articles.return_value = {"indexed": 1, "errors": []}
+
+    try:
+        with transaction.atomic():
+            Article.objects.create(title="Rolled back")
+            raise DatabaseError
+    except DatabaseError:
+        pass
+    mock_index_articles.assert_not_called()
+
+    with transaction.atomic():
+        article = Article.objects.create(title="Article")
+
+    mock_index_articles.assert_called_once()
+    assert mock_index_articles.call_args.kwargs["article_ids"] == [article.id]
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.indexing.index_articles")
+def test_reindex_since_uses_watermark(mock_index_articles):
+    old = Article.objects.create(title="Old")
+    changed = Article.objects.create(title="Changed")
+    Article.objects.filter(pk=old.pk).update(
+        _updated_at=timezone.now() - timedelta(days=2)
+    )
+    IndexWatermark.objects.create(
+        index=ArticleDocument._index._name,
+        updated_at=timezone.now() - timedelta(days=1),
+    )
+    mock_index_articles.return_value = {"indexed": 1, "errors": []}
+
+    reindex_since()
+
+    queryset = mock_index_articles.call_args.kwargs["queryset"]
+    assert list(queryset) == [changed]
+    watermark = IndexWatermark.objects.get()
+    assert watermark.updated_at > timezone.now() - timedelta(minutes=1)
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.indexing.index_articles")
+def test_reindex_since_keeps_watermark_on_errors(mock_index_articles):
+    Article.objects.create(title="Article")
+    mock_index_articles.return_value = {"indexed": 0, "errors": [{}]}
+
+    reindex_since()
+
+    assert list(mock_index_articles.call_args.kwargs["queryset"]) == list(
+        Article.objects.all()
+    )
+    assert not IndexWatermark.objects.exists()
+
+
+@pytest.mark.django_db
+def test_article_document_counts(shared_datadir):
+    data = json.loads((shared_datadir / "workflow_record.json").read_text())
+    import_to_scoap3(data, True)
+    article = ArticleDocument().get_queryset().get()
+
+    prepared = ArticleDocument().prepare(article)
+
+    authors = prepared["authors"]
+    affiliations = [aff for author in authors for aff in author["affiliations"]]
+    assert prepared["authors_count"] == len(data["authors"]) == len(authors)
+    assert prepared["orcids_count"] == len([a for a in authors if a.get("orcid")])
+    assert prepared["affiliations_count"] == len(affiliations)
+    assert prepared["rors_count"] == len([a for a in affiliations if a.get("ror")])
+    assert prepared["related_materials_dataset_count"] == 0
+    assert prepared["related_materials_software_count"] == 0
+
+
+@pytest.mark.django_db
+def test_article_document_export_fields(shared_datadir):
+    data = json.loads((shared_datadir / "workflow_record.json").read_text())
+    import_to_scoap3(data, True)
+    article = ArticleDocument().get_queryset().get()
+
+    prepared = ArticleDocument().prepare(article)
+
+    assert prepared["doi"] == data["dois"][0]["value"]
+    assert prepared["arxiv_id"] == data["arxiv_eprints"][0]["value"]
+    assert prepared["arxiv_primary_category"] == (
+        data["arxiv_eprints"][0]["categories"][0]
+    )
+    assert prepared["journal_title"] == (
+        prepared["publication_info"][0]["journal_title"]
+    )
+    assert prepared["publisher"] == prepared["publication_info"][0]["publisher"]
+    assert prepared["author_affiliations"] == [
+        {
+            "author": author["name"],
+            "country": affiliation["country"]["code"],
+            "affiliation": affiliation["value"],
+            "ror": affiliation.get("ror"),
+        }
+        for author in prepared["authors"]
+        for affiliation in author["affiliations"]
+    ]
+    assert prepared["authors_without_affiliations_count"] == len(
+        [author for author in prepared["authors"] if not author["affiliations"]]
+    )
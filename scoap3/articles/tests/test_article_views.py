@@ -183,6 +183,7 @@ class TestArticleViewSet:
             article.title
             == "The Effective QCD Running Coupling Constant and a Dirac Model for the Charmonium Spectrum"
         )
+        ArticleDocument().update(article, action="index")
         search_article_detail_url = reverse(
             "search:article-detail", kwargs={"pk": article_id}
         )
@@ -1,10 +1,17 @@
+from datetime import date
+from unittest.mock import patch
+
 import pytest
 from django.test import TestCase
 from freezegun import freeze_time
 
 from scoap3.articles.models import Article, ArticleIdentifier
-from scoap3.articles.tasks import compliance_checks
-from scoap3.misc.models import PublicationInfo, Publisher
+from scoap3.articles.tasks import (
+    compliance_checks,
+    run_compliance_checks,
+    schedule_compliance_checks,
+)
+from scoap3.misc.models import DOIRegistration, PublicationInfo, Publisher
 
 
 @pytest.mark.django_db
@@ -75,3 +82,42 @@ class TestCheckDoiRegistrationTime(TestCase):
             compliance_checks(article.id)
             report = article.report.first()
             self.assertEqual(report.check_doi_registration_time, False)
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.tasks.compliance_checks_batch.apply_async")
+def test_schedule_compliance_checks_in_batches(mock_checks, settings):
+    settings.COMPLIANCE_CHECK_BATCH_SIZE = 2
+
+    schedule_compliance_checks([1, 2, 3])
+
+    assert [call.kwargs["args"] for call in mock_checks.call_args_list] == [
+        [[1, 2], False],
+        [[3], False],
+    ]
+
+
+@pytest.mark.django_db
+@patch("scoap3.articles.tasks.get_doi_registrations")
+def test_run_compliance_checks_looks_up_dois_per_batch(mock_registrations):
+    articles = [Article.objects.create(title=f"Article {idx}") for idx in range(2)]
+    for article in articles:
+        ArticleIdentifier.objects.create(
+            identifier_type="DOI",
+            identifier_value=f"10.1/{article.id}",
+            article_id=article,
+        )
+    mock_registrations.return_value = {
+        f"10.1/{articles[0].id}": DOIRegistration(
+            doi=f"10.1/{articles[0].id}", created_date=date.today()
+        )
+    }
+
+    run_compliance_checks(Article.objects.all())
+
+    mock_registrations.assert_called_once()
+    assert sorted(mock_registrations.call_args.args[0]) == [
+        f"10.1/{article.id}" for article in articles
+    ]
+    assert articles[0].report.get().check_doi_registration_time
+    assert not articles[1].report.get().check_doi_registration_time
@@ -0,0 +1,219 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+
+from scoap3.articles.indexing import (
+    INDEX_GENERATION_KEY,
+    bump_index_generation,
+    get_index_generation,
+    index_articles,
+)
+from scoap3.articles.models import Article
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.parametrize("url_name", ["api:article-detail", "api:records-detail"])
+def test_retrieve_if_none_match(client, url_name):
+    article = Article.objects.create(title="Title")
+    url = reverse(url_name, kwargs={"pk": article.id})
+
+    response = client.get(url)
+    etag = response["ETag"]
+    assert response.status_code == status.HTTP_200_OK
+    assert "public" in response["Cache-Control"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+
+    Article.objects.filter(pk=article.pk).update(
+        _updated_at=datetime(2030, 1, 1, tzinfo=timezone.utc)
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+
+
+def test_retrieve_if_modified_since(client):
+    article = Article.objects.create(title="Title")
+    url = reverse("api:records-detail", kwargs={"pk": article.id})
+    last_modified = client.get(url)["Last-Modified"]
+
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_retrieve_etag_depends_on_renderer(client):
+    article = Article.objects.create(title="Title")
+    url = reverse("api:article-detail", kwargs={"pk": article.id})
+
+    assert client.get(url)["ETag"] != client.get(url, {"format": "api"})["ETag"]
+
+
+def test_retrieve_authenticated_is_private(client, user):
+    client.force_login(user)
+    article = Article.objects.create(title="Title")
+
+    response = client.get(reverse("api:article-detail", kwargs={"pk": article.id}))
+
+    assert "private" in response["Cache-Control"]
+
+
+def test_index_generation():
+    generation = get_index_generation()
+
+    bump_index_generation()
+    assert get_index_generation() == generation + 1
+
+    cache.delete(INDEX_GENERATION_KEY)
+    assert get_index_generation() > generation + 1
+
+
+@pytest.mark.parametrize(
+    "url_name,render",
+    [
+        (
+            "search:article-list",
+            "django_elasticsearch_dsl_drf.viewsets.BaseDocumentViewSet.list",
+        ),
+        (
+            "api:records-list",
+            "scoap3.articles.api.views.LegacyArticleDocumentView.render_list",
+        ),
+    ],
+)
+def test_search_if_none_match(client, url_name, render):
+    url = reverse(url_name)
+
+    with patch(render, return_value=Response({"results": []})) as mock_render:
+        etag = client.get(url, {"journal": "JHEP", "search": ""})["ETag"]
+        response = client.get(url, {"journal": "JHEP"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert mock_render.call_count == 1
+
+        bump_index_generation()
+        response = client.get(url, {"journal": "JHEP"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_render.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "url_name,render",
+    [
+        (
+            "search:article-list",
+            "django_elasticsearch_dsl_drf.viewsets.BaseDocumentViewSet.list",
+        ),
+        (
+            "api:records-list",
+            "scoap3.articles.api.views.LegacyArticleDocumentView.render_list",
+        ),
+    ],
+)
+def test_search_response_cache(client, url_name, render):
+    url = reverse(url_name)
+
+    with patch(render, return_value=Response({"results": [1]})) as mock_render:
+        response = client.get(url, {"journal": "JHEP", "page": "2"})
+        assert response.json() == {"results": [1]}
+
+        response = client.get(url, {"page": "2", "journal": "JHEP", "search": ""})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"results": [1]}
+        assert response["Content-Type"] == "application/json"
+        assert mock_render.call_count == 1
+
+        client.get(url, {"journal": "JHEP", "page": "2"}, HTTP_ACCEPT="text/html")
+        assert mock_render.call_count == 2
+
+        bump_index_generation()
+        client.get(url, {"journal": "JHEP", "page": "2"})
+        assert mock_render.call_count == 3
+
+
+@patch("scoap3.articles.indexing.ArticleDocument._get_connection")
+@patch("scoap3.articles.indexing.parallel_bulk")
+def test_search_response_cache_after_indexing(mock_bulk, mock_connection, client):
+    url = reverse("search:article-list")
+    article = Article.objects.create(title="New title")
+    # documents become searchable on refresh
+    searchable = {"title": "Old title"}
+    mock_connection.return_value.indices.refresh.side_effect = (
+        lambda **kwargs: searchable.update(title=article.title)
+    )
+    mock_bulk.return_value = [(True, {})]
+
+    with patch(
+        "django_elasticsearch_dsl_drf.viewsets.BaseDocumentViewSet.list",
+        side_effect=lambda *args, **kwargs: Response(
+            {"results": [searchable["title"]]}
+        ),
+    ):
+        assert client.get(url).json() == {"results": ["Old title"]}
+
+        index_articles(article_ids=[article.id])
+
+        assert client.get(url).json() == {"results": ["New title"]}
+
+
+def test_search_response_cache_by_role(client, user):
+    url = reverse("search:article-list")
+
+    with patch(
+        "django_elasticsearch_dsl_drf.viewsets.BaseDocumentViewSet.list",
+        return_value=Response({"results": []}),
+    ) as mock_render:
+        user.is_staff = False
+        user.save()
+        client.get(url)
+        client.force_login(user)
+        client.get(url)
+        assert mock_render.call_count == 1
+
+        user.is_staff = True
+        user.save()
+        client.get(url)
+        assert mock_render.call_count == 2
+
+
+def test_search_response_cache_errors_are_not_cached(client):
+    url = reverse("search:article-list")
+
+    with patch(
+        "django_elasticsearch_dsl_drf.viewsets.BaseDocumentViewSet.list",
+        return_value=Response({"detail": "error"}, status=400),
+    ) as mock_render:
+        client.get(url)
+        response = client.get(url)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert mock_render.call_count == 2
+
+
+def test_search_response_cache_waits_for_render(client, settings):
+    settings.SEARCH_CACHE_LOCK_TIMEOUT = 1
+    url = reverse("search:article-list")
+
+    with patch(
+        "django_elasticsearch_dsl_drf.viewsets.BaseDocumentViewSet.list",
+        return_value=Response({"results": []}),
+    ) as mock_render, patch(
+        "scoap3.articles.api.caching.cache.add", return_value=False
+    ):
+        # another request renders the entry, and releases the lock without caching it
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_render.call_count == 1
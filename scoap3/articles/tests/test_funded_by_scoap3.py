@@ -1,12 +1,22 @@
+import os
 from io import BytesIO
+from unittest.mock import MagicMock, patch
 
 import fitz
 import pytest
+from botocore.exceptions import ClientError
 from django.core.files import File
 from django.core.files.base import ContentFile
 
-from scoap3.articles.models import Article, ArticleFile
+from scoap3.articles.models import Article, ArticleFile, ArticleFileText
+from scoap3.articles.pdf import extract_text, get_page_order
 from scoap3.articles.tasks import check_contains_funded_by_scoap3
+from scoap3.articles.util import (
+    _get_extraction_pool,
+    get_file_fingerprint,
+    is_string_in_pdf,
+    shutdown_extraction_pool,
+)
 
 pytestmark = pytest.mark.django_db
 
@@ -25,11 +35,12 @@ def create_article(db):
 
 @pytest.fixture
 def create_pdf_with_text():
-    def _create_pdf_with_text(text):
+    def _create_pdf_with_text(*texts):
         pdf_bytes = BytesIO()
         doc = fitz.open()
-        page = doc.new_page()
-        page.insert_text((72, 72), text)
+        for text in texts:
+            page = doc.new_page()
+            page.insert_text((72, 72), text)
         doc.save(pdf_bytes)
         doc.close()
         pdf_bytes.seek(0)
@@ -181,3 +192,169 @@ class TestCheckContainsFundedBySCOAP3:
         result, message = check_contains_funded_by_scoap3(article)
         assert result is False
         assert message == "No files found for the given article."
+
+
+class TestArticleFileTextCache:
+    def test_text_is_extracted_once(
+        self, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        article = create_article()
+        attach_file_to_article(
+            article, create_pdf_with_text("Funded by SCOAP3"), "file.pdf"
+        )
+        article_file = ArticleFile.objects.get()
+
+        with patch(
+            "scoap3.articles.util.extract_text", wraps=extract_text
+        ) as mock_extract:
+            assert is_string_in_pdf(article_file, "Funded by SCOAP")
+            assert is_string_in_pdf(article_file, "Funded by SCOAP3")
+            assert not is_string_in_pdf(article_file, "Funded by CERN")
+
+        assert mock_extract.call_count == 1
+        assert ArticleFileText.objects.get().phrases == {"fundedbyscoap": 0}
+
+    def test_text_is_extracted_again_when_file_changes(
+        self, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        article = create_article()
+        attach_file_to_article(article, create_pdf_with_text("Other text"), "file.pdf")
+        article_file = ArticleFile.objects.get()
+        assert not is_string_in_pdf(article_file, "Funded by SCOAP")
+
+        article_file.file.save(
+            "file.pdf", create_pdf_with_text("Funded by SCOAP3 at last")
+        )
+
+        assert is_string_in_pdf(article_file, "Funded by SCOAP")
+        assert ArticleFileText.objects.count() == 1
+
+    def test_text_is_extracted_in_worker_process(
+        self, settings, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        settings.PDF_EXTRACTION_PROCESSES = 1
+        article = create_article()
+        attach_file_to_article(
+            article, create_pdf_with_text("Funded by SCOAP3"), "file.pdf"
+        )
+
+        try:
+            assert is_string_in_pdf(ArticleFile.objects.get(), "Funded by SCOAP")
+        finally:
+            shutdown_extraction_pool()
+
+        assert _get_extraction_pool.cache_info().currsize == 0
+
+    def test_text_is_extracted_inline_in_daemonic_process(
+        self, settings, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        settings.PDF_EXTRACTION_PROCESSES = 1
+        article = create_article()
+        attach_file_to_article(
+            article, create_pdf_with_text("Funded by SCOAP3"), "file.pdf"
+        )
+
+        with patch("multiprocessing.current_process") as mock_current_process:
+            mock_current_process.return_value.daemon = True
+            assert is_string_in_pdf(ArticleFile.objects.get(), "Funded by SCOAP")
+
+        assert _get_extraction_pool.cache_info().currsize == 0
+
+
+def test_s3_file_fingerprint_uses_storage_location():
+    field_file = MagicMock()
+    field_file.name = "files/file.pdf"
+    field_file.storage.location = "media"
+    field_file.storage.bucket.Object.return_value.e_tag = '"abc"'
+
+    assert get_file_fingerprint(field_file) == "files/file.pdf:abc"
+    field_file.storage.bucket.Object.assert_called_once_with("media/files/file.pdf")
+
+
+class TestPageScan:
+    def test_page_order(self):
+        assert get_page_order(5) == [0, 4, 1, 3, 2]
+        assert get_page_order(6, max_pages=3) == [0, 5, 1]
+        assert get_page_order(1, max_pages=3) == [0]
+
+    def test_scan_stops_at_last_page_match(
+        self, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        article = create_article()
+        attach_file_to_article(
+            article,
+            create_pdf_with_text("Introduction", "Results", "Funded by SCOAP3"),
+            "file.pdf",
+        )
+        article_file = ArticleFile.objects.get()
+
+        assert is_string_in_pdf(article_file, "Funded by SCOAP")
+        file_text = ArticleFileText.objects.get()
+        assert not file_text.complete
+        assert file_text.text == "introductionfundedbyscoap3"
+
+    def test_incomplete_text_is_scanned_again_for_new_strings(
+        self, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        article = create_article()
+        attach_file_to_article(
+            article,
+            create_pdf_with_text("Funded by SCOAP3", "Results", "Conclusions"),
+            "file.pdf",
+        )
+        article_file = ArticleFile.objects.get()
+        assert is_string_in_pdf(article_file, "Funded by SCOAP")
+
+        assert is_string_in_pdf(article_file, "Results")
+        assert not is_string_in_pdf(article_file, "Acknowledgements")
+        file_text = ArticleFileText.objects.get()
+        assert file_text.complete
+        assert is_string_in_pdf(article_file, "Conclusions")
+
+    def test_scan_page_limit(
+        self, settings, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        settings.PDF_SCAN_MAX_PAGES = 2
+        article = create_article()
+        attach_file_to_article(
+            article,
+            create_pdf_with_text("Introduction", "Funded by SCOAP3", "Conclusions"),
+            "file.pdf",
+        )
+
+        assert not is_string_in_pdf(ArticleFile.objects.get(), "Funded by SCOAP")
+        assert not ArticleFileText.objects.get().complete
+
+    def test_truncated_file_is_downloaded_again_when_unreadable(
+        self, settings, create_article, create_pdf_with_text, attach_file_to_article
+    ):
+        settings.PDF_SCAN_MAX_BYTES = 100
+        article = create_article()
+        attach_file_to_article(
+            article, create_pdf_with_text("Funded by SCOAP3"), "file.pdf"
+        )
+        sizes = []
+
+        def extract(path, *args):
+            sizes.append(os.path.getsize(path))
+            if len(sizes) == 1:
+                raise fitz.FileDataError("Failed to open stream")
+            return extract_text(path, *args)
+
+        with patch("scoap3.articles.util.extract_text", side_effect=extract):
+            assert is_string_in_pdf(ArticleFile.objects.get(), "Funded by SCOAP")
+
+        assert sizes[0] == 100
+        assert sizes[1] == ArticleFile.objects.get().file.size
+        assert ArticleFileText.objects.get().complete
+
+    def test_missing_s3_object_is_not_found(
+        self, create_article, attach_file_to_article
+    ):
+        article = create_article()
+        attach_file_to_article(article, ContentFile(b"text"), "file.pdf")
+        error = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+        with patch("scoap3.articles.util.get_file_fingerprint", side_effect=error):
+            with pytest.raises(FileNotFoundError):
+                is_string_in_pdf(ArticleFile.objects.get(), "Funded by SCOAP")
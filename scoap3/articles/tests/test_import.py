@@ -0,0 +1,252 @@
+import copy
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from scoap3.articles.models import Article
+from scoap3.authors.models import Author
+from scoap3.misc.cache import clear_lookup_caches
+from scoap3.misc.models import Affiliation, Country, InstitutionIdentifier
+from scoap3.tasks import _create_affiliation, import_batch_to_scoap3, import_to_scoap3
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def empty_lookup_caches():
+    clear_lookup_caches()
+    yield
+    clear_lookup_caches()
+
+
+RECORDS = [
+    "workflow_record.json",
+    "legacy_record.json",
+    "workflow_article.json",
+]
+
+
+def _snapshot(article):
+    def rows(queryset, *exclude):
+        return sorted(
+            tuple(
+                (key, str(value).replace(f"/{article.id}/", "/<id>/"))
+                for key, value in row.items()
+                if key not in ("id", "article_id_id", "author_id_id") + exclude
+            )
+            for row in queryset.values()
+        )
+
+    authors = article.authors.order_by("author_order")
+    return {
+        "article": rows(
+            Article.objects.filter(pk=article.pk), "_created_at", "_updated_at"
+        ),
+        "licenses": rows(article.related_licenses.all()),
+        "files": rows(article.related_files.all(), "created", "updated"),
+        "identifiers": rows(article.article_identifiers.all()),
+        "copyright": rows(article.copyright.all()),
+        "categories": rows(article.article_arxiv_category.all()),
+        "publication_info": rows(article.publication_info.all()),
+        "authors": [
+            (
+                author.first_name,
+                author.last_name,
+                author.email,
+                author.author_order,
+                rows(author.identifiers.all()),
+                rows(author.affiliations.all()),
+            )
+            for author in authors
+        ],
+    }
+
+
+def _load_records(shared_datadir):
+    return [json.loads((shared_datadir / name).read_text()) for name in RECORDS]
+
+
+class TestImportBatchToScoap3:
+    def test_batch_import_matches_single_import(self, shared_datadir):
+        records = _load_records(shared_datadir)
+
+        expected = [
+            _snapshot(import_to_scoap3(copy.deepcopy(data), True)) for data in records
+        ]
+        Article.objects.all().delete()
+
+        articles = import_batch_to_scoap3(copy.deepcopy(records), True)
+
+        assert [_snapshot(article) for article in articles] == expected
+
+    def test_batch_import_updates_existing_articles(self, shared_datadir):
+        records = _load_records(shared_datadir)
+        import_batch_to_scoap3(copy.deepcopy(records), True)
+
+        for data in records:
+            data["titles"][0]["title"] = "New title"
+        articles = import_batch_to_scoap3(records, True)
+
+        assert Article.objects.count() == len(RECORDS)
+        for article in articles:
+            article.refresh_from_db()
+            assert article.title == "New title"
+            assert article.authors.count() == len(
+                records[articles.index(article)]["authors"]
+            )
+
+    def test_batch_import_with_repeated_doi(self, shared_datadir):
+        data = json.loads((shared_datadir / "workflow_record.json").read_text())
+        updated_data = copy.deepcopy(data)
+        updated_data["titles"][0]["title"] = "New title"
+
+        articles = import_batch_to_scoap3([data, updated_data], True)
+
+        assert articles[0].id == articles[1].id
+        article = Article.objects.get()
+        assert article.title == "New title"
+        assert article.authors.count() == len(data["authors"])
+        assert article.article_identifiers.filter(identifier_type="DOI").count() == 1
+
+
+class TestImportFingerprint:
+    def test_unchanged_reimport_is_skipped(
+        self, shared_datadir, django_capture_on_commit_callbacks
+    ):
+        data = json.loads((shared_datadir / "workflow_record.json").read_text())
+        article = import_to_scoap3(copy.deepcopy(data), True)
+        assert article.import_fingerprint
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                reimported = import_to_scoap3(copy.deepcopy(data), True)
+
+        assert reimported == article
+        assert len(queries) == 1
+        assert callbacks == []
+
+    def test_changed_payload_is_imported(self, shared_datadir):
+        data = json.loads((shared_datadir / "workflow_record.json").read_text())
+        article = import_to_scoap3(copy.deepcopy(data), True)
+        fingerprint = article.import_fingerprint
+
+        data["titles"][0]["title"] = "New title"
+        article = import_to_scoap3(data, True)
+
+        article.refresh_from_db()
+        assert article.title == "New title"
+        assert article.import_fingerprint not in ("", fingerprint)
+
+    def test_save_outside_import_clears_fingerprint(self, shared_datadir):
+        data = json.loads((shared_datadir / "workflow_record.json").read_text())
+        article = import_to_scoap3(copy.deepcopy(data), True)
+        article.title = "Edited title"
+        article.save()
+
+        article = import_to_scoap3(data, True)
+
+        article.refresh_from_db()
+        assert article.title != "Edited title"
+
+    def test_related_edit_clears_fingerprint(
+        self, shared_datadir, django_capture_on_commit_callbacks
+    ):
+        data = json.loads((shared_datadir / "workflow_record.json").read_text())
+        with django_capture_on_commit_callbacks(execute=True):
+            article = import_to_scoap3(copy.deepcopy(data), True)
+        article.refresh_from_db()
+        assert article.import_fingerprint
+
+        with django_capture_on_commit_callbacks(execute=True):
+            author = article.authors.first()
+            author.first_name = "Edited"
+            author.save()
+
+        article.refresh_from_db()
+        assert article.import_fingerprint == ""
+        import_to_scoap3(data, True)
+        assert article.authors.filter(first_name="Edited").count() == 0
+
+    def test_batch_skips_unchanged_records(self, shared_datadir):
+        records = _load_records(shared_datadir)
+        articles = import_batch_to_scoap3(copy.deepcopy(records), True)
+
+        records[1]["titles"][0]["title"] = "New title"
+        reimported = import_batch_to_scoap3(copy.deepcopy(records), True)
+
+        assert [article.id for article in reimported] == [
+            article.id for article in articles
+        ]
+        assert Article.objects.get(pk=articles[1].id).title == "New title"
+        assert import_to_scoap3(records[1], True).id == articles[1].id
+        assert Article.objects.filter(import_fingerprint="").count() == 0
+
+
+class TestCreateAffiliation:
+    def _create_authors(self, count, prefix=""):
+        article = Article.objects.create(title="Test Article")
+        data = {
+            "authors": [
+                {
+                    "full_name": f"Doe, John {idx}",
+                    "affiliations": [
+                        {
+                            "country": "CERN",
+                            "value": f"{prefix}CERN, Geneva",
+                            "ror": "https://ror.org/01ggx4157",
+                        },
+                        {"country": "Spain", "value": f"{prefix}University {idx % 2}"},
+                    ],
+                }
+                for idx in range(count)
+            ]
+        }
+        authors = [
+            Author.objects.create(article_id=article, author_order=idx)
+            for idx in range(count)
+        ]
+        return data, authors
+
+    def test_affiliations_are_deduplicated(self):
+        data, authors = self._create_authors(4)
+
+        affiliations = _create_affiliation(data, authors)
+
+        assert len(affiliations) == 8
+        assert Affiliation.objects.count() == 3
+        cern = Affiliation.objects.get(value="CERN, Geneva")
+        assert cern.author_id.count() == 4
+        assert list(
+            InstitutionIdentifier.objects.values_list("identifier_value", flat=True)
+        ) == ["01ggx4157"]
+
+        _create_affiliation(data, authors)
+        assert Affiliation.objects.count() == 3
+        assert InstitutionIdentifier.objects.count() == 1
+
+    def test_query_count_does_not_depend_on_authors(self):
+        Country.objects.create(code="CERN", name="CERN")
+        Country.objects.create(code="ES", name="Spain")
+        query_counts = []
+        for count in (2, 20):
+            data, authors = self._create_authors(count, prefix=f"{count} ")
+            with CaptureQueriesContext(connection) as queries:
+                _create_affiliation(data, authors)
+            query_counts.append(len(queries))
+
+        assert query_counts[0] == query_counts[1]
+
+    def test_multiple_existing_affiliations_are_logged(self, caplog):
+        data, authors = self._create_authors(1)
+        country = Country.objects.create(code="CERN", name="CERN")
+        Affiliation.objects.create(country=country, value="CERN, Geneva")
+        Affiliation.objects.create(country=country, value="CERN, Geneva")
+
+        affiliations = _create_affiliation(data, authors)
+
+        assert [affiliation.value for affiliation in affiliations] == ["University 0"]
+        assert "While creating author:Doe, John 0 affiliation:CERN, Geneva" in (
+            caplog.text
+        )
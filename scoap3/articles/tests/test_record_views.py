@@ -1,12 +1,62 @@
 import json
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
+from scoap3.articles.models import Article
+from scoap3.authors.models import Author, AuthorIdentifier, AuthorIdentifierType
+from scoap3.misc.models import (
+    Affiliation,
+    Country,
+    InstitutionIdentifier,
+    InstitutionIdentifierType,
+)
+
 pytestmark = pytest.mark.django_db
 
 
+def _add_authors(article, count):
+    country, _ = Country.objects.get_or_create(code="CH", name="Switzerland")
+    for order in range(count):
+        author = Author.objects.create(
+            article_id=article, last_name=f"Author {order}", author_order=order
+        )
+        AuthorIdentifier.objects.create(
+            author_id=author,
+            identifier_type=AuthorIdentifierType.ORCID,
+            identifier_value=f"0000-0000-0000-{order:04}",
+        )
+        affiliation = Affiliation.objects.create(country=country, value="CERN")
+        affiliation.author_id.add(author)
+        InstitutionIdentifier.objects.create(
+            affiliation_id=affiliation,
+            identifier_type=InstitutionIdentifierType.ROR,
+            identifier_value="https://ror.org/01ggx4157",
+        )
+
+
+@pytest.mark.parametrize("url_name", ["api:records-detail", "api:article-detail"])
+def test_record_queries_do_not_grow_with_authors(client, url_name):
+    small = Article.objects.create(title="small")
+    large = Article.objects.create(title="large")
+    _add_authors(small, 1)
+    _add_authors(large, 5)
+
+    with CaptureQueriesContext(connection) as small_queries:
+        client.get(reverse(url_name, kwargs={"pk": small.id}))
+    with CaptureQueriesContext(connection) as large_queries:
+        response = client.get(reverse(url_name, kwargs={"pk": large.id}))
+
+    assert len(large_queries) == len(small_queries)
+    assert response.status_code == status.HTTP_200_OK
+    authors = response.json().get("metadata", response.json())["authors"]
+    assert authors[0]["orcid"] == "0000-0000-0000-0000"
+    assert authors[0]["affiliations"][0]["ror"] == "https://ror.org/01ggx4157"
+
+
 class TestRecordViewSet:
     def test_get_record_not_found(self, client):
         url = reverse("api:records-detail", kwargs={"pk": 1})
@@ -4,6 +4,9 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 
+from scoap3.articles.documents import ArticleDocument
+from scoap3.articles.models import Article
+
 
 @pytest.mark.django_db
 @pytest.mark.usefixtures("rebuild_opensearch_index")
@@ -54,6 +57,7 @@ def test_article_search_ordering_default(user, client, license):
         data=updated_article,
     )
     assert response.status_code == 201
+    ArticleDocument().update(Article.objects.all(), action="index")
 
     response = client.get(reverse("search:article-list"))
     data = response.json()
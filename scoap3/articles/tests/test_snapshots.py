@@ -0,0 +1,140 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from scoap3.articles.models import Article, ArticleSnapshot
+from scoap3.misc.cache import clear_lookup_caches
+from scoap3.tasks import import_to_scoap3, update_affiliations
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def empty_lookup_caches():
+    clear_lookup_caches()
+    yield
+    clear_lookup_caches()
+
+
+def test_import_renders_snapshot_on_commit(
+    shared_datadir, django_capture_on_commit_callbacks
+):
+    data = json.loads((shared_datadir / "workflow_record.json").read_text())
+
+    with django_capture_on_commit_callbacks(execute=True):
+        article = import_to_scoap3(data, True)
+        assert not ArticleSnapshot.objects.exists()
+
+    snapshot = ArticleSnapshot.objects.get(article=article)
+    assert snapshot.data["title"] == article.title
+    assert snapshot.legacy_data["metadata"]["control_number"] == article.id
+    assert len(snapshot.data["authors"]) == article.authors.count()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_update_affiliations_refreshes_snapshot(shared_datadir):
+    data = json.loads((shared_datadir / "workflow_record.json").read_text())
+
+    update_affiliations(data)
+
+    snapshot = ArticleSnapshot.objects.get()
+    affiliations = snapshot.data["authors"][0]["affiliations"]
+    assert [affiliation["value"] for affiliation in affiliations] == [
+        data["authors"][0]["affiliations"][0]["value"]
+    ]
+
+
+@pytest.mark.parametrize(
+    "url_name,title",
+    [
+        ("api:article-detail", lambda data: data["title"]),
+        ("api:records-detail", lambda data: data["metadata"]["titles"][0]["title"]),
+    ],
+)
+def test_retrieve_serves_snapshot(
+    client, shared_datadir, django_capture_on_commit_callbacks, url_name, title
+):
+    data = json.loads((shared_datadir / "workflow_record.json").read_text())
+    with django_capture_on_commit_callbacks(execute=True):
+        article = import_to_scoap3(data, True)
+    snapshot = ArticleSnapshot.objects.get(article=article)
+    snapshot.data["title"] = "From snapshot"
+    snapshot.legacy_data["metadata"]["titles"][0]["title"] = "From snapshot"
+    snapshot.save()
+
+    response = client.get(reverse(url_name, kwargs={"pk": article.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert title(response.json()) == "From snapshot"
+
+
+def test_retrieve_renders_missing_snapshot(client):
+    article = Article.objects.create(title="Title")
+    ArticleSnapshot.objects.all().delete()
+
+    response = client.get(reverse("api:records-detail", kwargs={"pk": article.id}))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["metadata"]["titles"] == []
+    assert ArticleSnapshot.objects.filter(article=article).exists()
+
+
+def test_retrieve_ignores_stale_snapshot(client):
+    article = Article.objects.create(title="Title")
+    ArticleSnapshot.objects.all().delete()
+    client.get(reverse("api:article-detail", kwargs={"pk": article.id}))
+    ArticleSnapshot.objects.filter(article=article).update(
+        data={"title": "Stale"}, updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+
+    response = client.get(reverse("api:article-detail", kwargs={"pk": article.id}))
+
+    assert response.json()["title"] == "Title"
+
+
+def test_retrieve_reads_current_updated_at(client):
+    article = Article.objects.create(title="Title")
+    ArticleSnapshot.objects.all().delete()
+    client.get(reverse("api:article-detail", kwargs={"pk": article.id}))
+    Article.objects.filter(pk=article.pk).update(
+        _updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+
+    response = client.get(reverse("api:article-detail", kwargs={"pk": article.id}))
+    record = client.get(reverse("api:records-detail", kwargs={"pk": article.id}))
+
+    assert response.json()["_updated_at"] == "2024-01-01T00:00:00Z"
+    assert record.json()["updated"] == "2024-01-01T00:00:00Z"
+
+
+def test_update_refreshes_snapshot(
+    client, user, license, django_capture_on_commit_callbacks
+):
+    client.force_login(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(
+            reverse("api:article-list"),
+            data={"title": "Title", "related_licenses": [license.id]},
+        )
+    article_id = response.json()["id"]
+    assert ArticleSnapshot.objects.get(article_id=article_id).data["title"] == "Title"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.patch(
+            reverse("api:article-detail", kwargs={"pk": article_id}),
+            data={"title": "New title"},
+            content_type="application/json",
+        )
+
+    snapshot = ArticleSnapshot.objects.get(article_id=article_id)
+    assert snapshot.data["title"] == "New title"
+    assert snapshot.data["related_licenses"] == [license.id]
+
+
+def test_retrieve_missing_article(client):
+    response = client.get(reverse("api:article-detail", kwargs={"pk": 1}))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
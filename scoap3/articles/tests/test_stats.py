@@ -0,0 +1,106 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django_opensearch_dsl.search import Search
+from freezegun import freeze_time
+from opensearchpy.helpers.response import Response
+from rest_framework import status
+
+from scoap3.articles.stats import (
+    ARTICLE_STATS_KEY,
+    compute_article_stats,
+    get_article_stats,
+)
+
+STATS = {"other": {"all": 1}, "journals": {"Journal A": 1}}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def execute(search):
+    return Response(
+        search,
+        {
+            "hits": {"total": {"value": 4, "relation": "eq"}, "hits": []},
+            "aggregations": {
+                "yesterday": {"doc_count": 1},
+                "last_30_days": {"doc_count": 3},
+                "this_year": {"doc_count": 4},
+                "journals": {
+                    "buckets": [
+                        {"key": "Journal A", "doc_count": 2},
+                        {"key": "Journal B", "doc_count": 2},
+                    ]
+                },
+                "countries": {"buckets": [{"key": "CH", "doc_count": 4}]},
+                "publishers": {"buckets": [{"key": "Springer", "doc_count": 4}]},
+            },
+        },
+    )
+
+
+@freeze_time("2022-03-16")
+def test_compute_article_stats(settings):
+    settings.ARTICLE_STATS_BREAKDOWNS = ["countries"]
+
+    with patch.object(
+        Search, "execute", autospec=True, side_effect=execute
+    ) as mock_execute:
+        data = compute_article_stats()
+
+    assert mock_execute.call_count == 1
+    aggs = mock_execute.call_args.args[0].to_dict()["aggs"]
+    assert aggs["yesterday"] == {
+        "filter": {
+            "range": {"publication_date": {"gte": "2022-03-15", "lte": "2022-03-15"}}
+        }
+    }
+    assert "publishers" not in aggs
+    assert data == {
+        "other": {"yesterday": 1, "last_30_days": 3, "this_year": 4, "all": 4},
+        "journals": {"Journal A": 2, "Journal B": 2},
+        "countries": {"CH": 4},
+    }
+
+
+def test_get_article_stats_computes_once():
+    with patch(
+        "scoap3.articles.stats.compute_article_stats", return_value=STATS
+    ) as mock_compute:
+        assert get_article_stats() == STATS
+        assert get_article_stats() == STATS
+
+    assert mock_compute.call_count == 1
+
+
+def test_get_article_stats_revalidates_stale(settings):
+    cache.set(
+        ARTICLE_STATS_KEY,
+        {
+            "data": STATS,
+            "computed_at": time.time() - settings.ARTICLE_STATS_MAX_AGE - 1,
+        },
+    )
+
+    with patch("scoap3.articles.tasks.update_article_stats.delay") as mock_delay:
+        assert get_article_stats() == STATS
+        assert get_article_stats() == STATS
+
+    assert mock_delay.call_count == 1
+
+
+@pytest.mark.django_db
+def test_article_stats_view(client):
+    with patch("scoap3.articles.stats.compute_article_stats", return_value=STATS):
+        response = client.get(reverse("api:article-stats-list"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == STATS
@@ -1,9 +1,22 @@
-import re
+import atexit
+import logging
+import multiprocessing
+import posixpath
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
 
 import fitz
+from botocore.exceptions import ClientError
+from celery.signals import worker_process_shutdown
+from django.conf import settings
 
-from scoap3.articles.models import ArticleIdentifierType
+from scoap3.articles.models import ArticleFileText, ArticleIdentifierType
+from scoap3.articles.pdf import KNOWN_PHRASES, extract_text, normalize_text
+
+logger = logging.getLogger(__name__)
 
 
 def get_first_doi(article_document):
@@ -30,29 +43,146 @@ def parse_string_to_date_object(date_string):
     return datetime.fromisoformat(date_string.replace("Z", "+00:00"))
 
 
-def is_string_in_pdf(article_file, search_string):
+def get_file_fingerprint(field_file):
+    """Identify the stored content of ``field_file`` without downloading it."""
+    storage = field_file.storage
+    name = field_file.name
+    if hasattr(storage, "bucket"):
+        key = posixpath.join(storage.location, name)
+        etag = storage.bucket.Object(key).e_tag.strip('"')
+        return f"{name}:{etag}"
+    modified_time = storage.get_modified_time(name).timestamp()
+    return f"{name}:{storage.size(name)}:{modified_time}"
+
+
+@lru_cache(maxsize=None)
+def _get_extraction_pool():
+    # spawned workers only import scoap3.articles.pdf, which needs no Django
+    return ProcessPoolExecutor(
+        max_workers=settings.PDF_EXTRACTION_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# prefork pool processes leave with os._exit, which skips atexit handlers
+@worker_process_shutdown.connect
+def shutdown_extraction_pool(**kwargs):
+    if _get_extraction_pool.cache_info().currsize:
+        _get_extraction_pool().shutdown(wait=False, cancel_futures=True)
+        _get_extraction_pool.cache_clear()
+
+
+atexit.register(shutdown_extraction_pool)
+
+
+def _extract_text(path, filetype, phrases):
+    args = (path, filetype, phrases, settings.PDF_SCAN_MAX_PAGES)
+    # daemonic processes, like the Celery prefork pool ones, can't have children
+    if (
+        not settings.PDF_EXTRACTION_PROCESSES
+        or multiprocessing.current_process().daemon
+    ):
+        return extract_text(*args)
     try:
-        with article_file.file.open(mode="rb") as f:
-            data = f.read()
-
-        filetype = "pdf" if article_file.file.name.lower().endswith(".pdf") else "txt"
-        doc = fitz.open(stream=data, filetype=filetype)
-
-        for page in doc:
-            hits = page.search_for(search_string)
-            if hits:
-                doc.close()
-                return True
-
-        full_text = ""
-        for page in doc:
-            full_text += page.get_text()
-        search_string_normalized = re.sub(r"\s+", "", search_string.lower())
-        full_text_normalized = re.sub(r"\s+", "", full_text.lower())
-        doc.close()
-        return search_string_normalized in full_text_normalized
+        return _get_extraction_pool().submit(extract_text, *args).result()
+    except BrokenProcessPool:
+        shutdown_extraction_pool()
+        raise
+
+
+def _download(field_file, local_file, max_bytes):
+    """Copy at most ``max_bytes`` of ``field_file``, return whether all of it."""
+    size = 0
+    with field_file.open(mode="rb") as f:
+        for chunk in f.chunks():
+            if max_bytes and size + len(chunk) > max_bytes:
+                local_file.write(chunk[: max_bytes - size])
+                return False
+            local_file.write(chunk)
+            size += len(chunk)
+    return True
+
+
+def get_article_file_text(article_file, phrases=()):
+    """Return the ``ArticleFileText`` of ``article_file`` answering ``phrases``.
+
+    The file is only downloaded and scanned when its stored content changed
+    since the text was last extracted, or when the cached text is incomplete
+    and was not scanned for one of ``phrases`` yet. Scans stop early once the
+    known phrases and ``phrases`` were found.
+    """
+    fingerprint = get_file_fingerprint(article_file.file)
+    phrases = [*KNOWN_PHRASES, *phrases]
+    cached = ArticleFileText.objects.filter(
+        article_file=article_file, fingerprint=fingerprint
+    ).first()
+    if cached:
+        if cached.complete or all(
+            normalize_text(phrase) in cached.phrases for phrase in phrases
+        ):
+            return cached
+        phrases.extend(cached.phrases)
+
+    filetype = "pdf" if article_file.file.name.lower().endswith(".pdf") else "txt"
+    with tempfile.NamedTemporaryFile(suffix=f".{filetype}") as local_file:
+        downloaded = _download(
+            article_file.file, local_file, settings.PDF_SCAN_MAX_BYTES
+        )
+        local_file.flush()
+        try:
+            text, positions, complete = _extract_text(
+                local_file.name, filetype, phrases
+            )
+        except fitz.FileDataError:
+            if downloaded:
+                raise
+            # the cross-reference table of a PDF is at its end, so truncated
+            # files often cannot be opened
+            logger.warning(
+                "Could not open the first %s bytes of %s, downloading all of it.",
+                settings.PDF_SCAN_MAX_BYTES,
+                article_file.file.name,
+            )
+            local_file.seek(0)
+            local_file.truncate()
+            downloaded = _download(article_file.file, local_file, None)
+            local_file.flush()
+            text, positions, complete = _extract_text(
+                local_file.name, filetype, phrases
+            )
+        else:
+            if not downloaded:
+                logger.warning(
+                    "Scanned the first %s bytes of %s only.",
+                    settings.PDF_SCAN_MAX_BYTES,
+                    article_file.file.name,
+                )
+
+    file_text, _ = ArticleFileText.objects.update_or_create(
+        article_file=article_file,
+        defaults={
+            "fingerprint": fingerprint,
+            "text": text,
+            "phrases": positions,
+            "complete": complete and downloaded,
+        },
+    )
+    return file_text
 
+
+def is_string_in_pdf(article_file, search_string):
+    try:
+        file_text = get_article_file_text(article_file, [search_string])
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {article_file}")
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            raise FileNotFoundError(f"File not found: {article_file}")
+        raise Exception(f"An error occurred while reading the PDF: {str(e)}")
     except Exception as e:
         raise Exception(f"An error occurred while reading the PDF: {str(e)}")
+
+    search_string_normalized = normalize_text(search_string)
+    if search_string_normalized in file_text.phrases:
+        return file_text.phrases[search_string_normalized] is not None
+    return search_string_normalized in file_text.text
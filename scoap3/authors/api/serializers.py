@@ -4,6 +4,14 @@ from scoap3.authors.models import Author, AuthorIdentifier, AuthorIdentifierType
 from scoap3.misc.api.serializers import AffiliationSerializer
 
 
+def get_orcid(author):
+    # reads prefetched identifiers
+    for identifier in author.identifiers.all():
+        if identifier.identifier_type == AuthorIdentifierType.ORCID:
+            return identifier.identifier_value
+    return None
+
+
 class AuthorIdentifierSerializer(serializers.ModelSerializer):
     class Meta:
         model = AuthorIdentifier
@@ -19,14 +27,7 @@ class AuthorSerializer(serializers.ModelSerializer):
         exclude = ["id", "author_order"]
 
     def get_orcid(self, obj):
-        if obj.identifiers.filter(identifier_type=AuthorIdentifierType.ORCID).exists():
-            return (
-                obj.identifiers.filter(identifier_type=AuthorIdentifierType.ORCID)
-                .values_list("identifier_value", flat=True)
-                .first()
-            )
-        else:
-            return None
+        return get_orcid(obj)
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
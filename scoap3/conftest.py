@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import pytest
 from django.core.management import call_command
 
@@ -14,6 +16,16 @@ def rebuild_opensearch_index():
     call_command("opensearch", "index", "delete", "--force")
 
 
+@pytest.fixture(autouse=True)
+def mock_article_indexing():
+    # articles saved in tests are indexed explicitly when a test needs them
+    with patch(
+        "scoap3.articles.indexing.index_articles",
+        return_value={"indexed": 0, "errors": []},
+    ) as mock_index_articles:
+        yield mock_index_articles
+
+
 @pytest.fixture(autouse=True)
 def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
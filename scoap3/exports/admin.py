@@ -0,0 +1,45 @@
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+
+from scoap3.exports.models import ExportJob, ExportJobStatus
+
+
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "export_type",
+        "params",
+        "status",
+        "rows",
+        "duration",
+        "requested_by",
+        "created_at",
+        "download",
+    ]
+    list_filter = ["export_type", "status"]
+    readonly_fields = [
+        "export_type",
+        "params",
+        "status",
+        "rows",
+        "output",
+        "error",
+        "requested_by",
+        "created_at",
+        "started_at",
+        "finished_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="File")
+    def download(self, obj):
+        if obj.status != ExportJobStatus.SUCCESS:
+            return "-"
+        url = reverse("admin_export_download", args=[obj.pk])
+        return format_html('<a href="{}">Download</a>', url)
+
+
+admin.site.register(ExportJob, ExportJobAdmin)
@@ -1,7 +1,8 @@
 from django import forms
 from django_select2.forms import ModelSelect2Widget
 
-from scoap3.misc.models import Country
+from scoap3.exports.models import ExportFormat
+from scoap3.misc.models import Country, Publisher
 
 
 class CountryWidget(ModelSelect2Widget):
@@ -20,6 +21,9 @@ class AffiliationExportForm(forms.Form):
         label="Country",
         required=True,
     )
+    aff_format = forms.ChoiceField(
+        choices=ExportFormat.choices, initial=ExportFormat.CSV, label="Format"
+    )
 
 
 class AuthorExportForm(forms.Form):
@@ -30,3 +34,20 @@ class AuthorExportForm(forms.Form):
         label="Country",
         required=True,
     )
+    author_format = forms.ChoiceField(
+        choices=ExportFormat.choices, initial=ExportFormat.CSV, label="Format"
+    )
+
+
+class YearExportForm(forms.Form):
+    year_start = forms.DateField(label="From", required=False)
+    year_end = forms.DateField(label="To", required=False)
+    year_publisher = forms.ModelChoiceField(
+        queryset=Publisher.objects.all(),
+        to_field_name="name",
+        label="Publisher",
+        required=False,
+    )
+    year_format = forms.ChoiceField(
+        choices=ExportFormat.choices, initial=ExportFormat.CSV, label="Format"
+    )
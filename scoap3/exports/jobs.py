@@ -0,0 +1,119 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from scoap3.exports.models import (
+    ACTIVE_EXPORT_JOB_STATUSES,
+    ExportFormat,
+    ExportJob,
+    ExportJobStatus,
+    ExportType,
+)
+from scoap3.utils.tools import (
+    AFFILIATION_EXPORT_HEADER,
+    AFFILIATION_EXPORT_TYPES,
+    AUTHOR_EXPORT_HEADER,
+    AUTHOR_EXPORT_TYPES,
+    YEAR_EXPORT_HEADER,
+    YEAR_EXPORT_TYPES,
+    iter_affiliation_export,
+    iter_author_export,
+    iter_year_export,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORTS = {
+    ExportType.AFFILIATION: (
+        AFFILIATION_EXPORT_HEADER,
+        AFFILIATION_EXPORT_TYPES,
+        iter_affiliation_export,
+    ),
+    ExportType.AUTHOR: (AUTHOR_EXPORT_HEADER, AUTHOR_EXPORT_TYPES, iter_author_export),
+    ExportType.YEAR: (YEAR_EXPORT_HEADER, YEAR_EXPORT_TYPES, iter_year_export),
+}
+
+
+def get_params_hash(export_type, params, export_format=ExportFormat.CSV):
+    payload = json.dumps(
+        {"export_type": export_type, "params": params, "format": export_format},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _expire_stale_jobs():
+    # jobs whose worker died would otherwise block identical requests forever
+    timeout = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+    ExportJob.objects.filter(
+        status__in=ACTIVE_EXPORT_JOB_STATUSES, created_at__lt=timeout
+    ).update(
+        status=ExportJobStatus.FAILED,
+        error="Timed out",
+        finished_at=timezone.now(),
+    )
+
+
+def _get_reusable_job(params_hash):
+    job = ExportJob.objects.filter(
+        params_hash=params_hash, status__in=ACTIVE_EXPORT_JOB_STATUSES
+    ).first()
+    if job:
+        return job
+
+    fresh_after = timezone.now() - timedelta(seconds=settings.EXPORT_ARTIFACT_MAX_AGE)
+    job = (
+        ExportJob.objects.filter(
+            params_hash=params_hash,
+            status=ExportJobStatus.SUCCESS,
+            finished_at__gte=fresh_after,
+        )
+        .order_by("-finished_at")
+        .first()
+    )
+    if job and default_storage.exists(job.output):
+        return job
+
+
+def request_export(
+    export_type, params, export_format=ExportFormat.CSV, requested_by=None
+):
+    """Return the job producing the export, scheduling a new one if needed.
+
+    A running or pending job with the same parameters, or a successful one
+    finished less than ``EXPORT_ARTIFACT_MAX_AGE`` seconds ago, is returned
+    instead of starting another export.
+    """
+    from scoap3.exports.tasks import run_export_job
+
+    params_hash = get_params_hash(export_type, params, export_format)
+    _expire_stale_jobs()
+    while True:
+        job = _get_reusable_job(params_hash)
+        if job:
+            return job
+        try:
+            with transaction.atomic():
+                job = ExportJob.objects.create(
+                    export_type=export_type,
+                    params=params,
+                    export_format=export_format,
+                    params_hash=params_hash,
+                    requested_by=requested_by,
+                )
+            break
+        except IntegrityError:
+            # an identical job was created concurrently, look it up again as
+            # it may have finished in the meantime
+            continue
+
+    transaction.on_commit(lambda: run_export_job.delay(job.pk))
+    return job
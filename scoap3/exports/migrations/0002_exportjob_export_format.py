@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("exports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportjob",
+            name="export_format",
+            field=models.CharField(
+                choices=[("csv", "CSV"), ("parquet", "Parquet")],
+                default="csv",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import models
+
+
+class ExportType(models.TextChoices):
+    AFFILIATION = ("affiliation",)
+    AUTHOR = ("author",)
+    YEAR = ("year",)
+
+
+class ExportFormat(models.TextChoices):
+    CSV = ("csv", "CSV")
+    PARQUET = ("parquet", "Parquet")
+
+
+class ExportJobStatus(models.TextChoices):
+    PENDING = ("pending",)
+    RUNNING = ("running",)
+    SUCCESS = ("success",)
+    FAILED = ("failed",)
+
+
+ACTIVE_EXPORT_JOB_STATUSES = [ExportJobStatus.PENDING, ExportJobStatus.RUNNING]
+
+
+class ExportJob(models.Model):
+    export_type = models.CharField(max_length=20, choices=ExportType.choices)
+    params = models.JSONField(default=dict)
+    export_format = models.CharField(
+        max_length=20, choices=ExportFormat.choices, default=ExportFormat.CSV
+    )
+    params_hash = models.CharField(max_length=64, db_index=True, editable=False)
+    status = models.CharField(
+        max_length=20,
+        choices=ExportJobStatus.choices,
+        default=ExportJobStatus.PENDING,
+        db_index=True,
+    )
+    rows = models.PositiveIntegerField(default=0)
+    output = models.CharField(max_length=255, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            # identical exports requested concurrently share one job
+            models.UniqueConstraint(
+                fields=["params_hash"],
+                condition=models.Q(status__in=ACTIVE_EXPORT_JOB_STATUSES),
+                name="unique_active_export_job",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_export_type_display()} export #{self.pk} ({self.status})"
+
+    @property
+    def duration(self):
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
@@ -0,0 +1,55 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from scoap3.exports.jobs import EXPORTS
+from scoap3.exports.models import ExportJob, ExportJobStatus
+from scoap3.utils.tools import save_export
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(acks_late=True)
+def run_export_job(job_id):
+    # the job may have been picked up already, e.g. when redelivered
+    started = ExportJob.objects.filter(
+        pk=job_id, status=ExportJobStatus.PENDING
+    ).update(status=ExportJobStatus.RUNNING, started_at=timezone.now())
+    if not started:
+        logger.info("Export job %s is not pending, skipping.", job_id)
+        return
+
+    job = ExportJob.objects.get(pk=job_id)
+    header, types, iter_rows = EXPORTS[job.export_type]
+
+    def progress(rows):
+        ExportJob.objects.filter(pk=job_id).update(rows=rows)
+
+    try:
+        output, rows = save_export(
+            f"exports/{job.export_type}_export_{job.pk}.{job.export_format}",
+            header,
+            iter_rows(**job.params),
+            export_format=job.export_format,
+            types=types,
+            progress=progress,
+            progress_every=settings.EXPORT_JOB_PROGRESS_EVERY,
+        )
+    except Exception as ex:
+        logger.exception("Export job %s failed.", job_id)
+        ExportJob.objects.filter(pk=job_id).update(
+            status=ExportJobStatus.FAILED,
+            error=str(ex),
+            finished_at=timezone.now(),
+        )
+        return
+
+    ExportJob.objects.filter(pk=job_id).update(
+        status=ExportJobStatus.SUCCESS,
+        rows=rows,
+        output=output,
+        finished_at=timezone.now(),
+    )
+    return output
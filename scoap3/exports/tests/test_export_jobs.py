@@ -0,0 +1,228 @@
+import csv
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+from django.urls import reverse
+from django.utils import timezone
+from pyarrow import parquet
+
+from scoap3.exports.jobs import get_params_hash, request_export
+from scoap3.exports.models import ExportFormat, ExportJob, ExportJobStatus, ExportType
+from scoap3.exports.tasks import run_export_job
+from scoap3.misc.models import Country, Publisher
+from scoap3.tasks import year_data_export
+
+pytestmark = pytest.mark.django_db
+
+PARAMS = {"search_year": 2024, "search_country": "CH"}
+
+
+def _rows(**params):
+    yield [params["search_year"], "JHEP", "10.1/a"]
+    yield [params["search_year"], "PLB", "10.1/b"]
+
+
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_identical_requests_share_a_job(mock_delay, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        job = request_export(ExportType.AUTHOR, PARAMS)
+        same_job = request_export(ExportType.AUTHOR, dict(reversed(PARAMS.items())))
+        other_job = request_export(ExportType.AFFILIATION, PARAMS)
+
+    assert same_job == job
+    assert other_job != job
+    assert [call.args for call in mock_delay.call_args_list] == [
+        (job.pk,),
+        (other_job.pk,),
+    ]
+
+
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_fresh_artifact_is_reused(mock_delay, settings):
+    output = default_storage.save("exports/author_export.csv", open(__file__, "rb"))
+    job = ExportJob.objects.create(
+        export_type=ExportType.AUTHOR,
+        params=PARAMS,
+        params_hash=get_params_hash(ExportType.AUTHOR, PARAMS),
+        status=ExportJobStatus.SUCCESS,
+        output=output,
+        finished_at=timezone.now(),
+    )
+
+    assert request_export(ExportType.AUTHOR, PARAMS) == job
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        finished_at=timezone.now()
+        - timedelta(seconds=settings.EXPORT_ARTIFACT_MAX_AGE + 1)
+    )
+    assert request_export(ExportType.AUTHOR, PARAMS) != job
+
+
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_stale_job_does_not_block_requests(mock_delay, settings):
+    job = request_export(ExportType.AUTHOR, PARAMS)
+    ExportJob.objects.filter(pk=job.pk).update(
+        created_at=timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT + 1)
+    )
+
+    assert request_export(ExportType.AUTHOR, PARAMS) != job
+    job.refresh_from_db()
+    assert job.status == ExportJobStatus.FAILED
+
+
+@patch.dict(
+    "scoap3.exports.tasks.EXPORTS", {ExportType.AUTHOR: (["year"], ["int32"], _rows)}
+)
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_run_export_job(mock_delay, settings):
+    settings.EXPORT_JOB_PROGRESS_EVERY = 1
+    job = request_export(ExportType.AUTHOR, PARAMS)
+
+    run_export_job(job.pk)
+    run_export_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == ExportJobStatus.SUCCESS
+    assert job.rows == 2
+    assert job.duration is not None
+    with default_storage.open(job.output, "r") as file:
+        assert list(csv.reader(file)) == [
+            ["year"],
+            ["2024", "JHEP", "10.1/a"],
+            ["2024", "PLB", "10.1/b"],
+        ]
+
+
+@patch.dict(
+    "scoap3.exports.tasks.EXPORTS",
+    {
+        ExportType.AUTHOR: (
+            ["year", "journal", "doi"],
+            ["int32", "string", "string"],
+            _rows,
+        )
+    },
+)
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_run_parquet_export_job(mock_delay):
+    csv_job = request_export(ExportType.AUTHOR, PARAMS)
+    job = request_export(ExportType.AUTHOR, PARAMS, export_format=ExportFormat.PARQUET)
+    assert job != csv_job
+
+    run_export_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == ExportJobStatus.SUCCESS
+    assert job.output.endswith(".parquet")
+    with default_storage.open(job.output, "rb") as file:
+        assert parquet.read_table(file).to_pylist() == [
+            {"year": 2024, "journal": "JHEP", "doi": "10.1/a"},
+            {"year": 2024, "journal": "PLB", "doi": "10.1/b"},
+        ]
+
+
+@patch.dict(
+    "scoap3.exports.tasks.EXPORTS", {ExportType.YEAR: (["year"], ["int32"], None)}
+)
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_failed_export_job(mock_delay):
+    job = request_export(ExportType.YEAR, {})
+
+    run_export_job(job.pk)
+
+    job.refresh_from_db()
+    assert job.status == ExportJobStatus.FAILED
+    assert job.error
+    assert not job.output
+
+
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_export_view_queues_job(mock_delay, admin_client):
+    Country.objects.create(code="CH", name="Switzerland")
+
+    response = admin_client.post(
+        reverse("admin_tools"),
+        {
+            "author_year": 2024,
+            "author_country": "CH",
+            "author_format": "csv",
+            "author_export": "Export",
+        },
+    )
+
+    assert response.status_code == 302
+    job = ExportJob.objects.get()
+    assert job.export_type == ExportType.AUTHOR
+    assert job.params == PARAMS
+    assert job.status == ExportJobStatus.PENDING
+
+    response = admin_client.get(reverse("admin_tools"))
+    assert response.status_code == 200
+    assert list(response.context["export_jobs"]) == [job]
+    assert response.context["export_jobs_active"]
+
+
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_request_export_retries_after_conflict(mock_delay):
+    create = ExportJob.objects.create
+    conflicts = [IntegrityError()]
+
+    def create_once_conflicting(**kwargs):
+        # the conflicting job finished before it could be looked up
+        if conflicts:
+            raise conflicts.pop()
+        return create(**kwargs)
+
+    with patch.object(ExportJob.objects, "create", side_effect=create_once_conflicting):
+        job = request_export(ExportType.AUTHOR, PARAMS)
+
+    assert job.status == ExportJobStatus.PENDING
+    assert ExportJob.objects.get() == job
+
+
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_year_data_export_requests_job(mock_delay, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        job_id = year_data_export("2024-01-01", "2024-12-31", "Elsevier")
+        # tasks queued with the former signature still run
+        assert (
+            year_data_export("2024-01-01", "2024-12-31", "Elsevier", "export.csv")
+            == job_id
+        )
+
+    job = ExportJob.objects.get(pk=job_id)
+    assert job.export_type == ExportType.YEAR
+    assert job.params == {
+        "start_date": "2024-01-01",
+        "end_date": "2024-12-31",
+        "publisher_name": "Elsevier",
+    }
+    mock_delay.assert_called_once_with(job.pk)
+
+
+@patch("scoap3.exports.tasks.run_export_job.delay")
+def test_export_view_queues_year_job(mock_delay, admin_client):
+    Publisher.objects.create(name="Elsevier")
+
+    response = admin_client.post(
+        reverse("admin_tools"),
+        {
+            "year_start": "2024-01-01",
+            "year_publisher": "Elsevier",
+            "year_format": "parquet",
+            "year_export": "Export",
+        },
+    )
+
+    assert response.status_code == 302
+    job = ExportJob.objects.get()
+    assert job.export_type == ExportType.YEAR
+    assert job.export_format == ExportFormat.PARQUET
+    assert job.params == {
+        "start_date": "2024-01-01",
+        "end_date": None,
+        "publisher_name": "Elsevier",
+    }
@@ -1,31 +1,22 @@
-import csv
-from datetime import datetime
-
 from django.contrib import messages
 
 # from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.http import HttpResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
 from django.views.generic.edit import FormView
 
-from scoap3.exports.forms import AffiliationExportForm, AuthorExportForm
-from scoap3.utils.tools import affiliation_export, author_export
-
-
-def generate_csv_response(data, action_name, write_header=True):
-    response = HttpResponse(
-        content_type="text/csv",
-        headers={
-            "Content-Disposition": f'attachment; filename="scoap3_{action_name}_{datetime.now()}.csv"'  # noqa
-        },
-    )
-
-    writer = csv.writer(response)
-    if write_header:
-        writer.writerow(data.get("header"))
-    for row in data.get("data", []):
-        writer.writerow(row)
+from scoap3.exports.forms import AffiliationExportForm, AuthorExportForm, YearExportForm
+from scoap3.exports.jobs import request_export
+from scoap3.exports.models import (
+    ACTIVE_EXPORT_JOB_STATUSES,
+    ExportFormat,
+    ExportJob,
+    ExportJobStatus,
+    ExportType,
+)
 
-    return response
+EXPORT_JOBS_LISTED = 10
 
 
 class ExportView(FormView):
@@ -33,40 +24,81 @@ class ExportView(FormView):
     template_name = "admin/tools.html"
     form_class = AffiliationExportForm
     second_form_class = AuthorExportForm
+    third_form_class = YearExportForm
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if "form2" not in context:
             context["form2"] = self.second_form_class()
+        if "form3" not in context:
+            context["form3"] = self.third_form_class()
+        context["export_jobs"] = ExportJob.objects.select_related("requested_by")[
+            :EXPORT_JOBS_LISTED
+        ]
+        context["export_jobs_active"] = any(
+            job.status in ACTIVE_EXPORT_JOB_STATUSES for job in context["export_jobs"]
+        )
         return context
 
     def post(self, request, *args, **kwargs):
         form = self.get_form()
         form2 = self.second_form_class(request.POST)
-        if form.is_valid() or form2.is_valid():
-            return self.form_valid(form, form2)
+        form3 = self.third_form_class(request.POST)
+        if form.is_valid() or form2.is_valid() or form3.is_valid():
+            return self.form_valid(form, form2, form3)
         else:
-            return self.form_invalid(form, form2)
+            return self.form_invalid(form, form2, form3)
+
+    def form_valid(self, form, form2, form3):
+        if "affiliation_export" in self.request.POST:
+            export_type = ExportType.AFFILIATION
+            year = form.cleaned_data.get("aff_year")
+            country = form.cleaned_data.get("aff_country").code
+            params = {"search_year": year or None, "search_country": country or None}
+            export_format = form.cleaned_data.get("aff_format")
+        if "author_export" in self.request.POST:
+            export_type = ExportType.AUTHOR
+            year = form2.cleaned_data.get("author_year")
+            country = form2.cleaned_data.get("author_country").code
+            params = {"search_year": year or None, "search_country": country or None}
+            export_format = form2.cleaned_data.get("author_format")
+        if "year_export" in self.request.POST:
+            export_type = ExportType.YEAR
+            start = form3.cleaned_data.get("year_start")
+            end = form3.cleaned_data.get("year_end")
+            publisher = form3.cleaned_data.get("year_publisher")
+            params = {
+                "start_date": start.isoformat() if start else None,
+                "end_date": end.isoformat() if end else None,
+                "publisher_name": publisher.name if publisher else None,
+            }
+            export_format = form3.cleaned_data.get("year_format")
 
-    def form_valid(self, form, form2):
-        try:
-            if "affiliation_export" in self.request.POST:
-                action_name = "affiliation_export"
-                year = form.cleaned_data.get("aff_year")
-                country = form.cleaned_data.get("aff_country").code
-                result = affiliation_export(year or None, country or None)
-            if "author_export" in self.request.POST:
-                action_name = "author_export"
-                year = form2.cleaned_data.get("author_year")
-                country = form2.cleaned_data.get("author_country").code
-                result = author_export(year or None, country or None)
+        job = request_export(
+            export_type,
+            params,
+            export_format=export_format or ExportFormat.CSV,
+            requested_by=self.request.user,
+        )
+        if job.status == ExportJobStatus.SUCCESS:
+            messages.info(self.request, f"{job} is ready for download.")
+        else:
+            messages.info(self.request, f"{job} has been queued.")
+        return HttpResponseRedirect(self.request.path)
 
-            response = generate_csv_response(result, action_name)
+    def form_invalid(self, form, form2, form3):
+        return self.render_to_response(
+            self.get_context_data(form=form, form2=form2, form3=form3)
+        )
 
-            return response
-        except Exception as ex:
-            messages.error(self.request, f"There was an error: {ex}")
-            return self.form_invalid(form, form2)
 
-    def form_invalid(self, form, form2):
-        return self.render_to_response(self.get_context_data(form=form, form2=form2))
+def export_job_download(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, status=ExportJobStatus.SUCCESS)
+    return FileResponse(
+        default_storage.open(job.output, "rb"),
+        as_attachment=True,
+        filename=(
+            f"scoap3_{job.export_type}_export_{job.finished_at:%Y-%m-%d_%H%M%S}"
+            f".{job.export_format}"
+        ),
+    )
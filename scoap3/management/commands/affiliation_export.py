@@ -1,10 +1,15 @@
-import csv
 import datetime
 
-from django.core.files.storage import storages
 from django.core.management.base import BaseCommand, CommandParser
 
-from scoap3.utils.tools import affiliation_export
+from scoap3.utils.tools import (
+    AFFILIATION_EXPORT_HEADER,
+    AFFILIATION_EXPORT_TYPES,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMATS,
+    iter_affiliation_export,
+    save_export,
+)
 
 
 class Command(BaseCommand):
@@ -25,13 +30,21 @@ class Command(BaseCommand):
             help="Year.",
         )
 
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default=EXPORT_FORMAT_CSV,
+            help="Output format.",
+        )
+
     def handle(self, *args, **options):
-        storage = storages["default"]
-        result = affiliation_export(options["year"], options["country"])
-
-        with storage.open(
-            f"scoap3_export_affiliations_{datetime.datetime.now()}.csv", "w"
-        ) as f:
-            writer = csv.writer(f)
-            writer.writerow(result["header"])
-            writer.writerows(result["data"])
+        rows = iter_affiliation_export(options["year"], options["country"])
+        export_format = options["format"]
+
+        save_export(
+            f"scoap3_export_affiliations_{datetime.datetime.now()}.{export_format}",
+            AFFILIATION_EXPORT_HEADER,
+            rows,
+            export_format=export_format,
+            types=AFFILIATION_EXPORT_TYPES,
+        )
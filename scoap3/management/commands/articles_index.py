@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand, CommandParser
 
+from scoap3.articles.indexing import rebuild_index
 from scoap3.articles.tasks import index_all_articles
 
 
@@ -12,7 +13,8 @@ class Command(BaseCommand):
             type=int,
             default=None,
             required=False,
-            help="Article id to start the indexing FROM.",
+            help="Article id to start the indexing FROM, updating the live index "
+            "instead of building a new version.",
         )
 
         parser.add_argument(
@@ -20,8 +22,57 @@ class Command(BaseCommand):
             type=int,
             default=1000,
             required=False,
-            help="Batchsize to migrate per task.",
+            help="Number of articles serialized per batch.",
+        )
+
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            required=False,
+            help="Number of documents sent per bulk request.",
+        )
+
+        parser.add_argument(
+            "--thread-count",
+            type=int,
+            default=None,
+            required=False,
+            help="Number of concurrent bulk requests.",
+        )
+
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            required=False,
+            help="Number of worker processes serializing articles.",
+        )
+
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=2,
+            required=False,
+            help="Number of index versions to keep after a rebuild.",
         )
 
     def handle(self, *args, **options):
-        index_all_articles(options["batch_size"])
+        kwargs = {
+            "batch_size": options["batch_size"],
+            "chunk_size": options["chunk_size"],
+            "thread_count": options["thread_count"],
+            "processes": options["processes"],
+        }
+        if options["from_id"] is None:
+            result = rebuild_index(keep=options["keep"], **kwargs)
+            self.stdout.write(f"Built index {result['index']}.")
+        else:
+            result = index_all_articles(from_id=options["from_id"], **kwargs)
+        self.stdout.write(f"Indexed {result['indexed']} articles.")
+        for error in result["errors"]:
+            self.stderr.write(str(error))
+        if result["errors"]:
+            self.stderr.write(
+                self.style.ERROR(f"Failed to index {len(result['errors'])} articles.")
+            )
@@ -1,11 +1,16 @@
-import csv
 import datetime
 import logging
 
-from django.core.files.storage import storages
 from django.core.management.base import BaseCommand, CommandParser
 
-from scoap3.utils.tools import author_export
+from scoap3.utils.tools import (
+    AUTHOR_EXPORT_HEADER,
+    AUTHOR_EXPORT_TYPES,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMATS,
+    iter_author_export,
+    save_export,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,13 +33,21 @@ class Command(BaseCommand):
             help="Year.",
         )
 
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default=EXPORT_FORMAT_CSV,
+            help="Output format.",
+        )
+
     def handle(self, *args, **options):
-        storage = storages["default"]
-        result = author_export(options["year"], options["country"])
-
-        with storage.open(
-            f"scoap3_export_authors_{datetime.datetime.now()}.csv", "w"
-        ) as f:
-            writer = csv.writer(f)
-            writer.writerow(result["header"])
-            writer.writerows(result["data"])
+        rows = iter_author_export(options["year"], options["country"])
+        export_format = options["format"]
+
+        save_export(
+            f"scoap3_export_authors_{datetime.datetime.now()}.{export_format}",
+            AUTHOR_EXPORT_HEADER,
+            rows,
+            export_format=export_format,
+            types=AUTHOR_EXPORT_TYPES,
+        )
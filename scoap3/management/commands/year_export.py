@@ -1,11 +1,16 @@
-import csv
 import datetime
 import logging
 
-from django.core.files.storage import storages
 from django.core.management.base import BaseCommand, CommandParser
 
-from scoap3.utils.tools import year_export
+from scoap3.utils.tools import (
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMATS,
+    YEAR_EXPORT_HEADER,
+    YEAR_EXPORT_TYPES,
+    iter_year_export,
+    save_export,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,13 +40,21 @@ class Command(BaseCommand):
             help="Publisher Name",
         )
 
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default=EXPORT_FORMAT_CSV,
+            help="Output format.",
+        )
+
     def handle(self, *args, **options):
-        storage = storages["default"]
-        result = year_export(options["start"], options["end"], options["publisher"])
-
-        with storage.open(
-            f"scoap3_export_years_{datetime.datetime.now()}.csv", "w"
-        ) as f:
-            writer = csv.writer(f)
-            writer.writerow(result["header"])
-            writer.writerows(result["data"])
+        rows = iter_year_export(options["start"], options["end"], options["pub"])
+        export_format = options["format"]
+
+        save_export(
+            f"scoap3_export_years_{datetime.datetime.now()}.{export_format}",
+            YEAR_EXPORT_HEADER,
+            rows,
+            export_format=export_format,
+            types=YEAR_EXPORT_TYPES,
+        )
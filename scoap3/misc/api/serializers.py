@@ -16,6 +16,14 @@ from scoap3.misc.models import (
 )
 
 
+def get_ror(affiliation):
+    # reads prefetched institution identifiers
+    for identifier in affiliation.institutionidentifier_set.all():
+        if identifier.identifier_type == InstitutionIdentifierType.ROR:
+            return identifier.identifier_value
+    return None
+
+
 class CountrySerializer(serializers.ModelSerializer):
     class Meta:
         model = Country
@@ -35,18 +43,7 @@ class AffiliationSerializer(serializers.ModelSerializer):
         ]
 
     def get_ror(self, obj):
-        if obj.institutionidentifier_set.filter(
-            identifier_type=InstitutionIdentifierType.ROR
-        ).exists():
-            return (
-                obj.institutionidentifier_set.filter(
-                    identifier_type=InstitutionIdentifierType.ROR
-                )
-                .values_list("identifier_value", flat=True)
-                .first()
-            )
-        else:
-            return None
+        return get_ror(obj)
 
 
 class InstitutionIdentifierSerializer(serializers.ModelSerializer):
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MiscConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "scoap3.misc"
+
+    def ready(self):
+        import scoap3.misc.signals  # noqa: F401
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+class LookupCache:
+    """Bounded, per-process LRU mapping for small lookup tables.
+
+    Values are only stored once the surrounding transaction commits, so a
+    rolled back import never leaves ids of rows that do not exist behind.
+
+    Caches with a ``name`` share a generation counter through the Django
+    cache: ``clear`` bumps it, and the caches of every other process drop
+    their entries on their next ``refresh``, called once per import task.
+    """
+
+    def __init__(self, maxsize=1024, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+
+    @property
+    def _generation_key(self):
+        return f"misc:lookup-cache:{self.name}"
+
+    def refresh(self):
+        """Drop the entries if the cache was cleared in another process."""
+        if self.name is None:
+            return
+        generation = cache.get(self._generation_key)
+        if generation is None:
+            cache.add(self._generation_key, time.time_ns(), timeout=None)
+            generation = cache.get(self._generation_key)
+        with self._lock:
+            if generation != self._generation:
+                self._data.clear()
+                self._generation = generation
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def set_on_commit(self, key, value):
+        transaction.on_commit(partial(self.set, key, value))
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self.name is None:
+                return
+            try:
+                self._generation = cache.incr(self._generation_key)
+            except ValueError:
+                cache.add(self._generation_key, time.time_ns(), timeout=None)
+                self._generation = cache.get(self._generation_key)
+
+
+# raw affiliation country string -> Country
+country_cache = LookupCache(maxsize=4096, name="country")
+# publisher name -> Publisher id
+publisher_cache = LookupCache(maxsize=1024, name="publisher")
+# (url, name) -> License id
+license_cache = LookupCache(maxsize=1024, name="license")
+
+
+def clear_lookup_caches():
+    country_cache.clear()
+    publisher_cache.clear()
+    license_cache.clear()
+
+
+def refresh_lookup_caches():
+    country_cache.refresh()
+    publisher_cache.refresh()
+    license_cache.refresh()
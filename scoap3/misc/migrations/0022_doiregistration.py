@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("misc", "0021_publicationinfo_material"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DOIRegistration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("doi", models.CharField(max_length=255, unique=True)),
+                ("created_date", models.DateField(blank=True, null=True)),
+                ("published_date", models.DateField(blank=True, null=True)),
+                ("fetched_at", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -193,3 +193,18 @@ class RelatedMaterial(models.Model):
 
     class Meta:
         ordering = ["id"]
+
+
+class DOIRegistration(models.Model):
+    """Crossref dates of a DOI, cached for the compliance checks."""
+
+    doi = models.CharField(max_length=255, unique=True)
+    created_date = models.DateField(null=True, blank=True)
+    published_date = models.DateField(null=True, blank=True)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return self.doi
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from scoap3.misc.cache import country_cache, license_cache, publisher_cache
+from scoap3.misc.models import Country, License, Publisher
+
+LOOKUP_CACHES = {
+    Country: country_cache,
+    Publisher: publisher_cache,
+    License: license_cache,
+}
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=Publisher)
+@receiver(post_save, sender=License)
+def invalidate_lookup_cache_on_save(sender, created, **kwargs):
+    # New rows cannot make existing entries stale, edits and deletes can.
+    if not created:
+        LOOKUP_CACHES[sender].clear()
+
+
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=License)
+def invalidate_lookup_cache_on_delete(sender, **kwargs):
+    LOOKUP_CACHES[sender].clear()
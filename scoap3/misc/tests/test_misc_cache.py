@@ -0,0 +1,90 @@
+import pytest
+
+from scoap3.misc.cache import LookupCache, clear_lookup_caches, country_cache
+from scoap3.misc.models import Country, Publisher
+from scoap3.tasks import _create_country, _create_publisher
+
+
+@pytest.fixture(autouse=True)
+def empty_lookup_caches():
+    clear_lookup_caches()
+    yield
+    clear_lookup_caches()
+
+
+def test_lookup_cache_evicts_least_recently_used():
+    cache = LookupCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lookup_cache_invalidate():
+    cache = LookupCache()
+    cache.set("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+
+    assert cache.get("a") is None
+
+
+def test_lookup_cache_cleared_in_other_processes():
+    cache = LookupCache(name="test")
+    other_process_cache = LookupCache(name="test")
+    other_process_cache.refresh()
+    cache.set("a", 1)
+    other_process_cache.set("a", 1)
+    assert other_process_cache.get("a") == 1
+
+    cache.clear()
+    assert other_process_cache.get("a") == 1
+
+    other_process_cache.refresh()
+    assert other_process_cache.get("a") is None
+    other_process_cache.set("a", 2)
+    assert other_process_cache.get("a") == 2
+
+
+@pytest.mark.django_db
+def test_country_cached_after_commit(
+    django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    affiliation = {"country": "Spain"}
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        country = _create_country(affiliation)
+    assert "spain" not in country_cache
+
+    for callback in callbacks:
+        callback()
+    with django_assert_num_queries(0):
+        assert _create_country(affiliation) == country
+
+
+@pytest.mark.django_db
+def test_publisher_cache_used_for_known_names(
+    django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    data = {"imprints": [{"publisher": "Elsevier"}]}
+    with django_capture_on_commit_callbacks(execute=True):
+        publisher_ids = _create_publisher(data)
+
+    with django_assert_num_queries(0):
+        assert _create_publisher(data) == publisher_ids
+    assert Publisher.objects.get(name="Elsevier").id == publisher_ids[0]
+
+
+@pytest.mark.django_db
+def test_country_cache_invalidated_on_update(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        country = _create_country({"country": "Spain"})
+    assert "spain" in country_cache
+
+    Country.objects.get(pk=country.pk).save()
+
+    assert "spain" not in country_cache
@@ -1,9 +1,17 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
 import pytest
+import requests
 from django.test import TestCase
+from django.utils import timezone
 
+from scoap3.misc.models import DOIRegistration
 from scoap3.misc.utils import (
+    CROSSREF_WORKS_URL,
     fetch_doi_registration_date,
     fetch_doi_registration_date_aps,
+    get_doi_registrations,
 )
 
 
@@ -31,3 +39,115 @@ class TestFetchDoiRegistrationDateAPS(TestCase):
         self.assertEqual(
             fetch_doi_registration_date_aps("10.1103/923l-yxkc-invalid"), None
         )
+
+
+def _work(doi, created="2024-07-01T10:00:00Z", published=(2024, 7, 2)):
+    return {
+        "DOI": doi,
+        "created": {"date-time": created},
+        "published": {"date-parts": [list(published)]},
+    }
+
+
+def _response(message, status_code=200):
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = {"message": message}
+    if 400 <= status_code < 600 and status_code != 404:
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
+
+
+@pytest.mark.django_db
+@patch("scoap3.misc.utils.get_crossref_session")
+def test_get_doi_registrations_batches_and_caches(mock_session, settings):
+    settings.CROSSREF_BATCH_SIZE = 2
+    mock_get = mock_session.return_value.get
+    mock_get.side_effect = [
+        _response({"items": [_work("10.1/A"), _work("10.1/b")]}),
+        _response(_work("10.1/c", published=(2024, 7, 3))),
+    ]
+
+    registrations = get_doi_registrations(["10.1/A", "10.1/b", "10.1/c"])
+
+    assert mock_get.call_args_list[0].args == (CROSSREF_WORKS_URL,)
+    assert mock_get.call_args_list[0].kwargs["params"] == {
+        "filter": "doi:10.1/A,doi:10.1/b",
+        "rows": 2,
+    }
+    assert mock_get.call_args_list[1].args == (f"{CROSSREF_WORKS_URL}/10.1/c",)
+    assert registrations["10.1/a"].created_date == datetime.date(2024, 7, 1)
+    assert registrations["10.1/c"].published_date == datetime.date(2024, 7, 3)
+
+    mock_get.reset_mock()
+    assert fetch_doi_registration_date("10.1/a") == "2024-07-01"
+    assert fetch_doi_registration_date_aps("10.1/C") == "2024-07-03"
+    mock_get.assert_not_called()
+
+
+@pytest.mark.django_db
+@patch("scoap3.misc.utils.get_crossref_session")
+def test_get_doi_registrations_splits_rejected_batches(mock_session, settings):
+    settings.CROSSREF_BATCH_SIZE = 2
+    mock_get = mock_session.return_value.get
+    mock_get.side_effect = [
+        _response(None, status_code=400),
+        _response(_work("10.1/a")),
+        _response(None, status_code=400),
+    ]
+
+    registrations = get_doi_registrations(["10.1/a", "10.1/b<"])
+
+    assert mock_get.call_count == 3
+    assert mock_get.call_args_list[1].args == (f"{CROSSREF_WORKS_URL}/10.1/a",)
+    assert registrations["10.1/a"].created_date == datetime.date(2024, 7, 1)
+    assert registrations["10.1/b<"].created_date is None
+
+
+@patch("scoap3.misc.utils.CROSSREF_MAX_FILTER_LENGTH", 30)
+@pytest.mark.django_db
+@patch("scoap3.misc.utils.get_crossref_session")
+def test_get_doi_registrations_caps_filter_length(mock_session):
+    mock_get = mock_session.return_value.get
+    mock_get.side_effect = [
+        _response({"items": [_work("10.1/aaaa"), _work("10.1/bbbb")]}),
+        _response({"items": [_work("10.1/cccc"), _work("10.1/dddd")]}),
+    ]
+
+    get_doi_registrations(["10.1/aaaa", "10.1/bbbb", "10.1/cccc", "10.1/dddd"])
+
+    assert [call.kwargs["params"]["filter"] for call in mock_get.call_args_list] == [
+        "doi:10.1/aaaa,doi:10.1/bbbb",
+        "doi:10.1/cccc,doi:10.1/dddd",
+    ]
+
+
+@pytest.mark.django_db
+@patch("scoap3.misc.utils.get_crossref_session")
+def test_get_doi_registrations_negative_ttl(mock_session, settings):
+    mock_get = mock_session.return_value.get
+    mock_get.return_value = _response(None, status_code=404)
+
+    assert fetch_doi_registration_date("10.1/missing") is None
+    assert fetch_doi_registration_date("10.1/missing") is None
+    assert mock_get.call_count == 1
+
+    DOIRegistration.objects.update(
+        fetched_at=timezone.now()
+        - datetime.timedelta(seconds=settings.DOI_REGISTRATION_NEGATIVE_TTL + 1)
+    )
+    mock_get.return_value = _response(_work("10.1/missing"))
+
+    assert fetch_doi_registration_date("10.1/missing") == "2024-07-01"
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.django_db
+@patch("scoap3.misc.utils.get_crossref_session")
+def test_get_doi_registrations_does_not_cache_failures(mock_session):
+    mock_get = mock_session.return_value.get
+    mock_get.side_effect = requests.ConnectionError
+
+    with patch("time.sleep"):
+        assert get_doi_registrations(["10.1/a"]) == {}
+
+    assert not DOIRegistration.objects.exists()
@@ -1,31 +1,199 @@
 import logging
+from datetime import date, timedelta
+from functools import lru_cache
 
 import backoff
-from habanero import Crossref, RequestError
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from scoap3.misc.models import DOIRegistration
 
 logger = logging.getLogger(__name__)
 
+CROSSREF_WORKS_URL = "https://api.crossref.org/works"
+# longest doi filter sent in one query, longer URLs get rejected
+CROSSREF_MAX_FILTER_LENGTH = 4000
 
-@backoff.on_exception(backoff.expo, RequestError, max_tries=5)
-def fetch_doi_registration_date(doi):
-    cr = Crossref()
+
+@lru_cache(maxsize=None)
+def get_crossref_session():
+    """HTTP session shared by all Crossref requests of the process."""
+    session = requests.Session()
+    user_agent = "scoap3 (https://scoap3.org)"
+    if settings.CROSSREF_MAILTO:
+        user_agent += f" (mailto:{settings.CROSSREF_MAILTO})"
+    session.headers["User-Agent"] = user_agent
+    return session
+
+
+def _created_date(work):
     try:
-        response = cr.works(ids=doi)
-        registration_date = response["message"]["created"]["date-time"]
-        return registration_date.split("T")[0]
-    except Exception as e:
-        logger.error("Failed to fetch DOI registration date for %s: %s", doi, str(e))
+        return date.fromisoformat(work["created"]["date-time"].split("T")[0])
+    except (KeyError, IndexError, TypeError, ValueError):
         return None
 
 
-@backoff.on_exception(backoff.expo, RequestError, max_tries=5)
-def fetch_doi_registration_date_aps(doi):
-    cr = Crossref()
+def _published_date(work):
+    try:
+        year, month, day = work["published"]["date-parts"][0]
+        return date(year, month, day)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def _is_client_error(e):
+    # rate limited requests are retried
+    return (
+        e.response is not None
+        and 400 <= e.response.status_code < 500
+        and e.response.status_code != 429
+    )
+
+
+@backoff.on_exception(
+    backoff.expo, requests.RequestException, max_tries=5, giveup=_is_client_error
+)
+def _get_works(url, **params):
+    response = get_crossref_session().get(
+        url, params=params or None, timeout=settings.CROSSREF_TIMEOUT
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()["message"]
+
+
+def _fetch_works(dois):
+    """Fetch the Crossref works of ``dois``, keyed by lowercased DOI.
+
+    DOIs are resolved in batches of ``CROSSREF_BATCH_SIZE`` with a ``doi``
+    filter query of at most ``CROSSREF_MAX_FILTER_LENGTH`` characters. Works
+    missing from the response do not exist. A batch rejected by Crossref is
+    looked up one DOI at a time instead.
+    """
+    works = {}
+    # commas separate the values of a filter
+    single, batched = [], []
+    for doi in dois:
+        (single if "," in doi else batched).append(doi)
+
+    for batch in _iter_filter_batches(batched):
+        if len(batch) == 1:
+            single.extend(batch)
+            continue
+        try:
+            message = _get_works(
+                CROSSREF_WORKS_URL,
+                filter=",".join(f"doi:{doi}" for doi in batch),
+                rows=len(batch),
+            )
+        except requests.HTTPError as e:
+            if not _is_client_error(e):
+                raise
+            logger.warning("Crossref rejected the DOI batch %s: %s", batch, e)
+            single.extend(batch)
+            continue
+        for work in message["items"]:
+            works[work["DOI"].lower()] = work
+
+    for doi in single:
+        try:
+            work = _get_works(f"{CROSSREF_WORKS_URL}/{doi}")
+        except requests.HTTPError as e:
+            if not _is_client_error(e):
+                raise
+            logger.warning("Crossref rejected the DOI %s: %s", doi, e)
+            continue
+        if work:
+            works[doi.lower()] = work
+    return works
+
+
+def _iter_filter_batches(dois):
+    batch, length = [], 0
+    for doi in dois:
+        # "doi:" prefix and the comma separator
+        doi_length = len(doi) + 5
+        if batch and (
+            len(batch) >= settings.CROSSREF_BATCH_SIZE
+            or length + doi_length > CROSSREF_MAX_FILTER_LENGTH
+        ):
+            yield batch
+            batch, length = [], 0
+        batch.append(doi)
+        length += doi_length
+    if batch:
+        yield batch
+
+
+def get_doi_registrations(dois, refresh=False):
+    """Return the cached ``DOIRegistration`` of ``dois``, keyed by lowercased DOI.
+
+    DOIs which are not cached yet, and DOIs without a registration or
+    published date fetched more than ``DOI_REGISTRATION_NEGATIVE_TTL`` seconds
+    ago, are looked up in Crossref first. DOIs which could not be looked up
+    are left out.
+    """
+    # DOIs are case insensitive, lookups keep the case they were given in
+    dois = {doi.lower(): doi for doi in dois if doi}
+    registrations = {
+        registration.doi: registration
+        for registration in DOIRegistration.objects.filter(doi__in=dois)
+    }
+    expired = timezone.now() - timedelta(seconds=settings.DOI_REGISTRATION_NEGATIVE_TTL)
+    missing = sorted(
+        doi
+        for doi in dois
+        if refresh
+        or doi not in registrations
+        or (
+            registrations[doi].fetched_at < expired
+            and not (
+                registrations[doi].created_date and registrations[doi].published_date
+            )
+        )
+    )
+    if not missing:
+        return registrations
+
     try:
-        response = cr.works(ids=doi)
-        date_parts = response["message"]["published"]["date-parts"][0]
-        year, month, day = date_parts
-        return f"{year:04d}-{month:02d}-{day:02d}"
+        works = _fetch_works([dois[doi] for doi in missing])
     except Exception as e:
-        logger.error("Failed to fetch DOI registration date for %s: %s", doi, str(e))
+        logger.error("Failed to fetch DOI registration dates for %s: %s", missing, e)
+        return registrations
+
+    fetched = [
+        DOIRegistration(
+            doi=doi,
+            created_date=_created_date(works.get(doi, {})),
+            published_date=_published_date(works.get(doi, {})),
+            fetched_at=timezone.now(),
+        )
+        for doi in missing
+    ]
+    DOIRegistration.objects.bulk_create(
+        fetched,
+        update_conflicts=True,
+        unique_fields=["doi"],
+        update_fields=["created_date", "published_date", "fetched_at"],
+    )
+    registrations.update((registration.doi, registration) for registration in fetched)
+    return registrations
+
+
+def _fetch_date(doi, field):
+    registration = get_doi_registrations([doi]).get(doi.lower())
+    value = getattr(registration, field, None)
+    if value is None:
+        logger.error("Failed to fetch DOI registration date for %s", doi)
         return None
+    return value.isoformat()
+
+
+def fetch_doi_registration_date(doi):
+    return _fetch_date(doi, "created_date")
+
+
+def fetch_doi_registration_date_aps(doi):
+    return _fetch_date(doi, "published_date")
@@ -1,23 +1,41 @@
-import csv
+import hashlib
 import io
 import json
 import logging
 import os
 import re
+from collections import defaultdict
 
 import country_converter as coco
 import requests
 from celery import shared_task
-from django.core.exceptions import MultipleObjectsReturned, ValidationError
+from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage, storages
 from django.core.validators import URLValidator
+from django.db import transaction
+from django.utils import timezone
 from elasticsearch import ConnectionError, ConnectionTimeout, Elasticsearch
 from sentry_sdk import capture_exception
 
 from config import celery_app
 from scoap3.articles.models import Article, ArticleFile, ArticleIdentifier
+from scoap3.articles.signals import (
+    check_compliance_on_commit,
+    index_articles_on_commit,
+    mark_articles_imported,
+    refresh_snapshots_on_commit,
+    touch_articles,
+)
 from scoap3.authors.models import Author, AuthorIdentifier
+from scoap3.exports.jobs import request_export
+from scoap3.exports.models import ExportType
+from scoap3.misc.cache import (
+    country_cache,
+    license_cache,
+    publisher_cache,
+    refresh_lookup_caches,
+)
 from scoap3.misc.models import (
     Affiliation,
     ArticleArxivCategory,
@@ -30,7 +48,6 @@ from scoap3.misc.models import (
     PublicationInfo,
     Publisher,
 )
-from scoap3.utils.tools import year_export
 
 logger = logging.getLogger(__name__)
 cc = coco.CountryConverter()
@@ -48,6 +65,23 @@ def get_default_storage_path():
 DEFAULT_STORAGE_PATH = get_default_storage_path()
 
 
+def get_import_fingerprint(data, migrate_files, copy_files=False):
+    """Hash of the canonical JSON of an import payload and its options."""
+    payload = {
+        "data": data,
+        "migrate_files": bool(migrate_files),
+        "copy_files": bool(copy_files),
+    }
+    canonical = json.dumps(
+        payload,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 def _rename_keys(data, replacements):
     for item in data:
         for old_key, new_key in replacements:
@@ -56,40 +90,48 @@ def _rename_keys(data, replacements):
     return data
 
 
-def _create_licenses(data):
-    licenses = []
+def _normalize_license(license):
     val = URLValidator()
-    for license in _rename_keys(data, [("license", "name")]):
-        try:
-            val(license.get("url"))
-        except ValidationError:
-            if license.get("name") is None:
-                license["name"] = license.get("url")
-            license.pop("url")
-
-        if (
-            license["name"] == "CC-BY-4.0"
-            or license["name"] == "CC-BY-4"
-            or license["name"] == "Creative Commons Attribution 4.0 licence"
-        ):
-            license["name"] = "CC-BY-4.0"
-            license["url"] = "http://creativecommons.org/licenses/by/4.0/"
-        elif (
-            license["name"] == "CC-BY-3.0"
-            or license["name"] == "cc-by"
-            or license["name"] == "Creative Commons Attribution 3.0 licence"
-        ):
-            license["name"] = "CC-BY-3.0"
-            license["url"] = "http://creativecommons.org/licenses/by/3.0/"
-
-        license, _ = License.objects.get_or_create(
-            url=license.get("url", ""), name=license.get("name", "")
-        )
-        licenses.append(license)
-    return licenses
+    try:
+        val(license.get("url"))
+    except ValidationError:
+        if license.get("name") is None:
+            license["name"] = license.get("url")
+        license.pop("url")
+
+    if (
+        license["name"] == "CC-BY-4.0"
+        or license["name"] == "CC-BY-4"
+        or license["name"] == "Creative Commons Attribution 4.0 licence"
+    ):
+        license["name"] = "CC-BY-4.0"
+        license["url"] = "http://creativecommons.org/licenses/by/4.0/"
+    elif (
+        license["name"] == "CC-BY-3.0"
+        or license["name"] == "cc-by"
+        or license["name"] == "Creative Commons Attribution 3.0 licence"
+    ):
+        license["name"] = "CC-BY-3.0"
+        license["url"] = "http://creativecommons.org/licenses/by/3.0/"
+
+    return license.get("url", ""), license.get("name", "")
 
 
-def _create_article(data):
+def _create_licenses(data):
+    license_ids = []
+    for license in _rename_keys(data, [("license", "name")]):
+        key = _normalize_license(license)
+        license_id = license_cache.get(key)
+        if license_id is None:
+            url, name = key
+            license, _ = License.objects.get_or_create(url=url, name=name)
+            license_id = license.id
+            license_cache.set_on_commit(key, license_id)
+        license_ids.append(license_id)
+    return license_ids
+
+
+def _get_article_data(data):
     article_data = {
         "title": data["titles"][0].get("title"),
         "subtitle": data["titles"][0].get("subtitle", ""),
@@ -99,13 +141,6 @@ def _create_article(data):
     except (KeyError, IndexError):
         pass
 
-    doi_exists = False
-    doi_value = data.get("dois")[0].get("value")
-    if doi_value:
-        doi_exists = ArticleIdentifier.objects.filter(
-            identifier_type="DOI", identifier_value=data.get("dois")[0].get("value")
-        ).exists()
-
     publication_date = None
     try:
         publication_date = data["imprints"][0].get("date")
@@ -113,6 +148,18 @@ def _create_article(data):
         pass
     if publication_date:
         article_data["publication_date"] = publication_date
+    return article_data, publication_date
+
+
+def _create_article(data):
+    article_data, publication_date = _get_article_data(data)
+
+    doi_exists = False
+    doi_value = data.get("dois")[0].get("value")
+    if doi_value:
+        doi_exists = ArticleIdentifier.objects.filter(
+            identifier_type="DOI", identifier_value=data.get("dois")[0].get("value")
+        ).exists()
 
     # if "control_number" present, means it is a legacy record
     if data.get("control_number"):
@@ -148,15 +195,15 @@ def _create_article(data):
         article = Article.objects.create(**article_data)
         article._created_at = data.get("_created") or data.get("record_creation_date")
 
-    licenses = _create_licenses(data["license"])
-    article.related_licenses.set(licenses)
+    license_ids = _create_licenses(data["license"])
+    article.related_licenses.set(license_ids)
     article.save()
     return article
 
 
-def _create_article_file(data, article, copy_files=False):
+def _get_article_files_data(data, article_id):
+    files_data = []
     for file in data.get("_files", []):
-        article_id = article.id
         filename = file.get("key")
         file_path = f"files/{article_id}/{filename}"
         filetype = file.get("filetype", "")
@@ -164,18 +211,9 @@ def _create_article_file(data, article, copy_files=False):
         if filetype in ["pdfa", "pdf/a", "pdf_a"]:
             filetype = "pdf/a"
 
-        article = Article.objects.get(pk=article_id)
-        article_file_data = {
-            "article_id": article,
-            "file": file_path,
-            "filetype": filetype,
-        }
-        ArticleFile.objects.get_or_create(**article_file_data)
-        if copy_files:
-            construct_legacy_filepath(article_id, file)
+        files_data.append((file_path, filetype, file))
 
     for file in data.get("files", {}):
-        article_id = article.id
         file_path = data["files"][file]
         filetype = file
 
@@ -184,6 +222,13 @@ def _create_article_file(data, article, copy_files=False):
 
         if DEFAULT_STORAGE_PATH:
             file_path = file_path.replace(DEFAULT_STORAGE_PATH, "")
+        files_data.append((file_path, filetype, None))
+    return files_data
+
+
+def _create_article_file(data, article, copy_files=False):
+    article_id = article.id
+    for file_path, filetype, legacy_file in _get_article_files_data(data, article_id):
         article = Article.objects.get(pk=article_id)
         article_file_data = {
             "article_id": article,
@@ -191,6 +236,8 @@ def _create_article_file(data, article, copy_files=False):
             "filetype": filetype,
         }
         ArticleFile.objects.get_or_create(**article_file_data)
+        if copy_files and legacy_file:
+            construct_legacy_filepath(article_id, legacy_file)
 
 
 def _create_article_identifier(data, article):
@@ -236,17 +283,21 @@ def _create_article_arxiv_category(data, article):
 
 
 def _create_publisher(data):
-    publishers = []
+    publisher_ids = []
     for imprint in data.get("imprints"):
         publisher_data = {
             "name": imprint.get("publisher"),
         }
-        publisher, _ = Publisher.objects.get_or_create(**publisher_data)
-        publishers.append(publisher)
-    return publishers
+        publisher_id = publisher_cache.get(publisher_data["name"])
+        if publisher_id is None:
+            publisher, _ = Publisher.objects.get_or_create(**publisher_data)
+            publisher_id = publisher.id
+            publisher_cache.set_on_commit(publisher_data["name"], publisher_id)
+        publisher_ids.append(publisher_id)
+    return publisher_ids
 
 
-def _create_publication_info(data, article, publishers):
+def _create_publication_info(data, article, publisher_ids):
     for idx, publication_info in enumerate(data.get("publication_info", [])):
         publication_info_data = {
             "journal_volume": publication_info.get("journal_volume", ""),
@@ -257,7 +308,7 @@ def _create_publication_info(data, article, publishers):
             "page_end": publication_info.get("page_end", ""),
             "artid": publication_info.get("artid", ""),
             "journal_issue_date": publication_info.get("journal_issue_date"),
-            "publisher_id": publishers[idx].id,
+            "publisher_id": publisher_ids[idx],
         }
         volume_year = publication_info.get("year", "")
         if PublicationInfo.objects.filter(article_id=article.id).exists():
@@ -291,16 +342,17 @@ def _create_experimental_collaborations(data):
             )
 
 
+def _get_author_name(author):
+    name_match = re.match(r"(.*),(.*)", author.get("full_name", ""))
+    if name_match and len(name_match.groups()) == 2:
+        return name_match.group(2), name_match.group(1)
+    return author.get("given_names", ""), author.get("surname", "")
+
+
 def _create_author(data, article):
     authors = []
     for idx, author in enumerate(data.get("authors", [])):
-        name_match = re.match(r"(.*),(.*)", author.get("full_name", ""))
-        if name_match and len(name_match.groups()) == 2:
-            first_name = name_match.group(2)
-            last_name = name_match.group(1)
-        else:
-            first_name = author.get("given_names", "")
-            last_name = author.get("surname", "")
+        first_name, last_name = _get_author_name(author)
         author_data = {
             "article_id": article,
             "first_name": first_name,
@@ -330,6 +382,9 @@ def _create_country(affiliation):
         if not country or country == "HUMAN CHECK":
             return None
         country = country.lower()
+        country_obj = country_cache.get(country)
+        if country_obj is not None:
+            return country_obj
         if country == "cern":
             country_data = {
                 "code": "CERN",
@@ -358,46 +413,117 @@ def _create_country(affiliation):
         country_obj, created = Country.objects.get_or_create(**country_data)
         if created:
             logger.info("Created country:%s for affiliation:%s", country, affiliation)
+        country_cache.set_on_commit(country, country_obj)
         return country_obj
     except LookupError as e:
         capture_exception(e)
         return None
 
 
-def _create_affiliation(data, authors):
-    affiliations = []
-    for idx, author in enumerate(data.get("authors", [])):
-        for affiliation in author.get("affiliations", []):
-            country = _create_country(affiliation)
-            affiliation_data = {
-                "country": country,
-                "value": affiliation.get("value", ""),
-                "organization": affiliation.get("organization", ""),
-            }
-            ror_url = affiliation.get("ror", "")
-            ror = re.sub(r"^https:\/\/ror\.org\/", "", ror_url)
-            try:
-                affiliation_obj, _ = Affiliation.objects.get_or_create(
-                    **affiliation_data
-                )
-                affiliation_obj.author_id.add(authors[idx].id)
-                affiliations.append(affiliation_obj)
-                if ror:
-                    InstitutionIdentifier.objects.get_or_create(
-                        affiliation_id=affiliation_obj,
-                        identifier_type=InstitutionIdentifierType.ROR,
-                        identifier_value=ror,
-                    )
+def _resolve_affiliations(entries):
+    """Link authors to affiliations and RORs with a fixed number of queries.
+
+    ``entries`` is a list of ``(author, author_data, affiliation_data)``
+    tuples, one per author-affiliation pair.
+    """
+    countries = {}
+    affiliation_keys = []
+    for _, _, affiliation in entries:
+        raw_country = affiliation.get("country", "")
+        if raw_country not in countries:
+            countries[raw_country] = _create_country(affiliation)
+        country = countries[raw_country]
+        affiliation_keys.append(
+            (
+                country.code if country else None,
+                affiliation.get("value", ""),
+                affiliation.get("organization", ""),
+            )
+        )
 
-            except MultipleObjectsReturned:
-                logger.error(
-                    "While creating author:%s affiliation:%s",
-                    author.get("full_name", "No author name"),
-                    affiliation.get("value", "No affiliation value"),
-                )
+    existing = defaultdict(list)
+    for affiliation_obj in Affiliation.objects.filter(
+        value__in={value for _, value, _ in affiliation_keys}
+    ):
+        existing[
+            (
+                affiliation_obj.country_id,
+                affiliation_obj.value,
+                affiliation_obj.organization,
+            )
+        ].append(affiliation_obj)
+
+    affiliations_to_create = {}
+    for key in affiliation_keys:
+        if key not in existing and key not in affiliations_to_create:
+            country_code, value, organization = key
+            affiliations_to_create[key] = Affiliation(
+                country_id=country_code, value=value, organization=organization
+            )
+    Affiliation.objects.bulk_create(affiliations_to_create.values())
+    for key, affiliation_obj in affiliations_to_create.items():
+        existing[key].append(affiliation_obj)
+
+    affiliations = []
+    author_links = {}
+    rors = {}
+    for (author, author_data, affiliation), key in zip(entries, affiliation_keys):
+        if len(existing[key]) > 1:
+            logger.error(
+                "While creating author:%s affiliation:%s",
+                author_data.get("full_name", "No author name"),
+                affiliation.get("value", "No affiliation value"),
+            )
+            continue
+        affiliation_obj = existing[key][0]
+        affiliations.append(affiliation_obj)
+        author_links[(affiliation_obj.id, author.id)] = None
+        ror_url = affiliation.get("ror", "")
+        ror = re.sub(r"^https:\/\/ror\.org\/", "", ror_url)
+        if ror:
+            rors[(affiliation_obj.id, ror)] = affiliation_obj
+
+    through_model = Affiliation.author_id.through
+    through_model.objects.bulk_create(
+        [
+            through_model(affiliation_id=affiliation_id, author_id=author_id)
+            for affiliation_id, author_id in author_links
+        ],
+        ignore_conflicts=True,
+    )
+
+    existing_rors = set(
+        InstitutionIdentifier.objects.filter(
+            affiliation_id__in={affiliation_id for affiliation_id, _ in rors},
+            identifier_type=InstitutionIdentifierType.ROR,
+        ).values_list("affiliation_id", "identifier_value")
+    )
+    InstitutionIdentifier.objects.bulk_create(
+        [
+            InstitutionIdentifier(
+                affiliation_id=affiliation_obj,
+                identifier_type=InstitutionIdentifierType.ROR,
+                identifier_value=ror,
+            )
+            for (affiliation_id, ror), affiliation_obj in rors.items()
+            if (affiliation_id, ror) not in existing_rors
+        ]
+    )
     return affiliations
 
 
+def _get_affiliation_entries(data, authors):
+    return [
+        (authors[idx], author, affiliation)
+        for idx, author in enumerate(data.get("authors", []))
+        for affiliation in author.get("affiliations", [])
+    ]
+
+
+def _create_affiliation(data, authors):
+    return _resolve_affiliations(_get_affiliation_entries(data, authors))
+
+
 def get_articles_by_doi(dois):
     articles = Article.objects.filter(
         article_identifiers__identifier_type="DOI",
@@ -409,26 +535,525 @@ def get_articles_by_doi(dois):
 
 @shared_task(acks_late=True)
 def import_to_scoap3(data, migrate_files, copy_files=False):
-    article = _create_article(data)
-    if migrate_files:
-        _create_article_file(data, article, copy_files)
-    _create_article_identifier(data, article)
-    _create_copyright(data, article)
-    _create_article_arxiv_category(data, article)
-    publishers = _create_publisher(data)
-    _create_publication_info(data, article, publishers)
-    _create_experimental_collaborations(data)
-    authors = _create_author(data, article)
-    _create_author_identifier(data, authors)
-    _create_affiliation(data, authors)
-    article.save()
+    fingerprint = get_import_fingerprint(data, migrate_files, copy_files)
+    article = Article.objects.filter(import_fingerprint=fingerprint).first()
+    if article:
+        logger.info("Article %s unchanged, skipping import.", article.id)
+        return article
+
+    refresh_lookup_caches()
+    with transaction.atomic():
+        article = _create_article(data)
+        if migrate_files:
+            _create_article_file(data, article, copy_files)
+        _create_article_identifier(data, article)
+        _create_copyright(data, article)
+        _create_article_arxiv_category(data, article)
+        publisher_ids = _create_publisher(data)
+        _create_publication_info(data, article, publisher_ids)
+        _create_experimental_collaborations(data)
+        authors = _create_author(data, article)
+        _create_author_identifier(data, authors)
+        _create_affiliation(data, authors)
+        article.save()
+        Article.objects.filter(pk=article.pk).update(import_fingerprint=fingerprint)
+        mark_articles_imported([article.id])
+        refresh_snapshots_on_commit([article.id])
+    article.import_fingerprint = fingerprint
     return article
 
 
 def update_affiliations(data):
-    article = _create_article(data)
-    authors = _create_author(data, article)
-    _create_affiliation(data, authors)
+    refresh_lookup_caches()
+    with transaction.atomic():
+        article = _create_article(data)
+        authors = _create_author(data, article)
+        _create_affiliation(data, authors)
+        # the author links are bulk created without m2m_changed signals
+        touch_articles([article.id])
+
+
+def _split_batch(records, articles_by_doi):
+    """Yield chunks of records that never touch the same article twice."""
+    chunk, chunk_keys = [], set()
+    for data in records:
+        record_keys = {
+            ("doi", doi.get("value")) for doi in data.get("dois") if doi.get("value")
+        }
+        if data.get("control_number"):
+            record_keys.add(("article", int(data["control_number"])))
+        doi_value = data.get("dois")[0].get("value")
+        if doi_value in articles_by_doi:
+            record_keys.add(("article", articles_by_doi[doi_value].id))
+        if chunk_keys & record_keys:
+            yield chunk
+            chunk, chunk_keys = [], set()
+        chunk.append(data)
+        chunk_keys |= record_keys
+    if chunk:
+        yield chunk
+
+
+def _create_articles_batch(records, articles_by_doi, articles_by_id):
+    articles = []
+    articles_to_create = []
+    articles_to_clear_authors = []
+    for data in records:
+        article_data, publication_date = _get_article_data(data)
+        doi_value = data.get("dois")[0].get("value")
+        existing_article = articles_by_doi.get(doi_value) if doi_value else None
+
+        if data.get("control_number"):
+            if existing_article:
+                logger.info(
+                    f"Creating article with id={data['control_number']} - "
+                    f"Article with DOI={doi_value} already exists."
+                )
+            control_number = int(data["control_number"])
+            if control_number in articles_by_id:
+                article = articles_by_id[control_number]
+                article.__dict__.update(**article_data)
+            else:
+                article = Article(id=control_number, **article_data)
+                articles_to_create.append(article)
+        elif existing_article:
+            article = existing_article
+            article.__dict__.update(**article_data)
+            if len(data.get("authors", [])) > 0:
+                articles_to_clear_authors.append(article.id)
+        else:
+            article_data["publication_date"] = publication_date
+            article = Article(**article_data)
+            articles_to_create.append(article)
+        articles.append(article)
+
+    Article.objects.bulk_create(articles_to_create)
+    created = {id(article) for article in articles_to_create}
+    now = timezone.now()
+    for data, article in zip(records, articles):
+        if id(article) in created:
+            article._created_at = data.get("_created") or data.get(
+                "record_creation_date"
+            )
+        article._updated_at = now
+        articles_by_id[article.id] = article
+    Article.objects.bulk_update(
+        articles,
+        [
+            "title",
+            "subtitle",
+            "abstract",
+            "publication_date",
+            "_created_at",
+            "_updated_at",
+        ],
+    )
+    if articles_to_clear_authors:
+        Author.objects.filter(article_id__in=articles_to_clear_authors).delete()
+    return articles
+
+
+def _create_licenses_batch(records, articles):
+    license_keys = [
+        [
+            _normalize_license(license)
+            for license in _rename_keys(data["license"], [("license", "name")])
+        ]
+        for data in records
+    ]
+    license_ids = {key: license_cache.get(key) for keys in license_keys for key in keys}
+    missing = {key for key, license_id in license_ids.items() if license_id is None}
+    if missing:
+        names = {name for _, name in missing}
+        License.objects.bulk_create(
+            [License(url=url, name=name) for url, name in missing],
+            ignore_conflicts=True,
+        )
+        for license in License.objects.filter(name__in=names):
+            key = (license.url, license.name)
+            if key in missing:
+                license_ids[key] = license.id
+                license_cache.set_on_commit(key, license.id)
+
+    through_model = Article.related_licenses.through
+    through_model.objects.filter(
+        article_id__in=[article.id for article in articles]
+    ).delete()
+    through_model.objects.bulk_create(
+        {
+            (article.id, license_ids[key]): through_model(
+                article_id=article.id, license_id=license_ids[key]
+            )
+            for keys, article in zip(license_keys, articles)
+            for key in keys
+        }.values()
+    )
+
+
+def _create_article_files_batch(records, articles, copy_files=False):
+    article_ids = [article.id for article in articles]
+    existing = {
+        (article_file.article_id_id, article_file.file.name, article_file.filetype)
+        for article_file in ArticleFile.objects.filter(article_id__in=article_ids)
+    }
+    article_files = []
+    for data, article in zip(records, articles):
+        for file_path, filetype, legacy_file in _get_article_files_data(
+            data, article.id
+        ):
+            key = (article.id, file_path, filetype)
+            if key not in existing:
+                existing.add(key)
+                article_files.append(
+                    ArticleFile(article_id=article, file=file_path, filetype=filetype)
+                )
+            if copy_files and legacy_file:
+                construct_legacy_filepath(article.id, legacy_file)
+    ArticleFile.objects.bulk_create(article_files)
+
+
+def _create_article_identifiers_batch(records, articles, articles_by_doi):
+    existing = {
+        (
+            identifier.article_id_id,
+            identifier.identifier_type,
+            identifier.identifier_value,
+        )
+        for identifier in ArticleIdentifier.objects.filter(
+            article_id__in=[article.id for article in articles]
+        )
+    }
+    identifiers = []
+    for data, article in zip(records, articles):
+        values = [("DOI", doi.get("value")) for doi in data.get("dois")] + [
+            ("arXiv", arxiv.get("value")) for arxiv in data.get("arxiv_eprints", [])
+        ]
+        for identifier_type, identifier_value in values:
+            key = (article.id, identifier_type, identifier_value)
+            if key in existing:
+                continue
+            existing.add(key)
+            identifiers.append(
+                ArticleIdentifier(
+                    article_id=article,
+                    identifier_type=identifier_type,
+                    identifier_value=identifier_value,
+                )
+            )
+            if identifier_type == "DOI":
+                articles_by_doi[identifier_value] = article
+    ArticleIdentifier.objects.bulk_create(identifiers)
+
+
+def _create_copyrights_batch(records, articles):
+    year_field = Copyright._meta.get_field("year")
+    existing = {
+        (copyright.article_id_id, copyright.statement, copyright.holder, copyright.year)
+        for copyright in Copyright.objects.filter(
+            article_id__in=[article.id for article in articles]
+        )
+    }
+    copyrights = []
+    for data, article in zip(records, articles):
+        for copyright in data.get("copyright", []):
+            copyright_data = {
+                "statement": copyright.get("statement", ""),
+                "holder": copyright.get("holder", ""),
+                "year": year_field.to_python(copyright.get("year")),
+            }
+            key = (article.id, *copyright_data.values())
+            if key not in existing:
+                existing.add(key)
+                copyrights.append(Copyright(article_id=article, **copyright_data))
+    Copyright.objects.bulk_create(copyrights)
+
+
+def _create_article_arxiv_categories_batch(records, articles):
+    existing = {
+        (category.article_id_id, category.category, category.primary)
+        for category in ArticleArxivCategory.objects.filter(
+            article_id__in=[article.id for article in articles]
+        )
+    }
+    categories = []
+    for data, article in zip(records, articles):
+        if "arxiv_eprints" not in data.keys():
+            continue
+        for idx, arxiv_category in enumerate(
+            data["arxiv_eprints"][0].get("categories", [])
+        ):
+            key = (article.id, arxiv_category, idx == 0)
+            if key not in existing:
+                existing.add(key)
+                categories.append(
+                    ArticleArxivCategory(
+                        article_id=article, category=arxiv_category, primary=idx == 0
+                    )
+                )
+    ArticleArxivCategory.objects.bulk_create(categories)
+
+
+def _create_publishers_batch(records):
+    names = {
+        imprint.get("publisher") for data in records for imprint in data.get("imprints")
+    }
+    publisher_ids = {name: publisher_cache.get(name) for name in names}
+    missing = {
+        name for name, publisher_id in publisher_ids.items() if publisher_id is None
+    }
+    if missing:
+        Publisher.objects.bulk_create(
+            [Publisher(name=name) for name in missing], ignore_conflicts=True
+        )
+        for publisher in Publisher.objects.filter(name__in=missing):
+            publisher_ids[publisher.name] = publisher.id
+            publisher_cache.set_on_commit(publisher.name, publisher.id)
+    return [
+        [publisher_ids[imprint.get("publisher")] for imprint in data.get("imprints")]
+        for data in records
+    ]
+
+
+def _create_publication_infos_batch(records, articles, publisher_ids):
+    existing = {}
+    for publication_info in PublicationInfo.objects.filter(
+        article_id__in=[article.id for article in articles]
+    ):
+        existing.setdefault(publication_info.article_id_id, publication_info)
+
+    publication_infos_to_create = []
+    publication_infos_to_update = []
+    for data, article, article_publisher_ids in zip(records, articles, publisher_ids):
+        publication_info_obj = existing.get(article.id)
+        if publication_info_obj:
+            publication_infos_to_update.append(publication_info_obj)
+        for idx, publication_info in enumerate(data.get("publication_info", [])):
+            publication_info_data = {
+                "journal_volume": publication_info.get("journal_volume", ""),
+                "journal_title": publication_info.get("journal_title", ""),
+                "material": publication_info.get("material", ""),
+                "journal_issue": publication_info.get("journal_issue", ""),
+                "page_start": publication_info.get("page_start", ""),
+                "page_end": publication_info.get("page_end", ""),
+                "artid": publication_info.get("artid", ""),
+                "journal_issue_date": publication_info.get("journal_issue_date"),
+                "publisher_id": article_publisher_ids[idx],
+            }
+            volume_year = publication_info.get("year", "")
+            if volume_year:
+                publication_info_data["volume_year"] = volume_year
+            if publication_info_obj:
+                publication_info_obj.__dict__.update(**publication_info_data)
+            else:
+                publication_info_obj = PublicationInfo(
+                    article_id=article, **publication_info_data
+                )
+                publication_infos_to_create.append(publication_info_obj)
+
+    PublicationInfo.objects.bulk_create(publication_infos_to_create)
+    PublicationInfo.objects.bulk_update(
+        publication_infos_to_update,
+        [
+            "journal_volume",
+            "journal_title",
+            "material",
+            "journal_issue",
+            "page_start",
+            "page_end",
+            "artid",
+            "volume_year",
+            "journal_issue_date",
+            "publisher",
+        ],
+    )
+
+
+def _create_experimental_collaborations_batch(records):
+    names = {
+        experimental_collaboration.get("value")
+        for data in records
+        for experimental_collaboration in data.get("collaborations", [])
+    }
+    existing = set(
+        ExperimentalCollaboration.objects.filter(name__in=names).values_list(
+            "name", flat=True
+        )
+    )
+    ExperimentalCollaboration.objects.bulk_create(
+        [ExperimentalCollaboration(name=name) for name in names - existing]
+    )
+
+
+def _create_authors_batch(records, articles):
+    existing = {
+        (
+            author.article_id_id,
+            author.first_name,
+            author.last_name,
+            author.email,
+            author.author_order,
+        ): author
+        for author in Author.objects.filter(
+            article_id__in=[article.id for article in articles]
+        )
+    }
+    authors = []
+    authors_to_create = []
+    for data, article in zip(records, articles):
+        record_authors = []
+        for idx, author in enumerate(data.get("authors", [])):
+            first_name, last_name = _get_author_name(author)
+            author_data = {
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": author.get("email", ""),
+                "author_order": idx,
+            }
+            key = (article.id, *author_data.values())
+            if key not in existing:
+                existing[key] = Author(article_id=article, **author_data)
+                authors_to_create.append(existing[key])
+            record_authors.append(existing[key])
+        authors.append(record_authors)
+    Author.objects.bulk_create(authors_to_create)
+    return authors
+
+
+def _create_author_identifiers_batch(records, authors):
+    existing = {
+        (
+            identifier.author_id_id,
+            identifier.identifier_type,
+            identifier.identifier_value,
+        )
+        for identifier in AuthorIdentifier.objects.filter(
+            author_id__in=[
+                author.id for record_authors in authors for author in record_authors
+            ]
+        )
+    }
+    identifiers = []
+    for data, record_authors in zip(records, authors):
+        for idx, author in enumerate(data.get("authors", [])):
+            if "orcid" not in author.keys():
+                continue
+            key = (record_authors[idx].id, "ORCID", author.get("orcid"))
+            if key not in existing:
+                existing.add(key)
+                identifiers.append(
+                    AuthorIdentifier(
+                        author_id=record_authors[idx],
+                        identifier_type="ORCID",
+                        identifier_value=author.get("orcid"),
+                    )
+                )
+    AuthorIdentifier.objects.bulk_create(identifiers)
+
+
+def _import_batch(records, migrate_files, copy_files, articles_by_doi, articles_by_id):
+    articles = _create_articles_batch(records, articles_by_doi, articles_by_id)
+    _create_licenses_batch(records, articles)
+    if migrate_files:
+        _create_article_files_batch(records, articles, copy_files)
+    _create_article_identifiers_batch(records, articles, articles_by_doi)
+    _create_copyrights_batch(records, articles)
+    _create_article_arxiv_categories_batch(records, articles)
+    publisher_ids = _create_publishers_batch(records)
+    _create_publication_infos_batch(records, articles, publisher_ids)
+    _create_experimental_collaborations_batch(records)
+    authors = _create_authors_batch(records, articles)
+    _create_author_identifiers_batch(records, authors)
+    _resolve_affiliations(
+        [
+            entry
+            for data, record_authors in zip(records, authors)
+            for entry in _get_affiliation_entries(data, record_authors)
+        ]
+    )
+    return articles
+
+
+@shared_task(acks_late=True)
+def import_batch_to_scoap3(records, migrate_files=True, copy_files=False):
+    """Import many records in a single transaction.
+
+    Produces the same rows as calling ``import_to_scoap3`` on each record in
+    order, but resolves existing articles up front and writes every model
+    with ``bulk_create``/``bulk_update``. Records whose fingerprint matches
+    the last import of an article are skipped.
+    """
+    fingerprints = [
+        get_import_fingerprint(data, migrate_files, copy_files) for data in records
+    ]
+    unchanged_articles = {
+        article.import_fingerprint: article
+        for article in Article.objects.filter(import_fingerprint__in=fingerprints)
+    }
+    dois = {data.get("dois")[0].get("value") for data in records} - {None, ""}
+    control_numbers = {
+        int(data["control_number"]) for data in records if data.get("control_number")
+    }
+    articles_by_id = {
+        article.id: article
+        for article in Article.objects.filter(pk__in=control_numbers)
+    }
+    articles_by_doi = {}
+    for identifier in ArticleIdentifier.objects.filter(
+        identifier_type="DOI", identifier_value__in=dois
+    ).select_related("article_id"):
+        articles_by_doi[identifier.identifier_value] = articles_by_id.setdefault(
+            identifier.article_id.id, identifier.article_id
+        )
+
+    # a record is only a no-op if no earlier record of the batch touched the
+    # same article
+    results = []
+    records_to_import, touched = [], set()
+    for data, fingerprint in zip(records, fingerprints):
+        record_keys = {
+            ("doi", doi.get("value")) for doi in data.get("dois") if doi.get("value")
+        }
+        if data.get("control_number"):
+            record_keys.add(("article", int(data["control_number"])))
+        unchanged_article = unchanged_articles.get(fingerprint)
+        if unchanged_article:
+            record_keys.add(("article", unchanged_article.id))
+        if unchanged_article and not touched & record_keys:
+            logger.info("Article %s unchanged, skipping import.", unchanged_article.id)
+            results.append(unchanged_article)
+            continue
+        doi_value = data.get("dois")[0].get("value")
+        if doi_value in articles_by_doi:
+            record_keys.add(("article", articles_by_doi[doi_value].id))
+        touched |= record_keys
+        records_to_import.append((data, fingerprint))
+        results.append(None)
+
+    articles = []
+    refresh_lookup_caches()
+    with transaction.atomic():
+        for chunk in _split_batch(
+            [data for data, _ in records_to_import], articles_by_doi
+        ):
+            articles.extend(
+                _import_batch(
+                    chunk, migrate_files, copy_files, articles_by_doi, articles_by_id
+                )
+            )
+        for article, (_, fingerprint) in zip(articles, records_to_import):
+            article.import_fingerprint = fingerprint
+        Article.objects.bulk_update(
+            list({article.id: article for article in articles}.values()),
+            ["import_fingerprint"],
+        )
+        article_ids = [article.id for article in articles]
+        mark_articles_imported(article_ids)
+        refresh_snapshots_on_commit(article_ids)
+        index_articles_on_commit(article_ids)
+        check_compliance_on_commit(article_ids)
+
+    imported = iter(articles)
+    return [article or next(imported) for article in results]
 
 
 @celery_app.task(
@@ -506,13 +1131,19 @@ def link_affiliations(folder_name, index_range):
 
 
 @celery_app.task(acks_late=True)
-def year_data_export(start_date, end_date, publisher_name, file_name):
-    result = year_export(start_date, end_date, publisher_name)
-
-    with io.StringIO() as buffer:
-        writer = csv.writer(buffer)
-        writer.writerow(result["header"])
-        writer.writerows(result["data"])
-        csv_content = buffer.getvalue()
-        file_content = ContentFile(csv_content)
-        default_storage.save(f"generated_files/{file_name}", file_content)
+def year_data_export(start_date, end_date, publisher_name, file_name=None):
+    # file_name is kept for tasks queued before exports were stored as jobs
+    if file_name is not None:
+        logger.warning(
+            "year_data_export: file_name is deprecated and ignored, "
+            "the export is stored with its job."
+        )
+    job = request_export(
+        ExportType.YEAR,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "publisher_name": publisher_name,
+        },
+    )
+    return job.pk
@@ -1,10 +1,13 @@
+from unittest.mock import patch
+
 import pytest
 from django.test import TestCase
 
+from scoap3.articles.documents import ArticleDocument
 from scoap3.articles.models import Article, ArticleIdentifier
 from scoap3.authors.models import Author
 from scoap3.misc.models import Affiliation, Country, PublicationInfo, Publisher
-from scoap3.utils.tools import author_export
+from scoap3.utils.tools import affiliation_export, author_export
 
 
 @pytest.mark.django_db
@@ -80,6 +83,7 @@ class TestAuthorExport(TestCase):
         author.save()
         affiliation.save()
         article.save()
+        ArticleDocument().update(article, action="index")
 
         return article
 
@@ -334,3 +338,49 @@ class TestAuthorExport(TestCase):
         Author.objects.all().delete()
         Affiliation.objects.all().delete()
         Country.objects.all().delete()
+
+
+def _export_hit(doi):
+    return ArticleDocument.from_opensearch(
+        {
+            "_id": doi,
+            "_source": {
+                "publication_date": "2024-02-01",
+                "journal_title": "JHEP",
+                "doi": doi,
+                "arxiv_id": "2401.00001",
+                "arxiv_primary_category": "hep-th",
+                "authors_count": 3,
+                "authors_without_affiliations_count": 1,
+                "author_affiliations": [
+                    {"author": "Jane Doe", "country": "CH", "affiliation": "CERN"},
+                    {"author": "John Doe", "country": "CH", "affiliation": "CERN"},
+                    {"author": "John Doe", "country": "FR", "affiliation": "LAPP"},
+                ],
+            },
+        }
+    )
+
+
+@patch("scoap3.utils.tools.scan")
+def test_author_export_reads_flattened_fields(mock_scan):
+    mock_scan.return_value = [_export_hit("10.1/a"), _export_hit("10.1/a")]
+
+    result = author_export(2024, "CH")
+
+    assert result["data"] == [
+        [2024, "JHEP", "10.1/a", "2401.00001", "hep-th", name, "CH", "CERN", 3]
+        for name in ("Jane Doe", "John Doe")
+    ]
+
+
+@patch("scoap3.utils.tools.scan")
+def test_affiliation_export_reads_flattened_fields(mock_scan):
+    mock_scan.return_value = [_export_hit("10.1/a")]
+
+    result = affiliation_export(2024, None)
+
+    assert result["data"] == [
+        [2024, "JHEP", "10.1/a", "2401.00001", "hep-th", "CH", "CERN", 2, 3],
+        [2024, "JHEP", "10.1/a", "2401.00001", "hep-th", "FR", "LAPP", 1, 3],
+    ]
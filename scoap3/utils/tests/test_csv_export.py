@@ -0,0 +1,61 @@
+import datetime
+import io
+
+from pyarrow import parquet
+
+from scoap3.utils.tools import iter_csv, write_csv, write_parquet
+
+
+def test_iter_csv_yields_one_line_per_row():
+    rows = (row for row in [[2024, "JHEP", "10.1/a"], [2023, "PLB, B", None]])
+
+    lines = list(iter_csv(["year", "journal", "doi"], rows))
+
+    assert lines == [
+        "year,journal,doi\r\n",
+        "2024,JHEP,10.1/a\r\n",
+        '2023,"PLB, B",\r\n',
+    ]
+
+
+def test_write_csv():
+    file = io.StringIO()
+
+    write_csv(file, ["year"], iter([[2024], [2023]]))
+
+    assert file.getvalue() == "year\r\n2024\r\n2023\r\n"
+
+
+def test_write_parquet_in_row_groups(settings):
+    settings.EXPORT_PARQUET_ROW_GROUP_SIZE = 2
+    rows = [
+        [2024, "JHEP", datetime.datetime(2024, 1, 2), 3],
+        [2024, None, datetime.datetime(2024, 2, 3), 1],
+        [2023, "PLB", None, 0],
+    ]
+    progress = []
+    file = io.BytesIO()
+
+    count = write_parquet(
+        file,
+        ["year", "journal", "publication date", "total number of authors"],
+        ["int32", "string", "date32", "int32"],
+        iter(rows),
+        progress=progress.append,
+        progress_every=2,
+    )
+
+    file.seek(0)
+    parquet_file = parquet.ParquetFile(file)
+    assert count == 3
+    assert progress == [2]
+    assert parquet_file.metadata.num_row_groups == 2
+    assert (
+        str(parquet_file.schema_arrow.field("publication date").type) == "date32[day]"
+    )
+    assert parquet_file.read().to_pylist()[1] == {
+        "year": 2024,
+        "journal": None,
+        "publication date": datetime.date(2024, 2, 3),
+        "total number of authors": 1,
+    }
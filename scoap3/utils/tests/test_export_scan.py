@@ -0,0 +1,48 @@
+import pytest
+
+from scoap3.utils.tools import scan
+
+
+class FakeSearch:
+    def __init__(self, hits_by_slice, includes=None, slice_id=None):
+        self.hits_by_slice = hits_by_slice
+        self.includes = includes
+        self.slice_id = slice_id
+
+    def source(self, includes):
+        return FakeSearch(self.hits_by_slice, includes=includes)
+
+    def extra(self, slice):
+        assert slice["max"] == len(self.hits_by_slice)
+        return FakeSearch(self.hits_by_slice, self.includes, slice["id"])
+
+    def scan(self):
+        assert self.includes == ["doi"]
+        for hit in self.hits_by_slice[self.slice_id]:
+            if isinstance(hit, Exception):
+                raise hit
+            yield hit
+
+
+def test_scan_merges_slices_in_deterministic_order():
+    search = FakeSearch([[1, 2, 3], [4], [5, 6, 7, 8, 9]])
+
+    hits = list(scan(search, ["doi"], slices=3, page_size=2))
+
+    assert hits == [1, 2, 4, 5, 6, 3, 7, 8, 9]
+
+
+def test_scan_raises_slice_errors():
+    search = FakeSearch([[1], [ValueError("slice failed")]])
+
+    with pytest.raises(ValueError, match="slice failed"):
+        list(scan(search, ["doi"], slices=2))
+
+
+def test_scan_can_be_closed_early():
+    search = FakeSearch([list(range(1000)), list(range(1000))])
+
+    hits = scan(search, ["doi"], slices=2, page_size=1)
+
+    assert next(hits) == 0
+    hits.close()
@@ -1,8 +1,10 @@
 import datetime
+from unittest.mock import patch
 
 import pytest
 from django.test import TestCase
 
+from scoap3.articles.documents import ArticleDocument
 from scoap3.articles.models import Article, ArticleIdentifier
 from scoap3.authors.models import Author, AuthorIdentifier
 from scoap3.misc.models import (
@@ -13,7 +15,7 @@ from scoap3.misc.models import (
     Publisher,
     RelatedMaterial,
 )
-from scoap3.utils.tools import year_export
+from scoap3.utils.tools import YEAR_EXPORT_COUNT_FIELDS, YEAR_EXPORT_FIELDS, year_export
 
 
 @pytest.mark.django_db
@@ -116,6 +118,7 @@ class TestYearExport(TestCase):
         related_material_dataset_type.save()
         orcid.save()
         article.save()
+        ArticleDocument().update(article, action="index")
 
         return article
 
@@ -260,3 +263,40 @@ class TestYearExport(TestCase):
         AuthorIdentifier.objects.all().delete()
         RelatedMaterial.objects.all().delete()
         InstitutionIdentifier.objects.all().delete()
+
+
+@patch("scoap3.utils.tools.scan")
+def test_year_export_filters_publisher_and_reads_counts(mock_scan):
+    hit = {
+        "_id": "1",
+        "_source": {
+            "publication_date": "2024-02-01",
+            "journal_title": "JHEP",
+            "doi": "10.1/a",
+        },
+        "fields": {field: [idx] for idx, field in enumerate(YEAR_EXPORT_COUNT_FIELDS)},
+    }
+    mock_scan.return_value = [ArticleDocument.from_opensearch(hit)]
+
+    result = year_export("2024-01-01", "2024-12-31", "Springer")
+
+    search = mock_scan.call_args.args[0].to_dict()
+    assert {"term": {"publisher": "Springer"}} in search["query"]["bool"]["filter"]
+    assert search["docvalue_fields"] == YEAR_EXPORT_COUNT_FIELDS
+    assert mock_scan.call_args.args[1] == YEAR_EXPORT_FIELDS
+    assert result["data"] == [
+        [
+            2024,
+            "JHEP",
+            "10.1/a",
+            datetime.datetime(2024, 2, 1),
+            None,
+            None,
+            0,
+            1,
+            2,
+            3,
+            4,
+            5,
+        ]
+    ]
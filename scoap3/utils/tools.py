@@ -1,36 +1,290 @@
+import csv
+import io
 import logging
+import queue
+import tempfile
+import threading
 import xml.etree.ElementTree as ET
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 
+import pyarrow
+import pyarrow.parquet
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import default_storage
 from django.db import connection
 from django.db.models import Max
 
 from scoap3.articles.documents import ArticleDocument
 from scoap3.articles.models import Article, ArticleFile
-from scoap3.articles.util import (
-    get_arxiv_primary_category,
-    get_first_arxiv,
-    get_first_doi,
-)
 
 logger = logging.getLogger(__name__)
 
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_PARQUET = "parquet"
+EXPORT_FORMATS = [EXPORT_FORMAT_CSV, EXPORT_FORMAT_PARQUET]
+
+
+AFFILIATION_EXPORT_HEADER = [
+    "year",
+    "journal",
+    "doi",
+    "arxiv number",
+    "primary arxiv category",
+    "country",
+    "affiliation",
+    "authors with affiliation",
+    "total number of authors",
+]
+
+# pyarrow types of the columns, for typed Parquet exports
+AFFILIATION_EXPORT_TYPES = [
+    "int32",
+    "string",
+    "string",
+    "string",
+    "string",
+    "string",
+    "string",
+    "int32",
+    "int32",
+]
+
+AUTHOR_EXPORT_HEADER = [
+    "year",
+    "journal",
+    "doi",
+    "arxiv number",
+    "primary arxiv category",
+    "author",
+    "country",
+    "affiliation",
+    "total number of authors",
+]
+
+AUTHOR_EXPORT_TYPES = [
+    "int32",
+    "string",
+    "string",
+    "string",
+    "string",
+    "string",
+    "string",
+    "string",
+    "int32",
+]
+
+YEAR_EXPORT_HEADER = [
+    "year",
+    "journal",
+    "doi",
+    "publication date",
+    "arxiv number",
+    "primary arxiv category",
+    "total number of authors",
+    "total number of ORCIDs linked to the authors",
+    "total number of affiliations",
+    "total number of RORs linked with the affiliations",
+    "total number of related materials, type dataset",
+    "total number of related materials, type software",
+]
+
+YEAR_EXPORT_TYPES = [
+    "int32",
+    "string",
+    "string",
+    "date32",
+    "string",
+    "string",
+    "int32",
+    "int32",
+    "int32",
+    "int32",
+    "int32",
+    "int32",
+]
+
+
+class Echo:
+    """File-like object returning what is written, for streaming csv rows."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(Echo())
+    if header:
+        yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(file, header, rows, progress=None, progress_every=1000):
+    """Write ``header`` and ``rows`` to ``file`` and return the row count.
+
+    ``progress`` is called with the number of rows written so far every
+    ``progress_every`` rows.
+    """
+    writer = csv.writer(file)
+    writer.writerow(header)
+    count = 0
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if progress and count % progress_every == 0:
+            progress(count)
+    return count
+
+
+def write_parquet(file, header, types, rows, progress=None, progress_every=1000):
+    """Write ``rows`` to ``file`` as zstd compressed Parquet, return the row count.
+
+    ``types`` are the pyarrow type names of the columns. Rows are written as
+    they come in, one row group per ``EXPORT_PARQUET_ROW_GROUP_SIZE`` rows.
+    """
+    schema = pyarrow.schema(
+        [
+            pyarrow.field(name, getattr(pyarrow, type_name)())
+            for name, type_name in zip(header, types)
+        ]
+    )
+    rows = iter(rows)
+    count = 0
+    with pyarrow.parquet.ParquetWriter(file, schema, compression="zstd") as writer:
+        while batch := list(islice(rows, settings.EXPORT_PARQUET_ROW_GROUP_SIZE)):
+            columns = zip(*batch)
+            writer.write_batch(
+                pyarrow.record_batch(
+                    [
+                        pyarrow.array(column, type=field.type)
+                        for column, field in zip(columns, schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            previous, count = count, count + len(batch)
+            if progress and count // progress_every > previous // progress_every:
+                progress(count)
+    return count
+
+
+def save_export(
+    name, header, rows, export_format=EXPORT_FORMAT_CSV, types=None, **kwargs
+):
+    """Write an export to ``default_storage``, returning its name and row count.
+
+    The rows are spooled to a temporary file so that the export is never held
+    in memory. ``types`` are only used, and required, for Parquet.
+    """
+    with tempfile.TemporaryFile() as buffer:
+        if export_format == EXPORT_FORMAT_PARQUET:
+            count = write_parquet(buffer, header, types, rows, **kwargs)
+        else:
+            text_buffer = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+            count = write_csv(text_buffer, header, rows, **kwargs)
+            text_buffer.flush()
+            text_buffer.detach()
+        buffer.seek(0)
+        return default_storage.save(name, File(buffer)), count
+
+
+EXPORT_ROW_FIELDS = [
+    "publication_date",
+    "journal_title",
+    "doi",
+    "arxiv_id",
+    "arxiv_primary_category",
+]
+
+AFFILIATION_EXPORT_FIELDS = EXPORT_ROW_FIELDS + [
+    "authors_count",
+    "authors_without_affiliations_count",
+    "author_affiliations.country",
+    "author_affiliations.affiliation",
+]
+
+AUTHOR_EXPORT_FIELDS = EXPORT_ROW_FIELDS + [
+    "authors_count",
+    "authors_without_affiliations_count",
+    "author_affiliations.author",
+    "author_affiliations.country",
+    "author_affiliations.affiliation",
+]
+
+YEAR_EXPORT_FIELDS = EXPORT_ROW_FIELDS
+
+# numeric fields computed at index time, read from doc values
+YEAR_EXPORT_COUNT_FIELDS = [
+    "authors_count",
+    "orcids_count",
+    "affiliations_count",
+    "rors_count",
+    "related_materials_dataset_count",
+    "related_materials_software_count",
+]
+
+_SLICE_DONE = object()
+
+
+def _scan_slice(search, slice_id, slices, pages, stop, page_size):
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
 
-def affiliation_export(search_year, search_country):
-    result_headers = [
-        "year",
-        "journal",
-        "doi",
-        "arxiv number",
-        "primary arxiv category",
-        "country",
-        "affiliation",
-        "authors with affiliation",
-        "total number of authors",
-    ]
-    result_data = []
-
+    try:
+        hits = search.extra(slice={"id": slice_id, "max": slices}).scan()
+        while not stop.is_set():
+            page = list(islice(hits, page_size))
+            if not page:
+                break
+            put(page)
+    except Exception as exc:
+        put(exc)
+    put(_SLICE_DONE)
+
+
+def scan(search, fields=None, slices=None, page_size=500):
+    """Scan ``search`` returning only ``fields`` of each document.
+
+    With more than one slice the scroll is split into sliced scrolls read
+    concurrently. Pages of ``page_size`` hits are taken from the slices in
+    turn, so the order of the hits does not depend on thread timing.
+    """
+    if fields:
+        search = search.source(includes=fields)
+    slices = slices or settings.EXPORT_SCAN_SLICES
+    if slices <= 1:
+        yield from search.scan()
+        return
+
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=2) for _ in range(slices)]
+    with ThreadPoolExecutor(max_workers=slices) as pool:
+        for slice_id, pages in enumerate(queues):
+            pool.submit(_scan_slice, search, slice_id, slices, pages, stop, page_size)
+        try:
+            active = list(queues)
+            while active:
+                for pages in list(active):
+                    page = pages.get()
+                    if page is _SLICE_DONE:
+                        active.remove(pages)
+                    elif isinstance(page, Exception):
+                        raise page
+                    else:
+                        yield from page
+        finally:
+            stop.set()
+
+
+def iter_affiliation_export(search_year, search_country):
     search = ArticleDocument.search()
 
     if search_year:
@@ -39,30 +293,22 @@ def affiliation_export(search_year, search_country):
     if search_country:
         search = search.filter("term", countries=search_country)
 
-    for article in search.scan():
+    for article in scan(search, AFFILIATION_EXPORT_FIELDS):
         year = article.publication_date.year
-        journal = article.publication_info[0].journal_title
-        doi = get_first_doi(article)
-        arxiv = get_first_arxiv(article)
-        arxiv_category = get_arxiv_primary_category(article)
-        authors = article.authors
-        total_authors = len(authors)
-        missing_author_affiliations = 0
-
-        extracted_affiliations = Counter()
-        for author in authors:
-            # if there are no affiliations, we cannot add this author
-            # (this also means the record is not valid according to the schema)
-            if not author.affiliations:
-                missing_author_affiliations += 1
-                continue
-
-            # aggregate affiliations
-            for aff in author.affiliations:
-                aff_country = aff.get("country", "UNKNOWN")
-                if search_country in (None, "") or aff_country.code == search_country:
-                    value = ((aff.value, aff_country.code),)
-                    extracted_affiliations.update(value)
+        journal = article.journal_title
+        doi = article.doi
+        arxiv = article.arxiv_id
+        arxiv_category = article.arxiv_primary_category
+        total_authors = article.authors_count
+        # authors without affiliations cannot be added
+        # (this also means the record is not valid according to the schema)
+        missing_author_affiliations = article.authors_without_affiliations_count
+
+        extracted_affiliations = Counter(
+            (entry.affiliation, entry.country)
+            for entry in article.author_affiliations
+            if search_country in (None, "") or entry.country == search_country
+        )
 
         if not extracted_affiliations:
             logger.warn(f"Article with DOI: {doi} had no extracted affiliations")
@@ -77,36 +323,27 @@ def affiliation_export(search_year, search_country):
         # add extracted information to result list
         for meta, count in extracted_affiliations.items():
             aff_value, aff_country = meta
-            result_data.append(
-                [
-                    year,
-                    journal,
-                    doi,
-                    arxiv,
-                    arxiv_category,
-                    aff_country,
-                    aff_value,
-                    count,
-                    total_authors,
-                ]
-            )
-    return {"header": result_headers, "data": result_data}
+            yield [
+                year,
+                journal,
+                doi,
+                arxiv,
+                arxiv_category,
+                aff_country,
+                aff_value,
+                count,
+                total_authors,
+            ]
 
 
-def author_export(search_year, search_country):
-    result_headers = [
-        "year",
-        "journal",
-        "doi",
-        "arxiv number",
-        "primary arxiv category",
-        "author",
-        "country",
-        "affiliation",
-        "total number of authors",
-    ]
-    result_data = []
+def affiliation_export(search_year, search_country):
+    return {
+        "header": AFFILIATION_EXPORT_HEADER,
+        "data": list(iter_affiliation_export(search_year, search_country)),
+    }
+
 
+def iter_author_export(search_year, search_country):
     search = ArticleDocument.search()
 
     if search_year:
@@ -117,8 +354,8 @@ def author_export(search_year, search_country):
 
     seen_dois = set()
 
-    for article in search.scan():
-        doi = get_first_doi(article)
+    for article in scan(search, AUTHOR_EXPORT_FIELDS):
+        doi = article.doi
 
         if doi in seen_dois or doi is None:
             continue
@@ -126,42 +363,25 @@ def author_export(search_year, search_country):
         seen_dois.add(doi)
 
         year = article.publication_date.year
-        journal = (
-            article.publication_info[0].journal_title
-            if article.publication_info
-            else None
-        )
-        doi = get_first_doi(article)
-        arxiv = get_first_arxiv(article)
-        arxiv_category = get_arxiv_primary_category(article)
-        authors = article.authors
-        total_authors = len(authors)
-        missing_author_affiliations = 0
-
-        for author in authors:
-            if not author.affiliations:
-                missing_author_affiliations += 1
-                continue
-
-            author_first_name = author.get("first_name", "UNKNOWN")
-            author_last_name = author.get("last_name", "UNKNOWN")
-            for affiliation in author.affiliations:
-                if affiliation.country.code == search_country:
-                    aff_country = affiliation.country.code
-                    aff_value = affiliation.get("value", "UNKNOWN")
-                    result_data.append(
-                        [
-                            year,
-                            journal,
-                            doi,
-                            arxiv,
-                            arxiv_category,
-                            author_first_name + " " + author_last_name,
-                            aff_country,
-                            aff_value,
-                            total_authors,
-                        ]
-                    )
+        journal = article.journal_title
+        arxiv = article.arxiv_id
+        arxiv_category = article.arxiv_primary_category
+        total_authors = article.authors_count
+        missing_author_affiliations = article.authors_without_affiliations_count
+
+        for entry in article.author_affiliations:
+            if entry.country == search_country:
+                yield [
+                    year,
+                    journal,
+                    doi,
+                    arxiv,
+                    arxiv_category,
+                    entry.author,
+                    entry.country,
+                    entry.affiliation,
+                    total_authors,
+                ]
 
         if missing_author_affiliations:
             logger.warn(
@@ -170,26 +390,15 @@ def author_export(search_year, search_country):
                 )
             )
 
-    return {"header": result_headers, "data": result_data}
 
+def author_export(search_year, search_country):
+    return {
+        "header": AUTHOR_EXPORT_HEADER,
+        "data": list(iter_author_export(search_year, search_country)),
+    }
 
-def year_export(start_date=None, end_date=None, publisher_name=None):
-    result_headers = [
-        "year",
-        "journal",
-        "doi",
-        "publication date",
-        "arxiv number",
-        "primary arxiv category",
-        "total number of authors",
-        "total number of ORCIDs linked to the authors",
-        "total number of affiliations",
-        "total number of RORs linked with the affiliations",
-        "total number of related materials, type dataset",
-        "total number of related materials, type software",
-    ]
-    result_data = []
 
+def iter_year_export(start_date=None, end_date=None, publisher_name=None):
     search = ArticleDocument.search()
 
     if start_date or end_date:
@@ -201,57 +410,27 @@ def year_export(start_date=None, end_date=None, publisher_name=None):
 
         search = search.filter("range", publication_date=date_range)
 
-    for article in search.scan():
-        year = article.publication_date.year
-        journal = article.publication_info[0].journal_title
-        publisher = article.publication_info[0].publisher
-        doi = get_first_doi(article)
-        publication_date = article.publication_date
-        arxiv = get_first_arxiv(article)
-        arxiv_category = get_arxiv_primary_category(article)
-
-        article_data = article.to_dict()
-        authors = article_data.get("authors", [])
-
-        affiliations_list = []
-        orcids = []
-        rors = []
-        for author in authors:
-            if author.get("orcid"):
-                orcids.append(author.get("orcid"))
-            affiliations = author.get("affiliations", [])
-            for affiliation in affiliations:
-                affiliations_list.append(affiliation)
-                if affiliation.get("ror"):
-                    rors.append(affiliation.get("ror"))
-
-        total_related_materials_dataset = 0
-        total_related_materials_software = 0
-        for related_material in article.related_materials:
-            if related_material.related_material_type == "dataset":
-                total_related_materials_dataset += 1
-            elif related_material.related_material_type == "software":
-                total_related_materials_software += 1
-
-        if (publisher == publisher_name) or (publisher_name is None):
-            result_data.append(
-                [
-                    year,
-                    journal,
-                    doi,
-                    publication_date,
-                    arxiv,
-                    arxiv_category,
-                    len(authors),
-                    len(orcids),
-                    len(affiliations_list),
-                    len(rors),
-                    total_related_materials_dataset,
-                    total_related_materials_software,
-                ]
-            )
+    if publisher_name is not None:
+        search = search.filter("term", publisher=publisher_name)
+    search = search.extra(docvalue_fields=YEAR_EXPORT_COUNT_FIELDS)
+
+    for article in scan(search, YEAR_EXPORT_FIELDS):
+        counts = article.meta.fields
+        yield [
+            article.publication_date.year,
+            article.journal_title,
+            article.doi,
+            article.publication_date,
+            article.arxiv_id,
+            article.arxiv_primary_category,
+        ] + [counts[field][0] for field in YEAR_EXPORT_COUNT_FIELDS]
 
-    return {"header": result_headers, "data": result_data}
+
+def year_export(start_date=None, end_date=None, publisher_name=None):
+    return {
+        "header": YEAR_EXPORT_HEADER,
+        "data": list(iter_year_export(start_date, end_date, publisher_name)),
+    }
 
 
 def update_article_db_model_sequence(new_start_sequence):